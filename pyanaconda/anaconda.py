@@ -32,7 +32,6 @@ import os
 import sys
 from tempfile import mkstemp
 
-from pyanaconda.bootloader import get_bootloader
 from pyanaconda import iutil
 from pyanaconda.constants import ADDON_PATHS
 from pyanaconda import addons
@@ -79,6 +78,7 @@ class Anaconda(object):
     @property
     def bootloader(self):
         if not self._bootloader:
+            from pyanaconda.bootloader import get_bootloader
             self._bootloader = get_bootloader()
 
         return self._bootloader
@@ -162,6 +162,7 @@ class Anaconda(object):
         from meh.dump import ReverseExceptionDump
         from inspect import stack as _stack
         from traceback import format_stack
+        from pyanaconda.threads import threadMgr
 
         # Skip the frames for dumpState and the signal handler.
         stack = _stack()[2:]
@@ -188,6 +189,9 @@ class Anaconda(object):
             f.write("--- traceback: %s ---\n" % filename)
             f.write(dump_text + "\n")
 
+        # what the threads have been doing and waiting for
+        threadMgr.dump_activity()
+
     def initInterface(self, addon_paths=None):
         if self._intf:
             raise RuntimeError("Second attempt to initialize the InstallInterface")
@@ -22,12 +22,15 @@
 #            Michael Fulbright <msf@redhat.com>
 #
 
+import copy
 import logging
 from logging.handlers import SysLogHandler, SYSLOG_UDP_PORT
 import os
 import sys
 import types
 import warnings
+import threading
+import Queue
 
 from pyanaconda.flags import flags
 
@@ -42,8 +45,12 @@ STORAGE_LOG_FILE = "/tmp/storage.log"
 PACKAGING_LOG_FILE = "/tmp/packaging.log"
 ANACONDA_SYSLOG_FACILITY = SysLogHandler.LOG_LOCAL1
 
-from threading import Lock
-program_log_lock = Lock()
+# maximum number of records waiting for the log writer thread, debug records
+# are dropped when the queue is full, other records wait for a free slot
+LOG_QUEUE_SIZE = 10000
+
+# maximum number of records written before flushing the log files
+LOG_BATCH_SIZE = 500
 
 logLevelMap = {"debug": logging.DEBUG, "info": logging.INFO,
                "warning": logging.WARNING, "error": logging.ERROR,
@@ -67,10 +74,133 @@ class AnacondaSyslogHandler(SysLogHandler):
         SysLogHandler.__init__(self, address, facility)
 
     def emit(self, record):
-        original_msg = record.msg
-        record.msg = '%s: %s' %(self.tag, original_msg)
+        # other handlers may be formatting the same record, tag a copy
+        record = copy.copy(record)
+        record.msg = '%s: %s' %(self.tag, record.msg)
         SysLogHandler.emit(self, record)
-        record.msg = original_msg
+
+class BatchFileHandler(logging.FileHandler):
+    """FileHandler that only flushes the file when told to by flush_batch
+       (or when closed) instead of after every record.
+    """
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        logging.FileHandler.flush(self)
+
+    def close(self):
+        self.flush_batch()
+        logging.FileHandler.close(self)
+
+class AsyncLogWriter(object):
+    """Thread handling log records passed from AsyncLogHandlers.
+
+       The records are handled in batches by a single thread so that the
+       threads doing the logging don't wait for the file writes and syslog
+       sends.  Records logged in forked processes or by the writer thread
+       itself are handled right away.
+    """
+    def __init__(self, max_records=LOG_QUEUE_SIZE, batch_size=LOG_BATCH_SIZE):
+        self._queue = Queue.Queue(max_records)
+        self._batch_size = batch_size
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._pid = os.getpid()
+
+        self._thread = threading.Thread(name="AnaLogWriterThread", target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _handle_directly(self):
+        return os.getpid() != self._pid or \
+               threading.current_thread() is self._thread or \
+               not self._thread.is_alive()
+
+    def put(self, handler, record):
+        """Pass the record to the handler in the writer thread."""
+
+        if self._handle_directly():
+            handler.handle(record)
+            return
+
+        try:
+            self._queue.put_nowait((handler, record))
+        except Queue.Full:
+            if record.levelno <= logging.DEBUG:
+                with self._dropped_lock:
+                    self._dropped += 1
+            else:
+                self._queue.put((handler, record))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self._batch_size:
+                    batch.append(self._queue.get_nowait())
+            except Queue.Empty:
+                pass
+
+            handlers = set()
+            for (handler, record) in batch:
+                try:
+                    handler.handle(record)
+                    handlers.add(handler)
+                # pylint: disable=W0702
+                except:
+                    handler.handleError(record)
+
+            for handler in handlers:
+                if hasattr(handler, "flush_batch"):
+                    handler.flush_batch()
+
+            with self._dropped_lock:
+                dropped = self._dropped
+                self._dropped = 0
+            if dropped:
+                logging.getLogger("anaconda").warning("%d debug log messages dropped, "
+                                                      "logging too fast", dropped)
+
+            for _item in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """Wait for all the queued records to be handled."""
+
+        if not self._handle_directly():
+            self._queue.join()
+
+class AsyncLogHandler(logging.Handler):
+    """Handler passing records to the target handler in the AsyncLogWriter
+       thread.
+    """
+    def __init__(self, writer, target):
+        logging.Handler.__init__(self, target.level)
+        self._writer = writer
+        self.target = target
+
+    def emit(self, record):
+        # the record is handled later, queue a copy independent of its
+        # arguments and the current exception, the other handlers still use
+        # the original record
+        try:
+            queued = copy.copy(record)
+            if queued.args:
+                queued.msg = queued.getMessage()
+                queued.args = None
+            if queued.exc_info:
+                queued.exc_text = logging.Formatter().formatException(queued.exc_info)
+                queued.exc_info = None
+        # pylint: disable=W0702
+        except:
+            self.handleError(record)
+            return
+
+        self._writer.put(self.target, queued)
+
+    def flush(self):
+        self._writer.flush()
 
 class AnacondaLog:
     SYSLOG_CFGFILE  = "/etc/rsyslog.conf"
@@ -79,6 +209,7 @@ class AnacondaLog:
     def __init__ (self):
         self.loglevel = DEFAULT_LEVEL
         self.remote_syslog = None
+        self.writer = AsyncLogWriter()
         # Rename the loglevels so they are the same as in syslog.
         logging.addLevelName(logging.WARNING, "WARN")
         logging.addLevelName(logging.ERROR, "ERR")
@@ -143,12 +274,18 @@ class AnacondaLog:
                         autoLevel=False):
         try:
             if isinstance(dest, types.StringTypes):
-                logfileHandler = logging.FileHandler(dest)
+                logfileHandler = BatchFileHandler(dest)
             else:
                 logfileHandler = logging.StreamHandler(dest)
 
-            logfileHandler.setLevel(minLevel)
             logfileHandler.setFormatter(logging.Formatter(fmtStr, DATE_FORMAT))
+
+            # files are written by the writer thread, streams (stdout, stderr)
+            # right away not to get out of order with other output
+            if isinstance(logfileHandler, BatchFileHandler):
+                logfileHandler = AsyncLogHandler(self.writer, logfileHandler)
+
+            logfileHandler.setLevel(minLevel)
             autoSetLevel(logfileHandler, autoLevel)
             addToLogger.addHandler(logfileHandler)
         except IOError:
@@ -165,6 +302,7 @@ class AnacondaLog:
             '/dev/log',
             ANACONDA_SYSLOG_FACILITY,
             logr.name)
+        syslogHandler = AsyncLogHandler(self.writer, syslogHandler)
         syslogHandler.setLevel(logging.DEBUG)
         logr.addHandler(syslogHandler)
 
@@ -209,7 +347,19 @@ class AnacondaLog:
         self.restartSyslog()
 
 
+    def flush(self):
+        """Wait for all the log records to be written out."""
+
+        self.writer.flush()
+
 logger = None
 def init():
     global logger
     logger = AnacondaLog()
+
+def flush():
+    """Wait for all the log records to be written out (if logging was
+       initialized).
+    """
+    if logger:
+        logger.flush()
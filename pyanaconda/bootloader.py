@@ -25,6 +25,7 @@ import collections
 import os
 import re
 import struct
+import time
 import blivet
 from parted import PARTITION_BIOS_GRUB
 
@@ -37,15 +38,30 @@ from blivet.errors import StorageError
 from blivet.fcoe import fcoe
 import pyanaconda.network
 from pyanaconda.errors import errorHandler, ERROR_RAISE, ZIPLError
-from pyanaconda.packaging.rpmostreepayload import RPMOSTreePayload
 from pyanaconda.nm import nm_device_hwaddress
 from blivet import platform
 from blivet.size import Size
 from pyanaconda.i18n import _, N_
+from contextlib import contextmanager
 
 import logging
 log = logging.getLogger("anaconda")
 
+@contextmanager
+def timed_step(step):
+    """ Log how long the step of writing the boot loader took. """
+    start = time.time()
+    try:
+        yield
+    finally:
+        log.info("bootloader.py: %s took %.2f s", step, time.time() - start)
+
+def grub_quote(string):
+    """ Return the string in single quotes for grub.cfg. """
+    # a single quote can't be escaped inside single quotes, end the quoted
+    # part, add an escaped quote and start a new quoted part
+    return "'%s'" % string.replace("'", "'\\''")
+
 def get_boot_block(device, seek_blocks=0):
     status = device.status
     if not status:
@@ -1404,6 +1420,19 @@ class GRUB2(GRUB):
     can_update = True
     terminal_type = "console"
 
+    # commands loading the kernel and the initrd in grub.cfg written
+    # without grub2-mkconfig
+    linux_command = "linux16"
+    initrd_command = "initrd16"
+
+    # grub modules of the stage2 file systems grub.cfg can be written for
+    # without grub2-mkconfig
+    fs_modules = {"ext2": "ext2", "ext3": "ext2", "ext4": "ext2", "xfs": "xfs"}
+
+    # whether the menu entries of grub.cfg written without grub2-mkconfig
+    # load the video drivers and keep the graphics mode for the kernel
+    load_video = False
+
     # requirements for boot devices
     stage2_device_types = ["partition", "mdarray"]
     stage2_raid_levels = [raid.RAID0, raid.RAID1, raid.RAID4,
@@ -1542,6 +1571,180 @@ class GRUB2(GRUB):
         header.close()
         os.chmod(users_file, 0700)
 
+    def entry_title(self, image):
+        """ Return the title of the image's menu entry. """
+        return "%s Linux, with Linux %s" % (productName, image.version)
+
+    @property
+    def fast_linux_images(self):
+        """ Linux images of grub.cfg written without grub2-mkconfig. """
+        # the images property adds the chain images to linux_images
+        return [i for i in self.linux_images if isinstance(i, LinuxBootLoaderImage)]
+
+    @property
+    def fast_write(self):
+        """ Whether the boot loader should be written in the fast mode (the
+            inst.fastbootloader boot option).
+        """
+        return flags.cmdline.getbool("fastbootloader")
+
+    def _fast_config_problem(self):
+        """ Return why grub.cfg can't be written without grub2-mkconfig or
+            None if it can.
+        """
+        images = self.fast_linux_images
+        if not images:
+            return "no linux images"
+
+        if any(isinstance(image, TbootLinuxBootLoaderImage) for image in images):
+            return "tboot images are not supported"
+
+        if self.stage2_device.type not in ("partition", "mdarray"):
+            return "unsupported stage2 device type %s" % self.stage2_device.type
+
+        if self.stage2_device.format.type not in self.fs_modules:
+            return "unsupported stage2 format type %s" % self.stage2_device.format.type
+
+        if not self.stage2_device.format.uuid:
+            return "stage2 file system has no UUID"
+
+        if any(disk.format.labelType not in ("msdos", "gpt") for disk in self.stage2_device.disks):
+            return "unsupported disklabel of the stage2 device"
+
+        return None
+
+    def grub_modules(self, device):
+        """ Return the grub modules needed for reading the file system on the
+            device.
+        """
+        modules = []
+        for disk in device.disks:
+            module = "part_%s" % disk.format.labelType
+            if module not in modules:
+                modules.append(module)
+
+        if device.type == "mdarray":
+            if device.metadataVersion in ("0", "0.90"):
+                modules.append("mdraid09")
+            else:
+                modules.append("mdraid1x")
+
+        if device.format.type in self.fs_modules:
+            modules.append(self.fs_modules[device.format.type])
+
+        return modules
+
+    @property
+    def fast_chain_images(self):
+        """ Images of the other operating systems on the disks in disk_order,
+            or on all the boot loader's disks if disk_order is not set.
+        """
+        if not self.can_dual_boot:
+            return []
+
+        names = self.disk_order or [d.name for d in self.disks]
+        images = []
+        for image in self.chain_images:
+            disk = getattr(image.device, "disk", image.device)
+            if image.label and disk in self.disks and disk.name in names:
+                images.append(image)
+
+        return images
+
+    def write_config_header(self, config):
+        """ Write the global part of grub.cfg written without grub2-mkconfig. """
+        config.write("# grub.cfg generated by anaconda without grub2-mkconfig\n"
+                     "# Run grub2-mkconfig -o %s to generate it from %s\n"
+                     "# and /etc/grub.d.\n\n" % (self.config_file, self.defaults_file))
+
+        # the same default entry handling grub2-mkconfig writes for
+        # GRUB_DEFAULT=saved
+        config.write("set pager=1\n\n"
+                     "if [ -s $prefix/grubenv ]; then\n"
+                     "  load_env\n"
+                     "fi\n"
+                     "if [ \"${next_entry}\" ] ; then\n"
+                     "   set default=\"${next_entry}\"\n"
+                     "   set next_entry=\n"
+                     "   save_env next_entry\n"
+                     "   set boot_once=true\n"
+                     "else\n"
+                     "   set default=\"${saved_entry}\"\n"
+                     "fi\n\n")
+
+        if self.console and self.has_serial_console:
+            config.write("%s\n" % self.serial_command)
+            config.write("terminal_input serial console\n")
+            config.write("terminal_output serial console\n")
+        else:
+            config.write("terminal_output %s\n" % self.terminal_type)
+
+        config.write("set timeout=%d\n" % self.timeout)
+
+        if self.load_video:
+            # the same function grub2-mkconfig writes
+            config.write("\nfunction load_video {\n"
+                         "  if [ x$feature_all_video_module = xy ]; then\n"
+                         "    insmod all_video\n"
+                         "  else\n"
+                         "    insmod efi_gop\n"
+                         "    insmod efi_uga\n"
+                         "    insmod ieee1275_fb\n"
+                         "    insmod vbe\n"
+                         "    insmod vga\n"
+                         "    insmod video_bochs\n"
+                         "    insmod video_cirrus\n"
+                         "  fi\n"
+                         "}\n")
+
+        if self.encrypted_password:
+            config.write("set superusers=\"root\"\n")
+            config.write("export superusers\n")
+            config.write("password_pbkdf2 root %s\n" % self.encrypted_password)
+
+        config.write("\n")
+
+    def write_config_images(self, config):
+        """ Write the menu entries of grub.cfg written without grub2-mkconfig. """
+        for image in self.fast_linux_images:
+            args = Arguments()
+            args.update(["ro", "root=%s" % image.device.fstabSpec])
+            args.update(self.boot_args)
+
+            config.write("menuentry %s --class gnu-linux --class gnu --class os --unrestricted {\n"
+                         % grub_quote(self.entry_title(image)))
+            if self.load_video:
+                config.write("\tload_video\n")
+                config.write("\tset gfxpayload=keep\n")
+            for module in self.grub_modules(self.stage2_device):
+                config.write("\tinsmod %s\n" % module)
+            config.write("\tsearch --no-floppy --fs-uuid --set=root %s\n"
+                         % self.stage2_device.format.uuid)
+            config.write("\t%s %s/%s %s\n" % (self.linux_command, self.boot_prefix,
+                                              image.kernel, args))
+            config.write("\t%s %s/%s\n" % (self.initrd_command, self.boot_prefix,
+                                           image.initrd))
+            config.write("}\n")
+
+        for image in self.fast_chain_images:
+            config.write("menuentry %s --class os {\n" % grub_quote(image.label))
+            for module in self.grub_modules(image.device):
+                config.write("\tinsmod %s\n" % module)
+            config.write("\tinsmod chain\n")
+            # the disk numbers grub uses may not match the order of the disks
+            uuid = getattr(image.device.format, "uuid", None)
+            if uuid:
+                config.write("\tsearch --no-floppy --fs-uuid --set=root %s\n" % uuid)
+            else:
+                config.write("\tset root=%s\n"
+                             % grub_quote(self.grub_device_name(image.device).strip("()")))
+            config.write("\tchainloader +1\n")
+            config.write("}\n")
+
+    def write_config_post(self):
+        # grub.cfg only needs its permissions set, unlike GRUB's menu.lst
+        BootLoader.write_config_post(self)
+
     def write_config(self):
         self.write_config_console(None)
         # See if we have a password and if so update the boot args before we
@@ -1559,15 +1762,27 @@ class GRUB2(GRUB):
 
         # make sure the default entry is the OS we are installing
         if self.default is not None:
-            entry_title = "%s Linux, with Linux %s" % (productName,
-                                                       self.default.version)
-            rc = iutil.execInSysroot("grub2-set-default", [entry_title])
+            entry_title = self.entry_title(self.default)
+            with timed_step("grub2-set-default"):
+                rc = iutil.execInSysroot("grub2-set-default", [entry_title])
             if rc:
                 log.error("failed to set default menu entry to %s", productName)
 
+        if self.fast_write:
+            problem = self._fast_config_problem()
+            if problem is None:
+                # render grub.cfg from the images we know about, without
+                # running grub2-mkconfig and os-prober
+                with timed_step("writing %s" % self.config_file):
+                    BootLoader.write_config(self)
+                return
+
+            log.info("bootloader.py: running grub2-mkconfig: %s", problem)
+
         # now tell grub2 to generate the main configuration file
-        rc = iutil.execInSysroot("grub2-mkconfig",
-                                 ["-o", self.config_file])
+        with timed_step("grub2-mkconfig"):
+            rc = iutil.execInSysroot("grub2-mkconfig",
+                                     ["-o", self.config_file])
         if rc:
             raise BootLoaderError("failed to write boot loader configuration")
 
@@ -1602,15 +1817,27 @@ class GRUB2(GRUB):
             self.update()
             return
 
+        # in the fast mode the files are only flushed once, after both
+        # grub2-install and the configuration wrote them
+        fast = self.fast_write
+
         try:
             self.write_device_map()
-            self.stage2_device.format.sync(root=iutil.getTargetPhysicalRoot())
-            sync()
-            self.install()
-            sync()
-            self.stage2_device.format.sync(root=iutil.getTargetPhysicalRoot())
+            if not fast:
+                self.sync_boot_files()
+            with timed_step("installing %s" % self.name):
+                self.install()
+            if not fast:
+                self.sync_boot_files()
         finally:
             self.write_config()
+            self.sync_boot_files()
+
+    def sync_boot_files(self):
+        """ Flush the boot loader's files to the disks so that they can be
+            read when booting.
+        """
+        with timed_step("sync"):
             sync()
             self.stage2_device.format.sync(root=iutil.getTargetPhysicalRoot())
 
@@ -1663,6 +1890,12 @@ class EFIGRUB(GRUB2):
 
     _efi_binary = "\\shim.efi"
 
+    linux_command = "linuxefi"
+    initrd_command = "initrdefi"
+
+    # the EFI framebuffer is the only console there is
+    load_video = True
+
     @property
     def _config_dir(self):
         return "efi/EFI/%s" % (self.efi_dir,)
@@ -1752,12 +1985,18 @@ class EFIGRUB(GRUB2):
             self.update()
             return
 
+        # nothing reads the files before the configuration is written
+        fast = self.fast_write
+
         try:
-            sync()
-            self.stage2_device.format.sync(root=iutil.getTargetPhysicalRoot())
-            self.install()
+            if not fast:
+                self.sync_boot_files()
+            with timed_step("installing %s" % self.name):
+                self.install()
         finally:
             self.write_config()
+            if fast:
+                self.sync_boot_files()
 
     def check(self):
         return True
@@ -1766,6 +2005,9 @@ class EFIGRUB(GRUB2):
 class Aarch64EFIGRUB(EFIGRUB):
     packages = ["grub2-efi", "efibootmgr", "shim", "grubby"]
 
+    linux_command = "linux"
+    initrd_command = "initrd"
+
     _serial_consoles = ["ttyAMA", "ttyS"]
 
 class MacEFIGRUB(EFIGRUB):
@@ -1982,6 +2224,9 @@ class IPSeriesGRUB2(GRUB2):
     stage2_bootable = False
     terminal_type = "ofconsole"
 
+    linux_command = "linux"
+    initrd_command = "initrd"
+
     #
     # installation
     #
@@ -2044,6 +2289,10 @@ class IPSeriesGRUB2(GRUB2):
         defaults.write("GRUB_TERMINFO=\"terminfo -g 80x24 console\"\n")
         defaults.close()
 
+    def write_config_header(self, config):
+        super(IPSeriesGRUB2, self).write_config_header(config)
+        config.write("terminfo -g 80x24 console\n\n")
+
 
 class MacYaboot(Yaboot):
     prog = "mkofboot"
@@ -2396,6 +2645,8 @@ def writeBootLoader(storage, payload, instClass, ksdata):
     if hasattr(storage.bootloader, 'efi_dir'):
         storage.bootloader.efi_dir = instClass.efi_dir
 
+    # the backend module is only loaded if it's used
+    from pyanaconda.packaging.rpmostreepayload import RPMOSTreePayload
     if isinstance(payload, RPMOSTreePayload):
         if storage.bootloader.skip_bootloader:
             log.info("skipping boot loader install per user request")
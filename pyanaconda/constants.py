@@ -91,6 +91,9 @@ RUNLEVELS = {3: 'multi-user.target', 5: 'graphical.target'}
 # Network
 NETWORK_CONNECTION_TIMEOUT = 45  # in seconds
 
+# Storage
+STORAGE_TARGETS_TIMEOUT = 120  # in seconds, shared by iSCSI, FCoE and zFCP
+
 # DBus
 DEFAULT_DBUS_TIMEOUT = -1       # use default
 
@@ -115,10 +118,16 @@ THREAD_CONFIGURATION = "AnaConfigurationThread"
 THREAD_FCOE = "AnaFCOEThread"
 THREAD_ISCSI_DISCOVER = "AnaIscsiDiscoverThread"
 THREAD_ISCSI_LOGIN = "AnaIscsiLoginThread"
+THREAD_STORAGE_TARGETS = "AnaStorageTargets"
+THREAD_KS_SCRIPTS = "AnaKickstartScripts"
+THREAD_PASSWORD_CRYPT = "AnaPasswordCrypt"
+THREAD_ISO_PROBE = "AnaIsoProbe"
 THREAD_GEOLOCATION_REFRESH = "AnaGeolocationRefreshThread"
 THREAD_DATE_TIME = "AnaDateTimeThread"
 THREAD_TIME_INIT = "AnaTimeInitThread"
 THREAD_DASDFMT = "AnaDasdfmtThread"
+THREAD_XKL_WRAPPER_INIT = "AnaXklWrapperInitThread"
+THREAD_LANGSUPPORT_INIT = "AnaLangsupportInitThread"
 
 # Geolocation constants
 
@@ -158,3 +167,6 @@ SCREENSHOTS_TARGET_DIRECTORY = "/root/anaconda-screenshots"
 # for how long (in seconds) we try to wait for enough entropy for LUKS
 # keep this a multiple of 60 (minutes)
 MAX_ENTROPY_WAIT = 10 * 60
+
+# number of progress steps the installation of the payload is split into
+PAYLOAD_INSTALL_STEPS = 10
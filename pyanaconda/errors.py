@@ -23,7 +23,7 @@ from pyanaconda.i18n import _
 __all__ = ["ERROR_RAISE", "ERROR_CONTINUE", "ERROR_RETRY",
            "ErrorHandler",
            "InvalidImageSizeError", "MissingImageError", "MediaUnmountError",
-           "MediaMountError", "ScriptError", "CmdlineError",
+           "MediaMountError", "MediaChecksumError", "ScriptError", "CmdlineError",
            "errorHandler"]
 
 class InvalidImageSizeError(Exception):
@@ -38,6 +38,11 @@ class MediaMountError(Exception):
 class MediaUnmountError(Exception):
     pass
 
+class MediaChecksumError(Exception):
+    def __init__(self, path):
+        Exception.__init__(self)
+        self.path = path
+
 class ScriptError(Exception):
     pass
 
@@ -180,6 +185,20 @@ class ErrorHandler(object):
                     "and then click OK to retry.") % device.path
         self.ui.showError(message)
 
+    def _mediaChecksumHandler(self, *args, **kwargs):
+        message = _("The ISO image %s doesn't match the checksums "
+                    "implanted in it.  This may mean it was corrupted "
+                    "on transfer to this computer."
+                    "\n\n"
+                    "It is recommended that you exit and abort your "
+                    "installation, but you can choose to continue if "
+                    "you think this is in error. Would you like to "
+                    "continue using this image?") % kwargs["exception"].path
+        if self.ui.showYesNoQuestion(message):
+            return ERROR_CONTINUE
+        else:
+            return ERROR_RAISE
+
     def _noSuchGroupHandler(self, *args, **kwargs):
         group = args[0]
         adding = args[1]
@@ -296,6 +315,7 @@ class ErrorHandler(object):
                 "MissingImageError": self._missingImageHandler,
                 "MediaMountError": self._mediaMountHandler,
                 "MediaUnmountError": self._mediaUnmountHandler,
+                "MediaChecksumError": self._mediaChecksumHandler,
                 "NoSuchGroup": self._noSuchGroupHandler,
                 "NoSuchPackage": self._noSuchPackageHandler,
                 "ScriptError": self._scriptErrorHandler,
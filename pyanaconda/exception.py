@@ -40,6 +40,7 @@ from pyanaconda.i18n import _
 from pyanaconda import flags
 from pyanaconda import product
 from pyanaconda import startup_utils
+from pyanaconda import anaconda_log
 
 from gi.repository import GLib
 
@@ -82,6 +83,9 @@ class AnacondaExceptionHandler(ExceptionHandler):
 
         log.debug("running handleException")
 
+        # make sure the logs included in the dump are complete
+        anaconda_log.flush()
+
         ty = dump_info.exc_info.type
         value = dump_info.exc_info.value
 
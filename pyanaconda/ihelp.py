@@ -24,7 +24,7 @@ import os
 import subprocess
 
 from pyanaconda.flags import flags
-from pyanaconda.localization import find_best_locale_match
+from pyanaconda.localization import find_best_locale_match, LangcodeIndex
 from pyanaconda.constants import DEFAULT_LANG
 
 import blivet
@@ -56,7 +56,7 @@ def _get_best_help_file(help_folder, help_file):
         log.warning("help folder %s for help file %s does not exist", help_folder, help_file)
         return None
 
-    help_langs = [l for l in os.listdir(help_folder) if os.path.isfile(os.path.join(help_folder, l, help_file))]
+    help_langs = LangcodeIndex(l for l in os.listdir(help_folder) if os.path.isfile(os.path.join(help_folder, l, help_file)))
 
     best_lang = find_best_locale_match(current_lang, help_langs)
     if not best_lang and current_lang != DEFAULT_LANG:
@@ -17,11 +17,23 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
-from pyanaconda import isys
 import os, os.path, stat, tempfile
-from pyanaconda.constants import ISO_DIR
-
-from pyanaconda.errors import errorHandler, ERROR_RAISE, InvalidImageSizeError, MediaMountError, MediaUnmountError, MissingImageError
+import errno
+import hashlib
+import io
+import mmap
+import struct
+import threading
+import time
+import Queue
+from collections import namedtuple
+from pyanaconda.constants import ISO_DIR, THREAD_ISO_PROBE
+from pyanaconda.flags import flags
+from pyanaconda.i18n import _
+from pyanaconda.progress import progressQ
+from pyanaconda.threads import ThreadPool
+
+from pyanaconda.errors import errorHandler, ERROR_RAISE, InvalidImageSizeError, MediaMountError, MediaUnmountError, MissingImageError, MediaChecksumError
 
 import blivet.util
 import blivet.arch
@@ -32,6 +44,393 @@ log = logging.getLogger("anaconda")
 
 _arch = blivet.arch.getArch()
 
+ISO_SECTOR_SIZE = 2048
+# the volume descriptors start after the 16 sectors of the system area
+ISO_VOLUME_DESCRIPTORS_START = 16
+
+# maximum number of images or devices probed at the same time
+ISO_PROBE_THREADS = 8
+
+# checksums implanted by implantisomd5 are stored in the application use
+# area of the primary volume descriptor
+ISO_APPDATA_OFFSET = 883
+ISO_APPDATA_SIZE = 512
+
+# size of blocks the media are read in when checking their checksum
+MEDIA_CHECK_BLOCK_SIZE = 4 * 1024 * 1024
+# number of blocks read ahead of the one being hashed
+MEDIA_CHECK_READ_AHEAD = 2
+# seconds between progress reports of media check
+MEDIA_CHECK_REPORT_INTERVAL = 1.0
+# checkisomd5 hashes the media by blocks of 16 sectors and checks the
+# fragment sums at the end of the block where a new fragment starts
+_ISOMD5_BLOCK_SIZE = 16 * ISO_SECTOR_SIZE
+
+# stamp and arch are None if the image has no .discinfo
+IsoImageInfo = namedtuple("IsoImageInfo", ["stamp", "arch", "has_repodata"])
+
+# path -> ((size, mtime), IsoImageInfo), only regular files are cached
+_iso_info_cache = {}
+_iso_info_cache_lock = threading.Lock()
+
+def _iso_root_directory(f):
+    """Return (extent, size, joliet) of the root directory of ISO9660
+       filesystem, the Joliet directory tree is preferred if present.
+
+       :raise ValueError: if there is no ISO9660 filesystem
+    """
+    root = None
+    sector = ISO_VOLUME_DESCRIPTORS_START
+    while True:
+        f.seek(sector * ISO_SECTOR_SIZE)
+        desc = f.read(ISO_SECTOR_SIZE)
+        if len(desc) < ISO_SECTOR_SIZE or desc[1:6] != b"CD001":
+            break
+
+        vd_type = ord(desc[0])
+        if vd_type == 255:
+            # volume descriptor set terminator
+            break
+
+        # root directory record is at offset 156 of the descriptor,
+        # extent and size are stored both as little and big endian
+        extent, size = struct.unpack("<I4xI", desc[158:170])
+        if vd_type == 1 and root is None:
+            root = (extent, size, False)
+        elif vd_type == 2 and desc[88:90] == b"%/" and desc[90] in b"@CE":
+            # supplementary descriptor with Joliet escape sequence
+            return (extent, size, True)
+        sector += 1
+
+    if root is None:
+        raise ValueError("no ISO9660 primary volume descriptor found")
+    return root
+
+def _rock_ridge_name(system_use):
+    """Return Rock Ridge alternate name (NM entries) from the system use
+       area of directory record or None if there is none.
+    """
+    name = b""
+    pos = 0
+    while pos + 4 <= len(system_use):
+        signature = system_use[pos:pos + 2]
+        length = ord(system_use[pos + 2])
+        if length < 4 or signature == b"ST":
+            break
+        if signature == b"NM":
+            name += system_use[pos + 5:pos + length]
+            # the name continues in the next NM entry if the flag is set
+            if not ord(system_use[pos + 4]) & 1:
+                return name
+        pos += length
+
+    return name or None
+
+def _iso_directory(f, extent, size, joliet):
+    """Return entries of ISO9660 directory.
+
+       :return: dict mapping names to (extent, size, is_directory)
+    """
+    f.seek(extent * ISO_SECTOR_SIZE)
+    data = f.read(size)
+    entries = {}
+    pos = 0
+    while pos < len(data):
+        length = ord(data[pos])
+        if length == 0:
+            # records don't cross sectors, the rest of the sector is padding
+            pos = (pos // ISO_SECTOR_SIZE + 1) * ISO_SECTOR_SIZE
+            continue
+
+        record = data[pos:pos + length]
+        pos += length
+
+        name_len = ord(record[32])
+        name = record[33:33 + name_len]
+        if name in (b"\0", b"\1"):
+            # "." and ".."
+            continue
+
+        if joliet:
+            name = name.decode("utf-16-be").encode("utf-8").split(";")[0]
+        else:
+            # the system use area follows the name padded to even length
+            rr_name = _rock_ridge_name(record[33 + name_len + (1 - name_len % 2):])
+            if rr_name:
+                name = rr_name
+            else:
+                # plain ISO9660 name, translate it the way the kernel does
+                name = name.split(";")[0].rstrip(".").lower()
+
+        extent_, size_ = struct.unpack("<I4xI", record[2:14])
+        entries[name] = (extent_, size_, bool(ord(record[25]) & 2))
+
+    return entries
+
+def _parse_discinfo(content):
+    """Return (stamp, arch) from contents of .discinfo file."""
+    lines = content.splitlines()
+    stamp = lines[0].strip() if lines else ""
+    # the second line is the description
+    arch = lines[2].strip() if len(lines) > 2 else ""
+    return (stamp, arch)
+
+def _read_iso_info(path):
+    """Read .discinfo and look for repodata in ISO9660 image or device
+       without mounting it.
+
+       :raise ValueError: if there is no ISO9660 filesystem
+       :raise IOError: if the image can't be read
+    """
+    with open(path, "rb") as f:
+        root = _iso_directory(f, *_iso_root_directory(f))
+
+        stamp, arch = None, None
+        if ".discinfo" in root and not root[".discinfo"][2]:
+            extent, size, _is_dir = root[".discinfo"]
+            f.seek(extent * ISO_SECTOR_SIZE)
+            stamp, arch = _parse_discinfo(f.read(size))
+
+    return IsoImageInfo(stamp, arch, "repodata" in root)
+
+def probeIsoImage(path):
+    """Return information about installation media in ISO9660 image or
+       device without mounting it.
+
+       Results for image files are cached and reused as long as the size
+       and modification time of the file don't change.
+
+       :param path: path of the image file or device
+       :return: IsoImageInfo or None if path isn't readable ISO9660 image
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    cacheable = stat.S_ISREG(st.st_mode)
+    key = (st.st_size, st.st_mtime)
+    if cacheable:
+        with _iso_info_cache_lock:
+            cached = _iso_info_cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+    try:
+        info = _read_iso_info(path)
+    except (IOError, ValueError, struct.error, UnicodeError) as e:
+        log.debug("%s is not a readable ISO9660 image: %s", path, e)
+        info = None
+
+    if cacheable:
+        with _iso_info_cache_lock:
+            _iso_info_cache[path] = (key, info)
+
+    return info
+
+# one pool for all the probes, started workers exit when they are idle
+_probePool = ThreadPool(THREAD_ISO_PROBE, max_workers=ISO_PROBE_THREADS, fatal=False)
+
+def _map_parallel(function, items):
+    """Like map(), but runs the function for the items in threads."""
+    if len(items) < 2:
+        return map(function, items)
+
+    return _probePool.map(function, items)
+
+def _read_implanted_md5(f):
+    """Return the size of ISO9660 image and the values implanted in it by
+       implantisomd5.
+
+       :return: (size of the image, dict of implanted values)
+       :raise ValueError: if there is no ISO9660 filesystem
+    """
+    f.seek(ISO_VOLUME_DESCRIPTORS_START * ISO_SECTOR_SIZE)
+    pvd = f.read(ISO_SECTOR_SIZE)
+    if len(pvd) < ISO_SECTOR_SIZE or pvd[0:6] != b"\x01CD001":
+        raise ValueError("no ISO9660 primary volume descriptor found")
+
+    # volume space size and logical block size, big endian parts
+    blocks = struct.unpack(">I", pvd[84:88])[0]
+    block_size = struct.unpack(">H", pvd[130:132])[0]
+
+    values = {}
+    appdata = pvd[ISO_APPDATA_OFFSET:ISO_APPDATA_OFFSET + ISO_APPDATA_SIZE]
+    for item in appdata.split(";"):
+        key, sep, value = item.partition("=")
+        if sep:
+            values[key.strip()] = value.strip()
+
+    return (blocks * block_size, values)
+
+def _isomd5_fragment_checks(size, count):
+    """Return offsets after which checkisomd5 verifies the fragment sums.
+
+       :return: sorted list of (offset, fragment number)
+    """
+    checks = {}
+    for fragment in range(1, count + 1):
+        # the block in which the fragment starts
+        start = -(-fragment * size // (count + 1))
+        start = -(-start // _ISOMD5_BLOCK_SIZE) * _ISOMD5_BLOCK_SIZE
+        if start < size:
+            checks[min(start + _ISOMD5_BLOCK_SIZE, size)] = fragment
+    return sorted(checks.items())
+
+def _open_media(path, direct=True):
+    """Open media for reading, bypassing the page cache if possible."""
+    if direct and hasattr(os, "O_DIRECT"):
+        try:
+            return (io.FileIO(os.open(path, os.O_RDONLY | os.O_DIRECT), "r"), True)
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+    return (io.FileIO(path, "r"), False)
+
+def _read_media_blocks(path, size, full, free, stop):
+    """Read media in blocks to buffers taken from the free queue and put
+       (buffer, length) to the full queue, (None, error) at the end.
+    """
+    error = None
+    try:
+        f, direct = _open_media(path)
+        try:
+            offset = 0
+            while offset < size and not stop.is_set():
+                buf = free.get()
+                try:
+                    length = f.readinto(buf)
+                except IOError as e:
+                    if not direct or e.errno != errno.EINVAL:
+                        raise
+                    # direct I/O not supported by the filesystem
+                    f.close()
+                    f, direct = _open_media(path, direct=False)
+                    f.seek(offset)
+                    length = f.readinto(buf)
+
+                if not length:
+                    error = "unexpected end of media at %d bytes" % offset
+                    break
+
+                length = min(length, size - offset)
+                full.put((buf, length))
+                offset += length
+        finally:
+            f.close()
+    except (IOError, OSError) as e:
+        error = str(e)
+
+    full.put((None, error))
+
+def verifyMediaChecksum(path, report_progress=True):
+    """Verify installation media against the MD5 checksums implanted in
+       it by implantisomd5 (the same check checkisomd5 does).
+
+       The media are read in large blocks with direct I/O in a separate
+       thread while the data read so far is hashed. The check stops at the
+       first fragment not matching its checksum.
+
+       :param path: path of the image file or device
+       :param report_progress: report progress and speed via progressQ
+       :return: True if the media are good, False if they are not, None if
+                there are no checksums implanted in the media
+    """
+    try:
+        with open(path, "rb") as f:
+            iso_size, values = _read_implanted_md5(f)
+    except (IOError, ValueError) as e:
+        log.error("Can't check media %s: %s", path, e)
+        return None
+
+    if "ISO MD5SUM" not in values:
+        log.warning("There is no checksum implanted in %s", path)
+        return None
+
+    try:
+        size = iso_size - int(values.get("SKIPSECTORS", 0)) * ISO_SECTOR_SIZE
+        fragment_count = int(values.get("FRAGMENT COUNT", 0))
+    except ValueError:
+        log.error("Invalid checksum data implanted in %s: %s", path, values)
+        return False
+
+    fragment_sums = values.get("FRAGMENT SUMS", "")
+    if fragment_count:
+        fragment_sum_size = len(fragment_sums) // fragment_count
+        checks = _isomd5_fragment_checks(size, fragment_count)
+    else:
+        checks = []
+
+    # the implanted data were replaced by spaces when computing the checksums
+    appdata_start = ISO_VOLUME_DESCRIPTORS_START * ISO_SECTOR_SIZE + ISO_APPDATA_OFFSET
+    appdata_end = appdata_start + ISO_APPDATA_SIZE
+
+    full = Queue.Queue()
+    free = Queue.Queue()
+    for _i in range(MEDIA_CHECK_READ_AHEAD + 1):
+        # mmap gives page aligned buffers required by direct I/O
+        free.put(mmap.mmap(-1, MEDIA_CHECK_BLOCK_SIZE))
+    stop = threading.Event()
+    reader = threading.Thread(target=_read_media_blocks, args=(path, size, full, free, stop))
+    reader.daemon = True
+    reader.start()
+
+    log.info("Checking media %s (%d bytes)", path, size)
+    md5 = hashlib.md5()
+    offset = 0
+    start = last_report = time.time()
+    result = None
+    try:
+        while result is None:
+            buf, length = full.get()
+            if buf is None:
+                if length:
+                    log.error("Reading %s failed: %s", path, length)
+                    result = False
+                else:
+                    result = md5.hexdigest() == values["ISO MD5SUM"].lower()
+                break
+
+            end = offset + length
+            if offset < appdata_end and end > appdata_start:
+                clear_start = max(appdata_start, offset)
+                clear_end = min(appdata_end, end)
+                buf[clear_start - offset:clear_end - offset] = b" " * (clear_end - clear_start)
+
+            # feed the block piecewise to get the checksums at fragment ends
+            pos = offset
+            while checks and checks[0][0] <= end:
+                check_offset, fragment = checks.pop(0)
+                md5.update(buffer(buf, pos - offset, check_offset - pos))
+                pos = check_offset
+                expected = fragment_sums[(fragment - 1) * fragment_sum_size:fragment * fragment_sum_size]
+                if md5.hexdigest()[:fragment_sum_size] != expected.lower():
+                    log.error("Checksum of fragment %d of %s doesn't match", fragment, path)
+                    result = False
+                    break
+            else:
+                md5.update(buffer(buf, pos - offset, end - pos))
+
+            free.put(buf)
+            offset = end
+
+            now = time.time()
+            if report_progress and now - last_report >= MEDIA_CHECK_REPORT_INTERVAL:
+                last_report = now
+                speed = offset / (now - start) / (1024 * 1024)
+                progressQ.send_message(_("Checking media (%(percent)d %%, %(speed).1f MB/s)") %
+                                       {"percent": offset * 100 // size, "speed": speed})
+    finally:
+        stop.set()
+        # unblock the reader if it waits for a buffer
+        free.put(mmap.mmap(-1, MEDIA_CHECK_BLOCK_SIZE))
+
+    elapsed = max(time.time() - start, 0.001)
+    log.info("Media check of %s %s, read %d bytes in %.1f s (%.1f MB/s)", path,
+             "passed" if result else "failed", offset, elapsed,
+             offset / elapsed / (1024 * 1024))
+    return result
+
 def findFirstIsoImage(path):
     """
     Find the first iso image in path
@@ -52,41 +451,26 @@ def findFirstIsoImage(path):
     else:
         files = os.listdir(path)
 
-    for fn in files:
+    # the images are read without mounting them so they can all be probed
+    # at once, the first suitable one in the order of files is used
+    infos = _map_parallel(probeIsoImage, [path + '/' + fn for fn in files])
+
+    for fn, info in zip(files, infos):
         what = path + '/' + fn
         log.debug("Checking %s", what)
-        if not isys.isIsoImage(what):
+        if info is None or info.arch is None:
             continue
 
-        log.debug("mounting %s on /mnt/install/cdimage", what)
-        try:
-            blivet.util.mount(what, "/mnt/install/cdimage", fstype="iso9660", options="ro")
-        except OSError:
-            continue
-
-        if not os.access("/mnt/install/cdimage/.discinfo", os.R_OK):
-            blivet.util.umount("/mnt/install/cdimage")
-            continue
-
-        log.debug("Reading .discinfo")
-        f = open("/mnt/install/cdimage/.discinfo")
-        f.readline() # skip timestamp
-        f.readline() # skip release description
-        discArch = f.readline().strip() # read architecture
-        f.close()
-
-        log.debug("discArch = %s", discArch)
-        if discArch != arch:
+        log.debug("discArch = %s", info.arch)
+        if info.arch != arch:
             log.warning("findFirstIsoImage: architectures mismatch: %s, %s",
-                        discArch, arch)
-            blivet.util.umount("/mnt/install/cdimage")
+                        info.arch, arch)
             continue
 
         # If there's no repodata, there's no point in trying to
         # install from it.
-        if not os.access("/mnt/install/cdimage/repodata", os.R_OK):
+        if not info.has_repodata:
             log.warning("%s doesn't have repodata, skipping", what)
-            blivet.util.umount("/mnt/install/cdimage")
             continue
 
         # warn user if images appears to be wrong size
@@ -97,7 +481,6 @@ def findFirstIsoImage(path):
                 raise exn
 
         log.info("Found disc at %s", fn)
-        blivet.util.umount("/mnt/install/cdimage")
         return fn
 
     return None
@@ -157,7 +540,23 @@ def mountImageDirectory(method, storage):
                 if errorHandler.cb(exn) == ERROR_RAISE:
                     raise exn
 
+def checkImage(image):
+    """Verify the checksums implanted in the ISO image if it was requested by
+       the inst.isocheck boot option.
+
+       :raise MediaChecksumError: if the image doesn't match the checksums and
+                                  the user doesn't want to use it anyway
+    """
+    if not flags.cmdline.getbool("isocheck"):
+        return
+
+    if verifyMediaChecksum(image) is False:
+        exn = MediaChecksumError(image)
+        if errorHandler.cb(exn) == ERROR_RAISE:
+            raise exn
+
 def mountImage(isodir, tree):
+    checked = None
     while True:
         if os.path.isfile(isodir):
             image = isodir
@@ -172,6 +571,11 @@ def mountImage(isodir, tree):
 
             image = os.path.normpath("%s/%s" % (isodir, image))
 
+        # don't check the image again when retrying the mount
+        if image != checked:
+            checkImage(image)
+            checked = image
+
         try:
             blivet.util.mount(image, tree, fstype = 'iso9660', options="ro")
         except OSError:
@@ -186,11 +590,10 @@ def mountImage(isodir, tree):
 # Return the first Device instance containing valid optical install media
 # for this product.
 def opticalInstallMedia(devicetree):
-    retval = None
-
     # Search for devices identified as cdrom along with any other
     # device that has an iso9660 filesystem. This will catch USB media
     # created from ISO images.
+    devices = []
     for dev in set(devicetree.getDevicesByType("cdrom") + \
             [d for d in devicetree.devices if d.format.type == "iso9660"]):
         if not dev.controllable:
@@ -201,25 +604,35 @@ def opticalInstallMedia(devicetree):
             # no mountable media
             continue
 
-        mountpoint = tempfile.mkdtemp()
-        try:
-            try:
-                dev.format.mount(mountpoint=mountpoint)
-            except FSError:
-                continue
+        devices.append(dev)
 
-            try:
-                if not verifyMedia(mountpoint):
-                    continue
-            finally:
-                dev.format.unmount()
-        finally:
-            os.rmdir(mountpoint)
+    # read the media of all the devices at once without mounting them
+    infos = _map_parallel(probeIsoImage, [dev.path for dev in devices])
+
+    for dev, info in zip(devices, infos):
+        if info is None:
+            # not readable as ISO9660, let the filesystem driver try
+            if _verifyDeviceMedia(dev):
+                return dev
+        elif info.arch == _arch:
+            return dev
 
-        retval = dev
-        break
+    return None
 
-    return retval
+def _verifyDeviceMedia(dev):
+    mountpoint = tempfile.mkdtemp()
+    try:
+        try:
+            dev.format.mount(mountpoint=mountpoint)
+        except FSError:
+            return False
+
+        try:
+            return verifyMedia(mountpoint)
+        finally:
+            dev.format.unmount()
+    finally:
+        os.rmdir(mountpoint)
 
 # Return a list of Device instances that may have HDISO install media
 # somewhere.  Candidate devices are simply any that we can mount.
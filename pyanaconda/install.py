@@ -20,9 +20,8 @@
 # Red Hat Author(s): Chris Lumens <clumens@redhat.com>
 #
 from blivet import turnOnFilesystems, callbacks
-from pyanaconda.bootloader import writeBootLoader
 from pyanaconda.progress import progress_report, progress_message, progress_step, progress_complete, progress_init
-from pyanaconda.users import createLuserConf, getPassAlgo, Users
+from pyanaconda.users import createLuserConf, getPassAlgo, precryptPassword, Users
 from pyanaconda import flags
 from pyanaconda import iutil
 from pyanaconda import timezone
@@ -30,6 +29,7 @@ from pyanaconda import network
 from pyanaconda import nm
 from pyanaconda.i18n import _
 from pyanaconda.threads import threadMgr
+from pyanaconda.constants import PAYLOAD_INSTALL_STEPS
 from pyanaconda.ui.lib.entropy import wait_for_entropy
 from pyanaconda import nm
 import logging
@@ -53,6 +53,18 @@ def _writeKS(ksdata):
     # Make it so only root can read - could have passwords
     os.chmod(path, 0600)
 
+def _precryptPasswords(ksdata):
+    """Start encrypting the plain text passwords of root and the users, the
+       users are created with the results.
+    """
+    algo = getPassAlgo(ksdata.authconfig.authconfig)
+
+    passwords = [(ksdata.rootpw.password, ksdata.rootpw.isCrypted)]
+    passwords += [(user.password, user.isCrypted) for user in ksdata.user.userList]
+    for (password, isCrypted) in passwords:
+        if password and not isCrypted:
+            precryptPassword(password, algo)
+
 def doConfiguration(storage, payload, ksdata, instClass):
     from pyanaconda.kickstart import runPostScripts
 
@@ -94,9 +106,12 @@ def doConfiguration(storage, payload, ksdata, instClass):
     with progress_report(_("Creating users")):
         createLuserConf(iutil.getSysroot(), algoname=getPassAlgo(ksdata.authconfig.authconfig))
         u = Users()
-        ksdata.rootpw.execute(storage, ksdata, instClass, u)
-        ksdata.group.execute(storage, ksdata, instClass, u)
-        ksdata.user.execute(storage, ksdata, instClass, u)
+        # apply all of them in one chrooted libuser session
+        batch = u.batch()
+        ksdata.rootpw.execute(storage, ksdata, instClass, batch)
+        ksdata.group.execute(storage, ksdata, instClass, batch)
+        ksdata.user.execute(storage, ksdata, instClass, batch)
+        batch.commit()
 
     with progress_report(_("Configuring addons")):
         ksdata.addons.execute(storage, ksdata, instClass, u)
@@ -145,7 +160,7 @@ def doInstall(storage, payload, ksdata, instClass):
     # Update every 10% of packages installed.  We don't know how many packages
     # we are installing until it's too late (see realmd later on) so this is
     # the best we can do.
-    steps += 10
+    steps += PAYLOAD_INSTALL_STEPS
 
     # pre setup phase, post install
     steps += 2
@@ -173,6 +188,9 @@ def doInstall(storage, payload, ksdata, instClass):
         ksdata.addons.setup(storage, ksdata, instClass)
     storage.updateKSData()  # this puts custom storage info into ksdata
 
+    # encrypt the passwords while the disks are being set up
+    _precryptPasswords(ksdata)
+
     # Do partitioning.
     payload.preStorage()
 
@@ -260,6 +278,7 @@ def doInstall(storage, payload, ksdata, instClass):
 
     # Do bootloader.
     if willInstallBootloader:
+        from pyanaconda.bootloader import writeBootLoader
         with progress_report(_("Installing boot loader")):
             writeBootLoader(storage, payload, instClass, ksdata)
 
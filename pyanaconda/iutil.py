@@ -29,6 +29,8 @@ import subprocess
 import tempfile
 import unicodedata
 import shutil
+import select
+from collections import deque
 from threading import Thread
 from Queue import Queue, Empty
 
@@ -41,7 +43,8 @@ import logging
 log = logging.getLogger("anaconda")
 program_log = logging.getLogger("program")
 
-from pyanaconda.anaconda_log import program_log_lock
+# size of blocks the binary output of programs is read in
+PROGRAM_OUTPUT_BLOCK_SIZE = 64 * 1024
 
 def augmentEnv():
     env = os.environ.copy()
@@ -92,7 +95,8 @@ def sysroot_path(path):
     """
     return os.path.join(getSysroot(), path.lstrip(os.path.sep))
 
-def _run_program(argv, root='/', stdin=None, stdout=None, env_prune=None, log_output=True, binary_output=False):
+def _run_program(argv, root='/', stdin=None, stdout=None, env_prune=None, log_output=True,
+                 binary_output=False, capture_output=True):
     """ Run an external program, log the output and return it to the caller
         @param argv The command to run and argument
         @param root The directory to chroot to before running command.
@@ -101,7 +105,13 @@ def _run_program(argv, root='/', stdin=None, stdout=None, env_prune=None, log_ou
         @param env_prune environment variable to remove before execution
         @param log_output: whether to log the output of command
         @param binary_output: whether to treat the output of command as binary data
-        @return The return code of the command and the output
+        @param capture_output: whether to collect the output and return it
+        @return The return code of the command and the output (None if
+                capture_output is False)
+
+        The output is logged and written to stdout as it is produced, line by
+        line (or by blocks of data for binary output), so the commands can run
+        in parallel from multiple threads without waiting for each other.
     """
     if env_prune is None:
         env_prune = []
@@ -117,44 +127,50 @@ def _run_program(argv, root='/', stdin=None, stdout=None, env_prune=None, log_ou
             os.chroot(target_root)
             os.chdir("/")
 
-    with program_log_lock:
-        program_log.info("Running... %s", " ".join(argv))
+    program_log.info("Running... %s", " ".join(argv))
 
-        env = augmentEnv()
-        for var in env_prune:
-            env.pop(var, None)
+    env = augmentEnv()
+    for var in env_prune:
+        env.pop(var, None)
 
-        try:
-            proc = subprocess.Popen(argv,
-                                    stdin=stdin,
-                                    stdout=subprocess.PIPE,
-                                    stderr=subprocess.STDOUT,
-                                    preexec_fn=chroot, cwd=root, env=env,
-                                    close_fds=True)
-
-            output_string = proc.communicate()[0]
-            if output_string:
-                if binary_output:
-                    output_lines = [output_string]
-                else:
-                    if output_string[-1] != "\n":
-                        output_string = output_string + "\n"
-                    output_lines = output_string.splitlines(True)
-
-                for line in output_lines:
-                    if log_output:
-                        program_log.info(line.strip())
-
-                    if stdout:
-                        stdout.write(line)
+    try:
+        proc = subprocess.Popen(argv,
+                                stdin=stdin,
+                                stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT,
+                                preexec_fn=chroot, cwd=root, env=env,
+                                close_fds=True)
+    except OSError as e:
+        program_log.error("Error running %s: %s", argv[0], e.strerror)
+        raise
 
-        except OSError as e:
-            program_log.error("Error running %s: %s", argv[0], e.strerror)
-            raise
+    output = []
+    if binary_output:
+        chunks = iter(lambda: proc.stdout.read(PROGRAM_OUTPUT_BLOCK_SIZE), b'')
+    else:
+        chunks = iter(proc.stdout.readline, b'')
+
+    for chunk in chunks:
+        if not binary_output and chunk[-1] != "\n":
+            chunk = chunk + "\n"
+
+        if log_output:
+            program_log.info(chunk.strip())
 
-        program_log.debug("Return code: %d", proc.returncode)
+        if stdout:
+            stdout.write(chunk)
 
-    return (proc.returncode, output_string)
+        if capture_output:
+            output.append(chunk)
+
+    proc.stdout.close()
+    proc.wait()
+    program_log.debug("Return code: %d", proc.returncode)
+
+    if capture_output:
+        return (proc.returncode, "".join(output))
+    else:
+        return (proc.returncode, None)
 
 def execInSysroot(command, argv, stdin=None):
     """ Run an external program in the target root.
@@ -187,7 +203,7 @@ def execWithRedirect(command, argv, stdin=None, stdout=None,
 
     argv = [command] + argv
     return _run_program(argv, stdin=stdin, stdout=stdout, root=root, env_prune=env_prune,
-            log_output=log_output, binary_output=binary_output)[0]
+            log_output=log_output, binary_output=binary_output, capture_output=False)[0]
 
 def execWithCapture(command, argv, stdin=None, stderr=None, root='/',
                     fatal=False, log_output=True):
@@ -209,38 +225,165 @@ def execWithCapture(command, argv, stdin=None, stderr=None, root='/',
     argv = [command] + argv
     return _run_program(argv, stdin=stdin, root=root, log_output=log_output)[1]
 
-def execReadlines(command, argv, stdin=None, root='/', env_prune=None):
+def execInParallel(commands, root='/', log_output=True, max_running=None):
+    """ Run external programs concurrently and wait for all of them.
+        @param commands list of (command, argv) tuples to run
+        @param root The directory to chroot to before running the commands.
+        @param log_output Whether to log the output of the commands
+        @param max_running maximum number of commands running at the same
+                           time, all of them if None
+        @return list of (return code, output) tuples in the order of commands
+
+        Commands that fail to start produce (None, error message).
+    """
+    if flags.testing:
+        for command, argv in commands:
+            log.info("not running command because we're testing: %s %s",
+                     command, " ".join(argv))
+        return [(0, "")] * len(commands)
+
+    results = [None] * len(commands)
+    pending = Queue()
+    for idx, (command, argv) in enumerate(commands):
+        pending.put((idx, [command] + argv))
+
+    def run_commands():
+        while True:
+            try:
+                idx, argv = pending.get_nowait()
+            except Empty:
+                return
+            try:
+                results[idx] = _run_program(argv, root=root, log_output=log_output)
+            except OSError as e:
+                results[idx] = (None, e.strerror)
+
+    threads = [Thread(target=run_commands)
+               for _i in range(min(max_running or len(commands), len(commands)))]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+
+    return results
+
+class ExecLineReader(object):
+    """Iterator over the lines of output of a running program.
+
+       The output pipes of the program are watched with poll() and every
+       line is returned as soon as the program writes it. The iteration ends
+       when all the pipes reach EOF, the return code of the program is then
+       available in the returncode attribute.
+    """
+
+    def __init__(self, proc, argv, binary_output=False):
+        """
+           :param proc: the running program
+           :type proc: subprocess.Popen
+           :param argv: command the program was run with (used for logging)
+           :param binary_output: return the lines as they are, including
+                                 the line separators and whitespace
+        """
+        self._proc = proc
+        self._argv = argv
+        self._binary_output = binary_output
+        self._lines = deque()
+        self._poller = select.poll()
+        # fd -> [pipe, log the lines instead of returning them, unfinished line]
+        self._pipes = {}
+        self.returncode = None
+
+        for pipe, log_only in ((proc.stdout, False), (proc.stderr, True)):
+            if pipe:
+                self._pipes[pipe.fileno()] = [pipe, log_only, b""]
+                self._poller.register(pipe.fileno(), select.POLLIN | select.POLLPRI)
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        while not self._lines:
+            if not self._pipes:
+                self._finish()
+                raise StopIteration
+            self._read()
+
+        return self._lines.popleft()
+
+    def _add_line(self, line, log_only):
+        if log_only:
+            program_log.info(line.strip())
+        elif self._binary_output:
+            self._lines.append(line)
+        else:
+            self._lines.append(line.strip())
+
+    def _read(self):
+        try:
+            events = self._poller.poll()
+        except select.error as e:
+            if e.args[0] == errno.EINTR:
+                return
+            raise
+
+        for fd, _event in events:
+            pipe, log_only, unfinished = self._pipes[fd]
+            try:
+                data = os.read(fd, PROGRAM_OUTPUT_BLOCK_SIZE)
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+
+            if data:
+                lines = (unfinished + data).split(b"\n")
+                self._pipes[fd][2] = lines.pop()
+                for line in lines:
+                    self._add_line(line + b"\n", log_only)
+            else:
+                # EOF, the last line may be missing the line separator
+                if unfinished:
+                    self._add_line(unfinished, log_only)
+                self._poller.unregister(fd)
+                pipe.close()
+                del self._pipes[fd]
+
+    def _finish(self):
+        if self.returncode is None:
+            self.returncode = self._proc.wait()
+            program_log.debug("Return code of %s: %d", self._argv[0], self.returncode)
+
+def execReadlines(command, argv, stdin=None, root='/', env_prune=None,
+                  binary_output=False, separate_stderr=False):
     """ Execute an external command and return the line output of the command
         in real-time.
 
         @param command The command to run
         @param argv The argument list
         @param stdin The file object to read stdin from.
-        @param stdout Optional file object to redirect stdout and stderr to.
-        @param stderr not used
         @param root The directory to chroot to before running command.
         @param env_prune environment variable to remove before execution
-
-        Output from the file is not logged to program.log
-        This returns a generator with the lines from the command until it has finished
+        @param binary_output return the lines including line separators and
+                             whitespace
+        @param separate_stderr don't return the lines written to stderr, log
+                               them to program.log instead
+
+        Output from stdout is not logged to program.log
+        This returns an ExecLineReader iterating over the lines from the
+        command until it has closed its output, the return code of the
+        command is then available in its returncode attribute.
     """
     if env_prune is None:
         env_prune = []
 
-    # Return the lines from stdout via a Queue
-    def queue_lines(out, queue):
-        for line in iter(out.readline, b''):
-            queue.put(line.strip())
-        out.close()
-
     def chroot():
         if root and root != '/':
             os.chroot(root)
             os.chdir("/")
 
     argv = [command] + argv
-    with program_log_lock:
-        program_log.info("Running... %s", " ".join(argv))
+    program_log.info("Running... %s", " ".join(argv))
 
     env = augmentEnv()
     for var in env_prune:
@@ -249,28 +392,14 @@ def execReadlines(command, argv, stdin=None, root='/', env_prune=None):
         proc = subprocess.Popen(argv,
                                 stdin=stdin,
                                 stdout=subprocess.PIPE,
-                                stderr=subprocess.STDOUT,
-                                bufsize=1,
-                                preexec_fn=chroot, cwd=root, env=env)
+                                stderr=subprocess.PIPE if separate_stderr else subprocess.STDOUT,
+                                preexec_fn=chroot, cwd=root, env=env,
+                                close_fds=True)
     except OSError as e:
         program_log.error("Error running %s: %s", argv[0], e.strerror)
         raise
 
-    q = Queue()
-    t = Thread(target=queue_lines, args=(proc.stdout, q))
-    t.daemon = True # thread dies with the program
-    t.start()
-
-    while True:
-        try:
-            line = q.get(timeout=.1)
-            yield line
-            q.task_done()
-        except Empty:
-            if proc.poll() is not None:
-                break
-    q.join()
-
+    return ExecLineReader(proc, argv, binary_output=binary_output)
 
 ## Run a shell.
 def execConsole():
@@ -38,6 +38,7 @@ import re
 import shutil
 import ctypes
 import gettext
+import marshal
 
 from collections import namedtuple
 
@@ -45,7 +46,8 @@ from pyanaconda import iutil
 from pyanaconda import flags
 from pyanaconda.safe_dbus import dbus_call_safe_sync, dbus_get_property_safe_sync
 from pyanaconda.safe_dbus import DBUS_SYSTEM_BUS_ADDR, DBusPropertyError
-from pyanaconda.constants import DEFAULT_VC_FONT
+from pyanaconda.constants import DEFAULT_VC_FONT, THREAD_XKL_WRAPPER_INIT
+from pyanaconda.threads import threadMgr, AnacondaThread
 
 from gi.repository import Gio, GLib
 
@@ -65,6 +67,13 @@ LAYOUT_VARIANT_RE = re.compile(r'^\s*(\w+)\s*' # layout plus
 # namedtuple for information about a keyboard layout (its language and description)
 LayoutInfo = namedtuple("LayoutInfo", ["lang", "desc"])
 
+# cache of the layouts and switching options read from the xkb config registry
+XKL_REGISTRY_CACHE = "/var/cache/anaconda/xkl-registry"
+XKL_REGISTRY_CACHE_VERSION = 1
+
+# directory with the xkb config registry (xkeyboard-config) files
+XKB_RULES_DIR = "/usr/share/X11/xkb/rules"
+
 Xkb_ = lambda x: gettext.ldgettext("xkeyboard-config", x)
 iso_ = lambda x: gettext.ldgettext("iso_639", x)
 
@@ -350,6 +359,101 @@ def item_str(s):
 
     return s.decode("utf-8") #there are some non-ascii layout descriptions
 
+def _xkb_config_signature(rules_dir=XKB_RULES_DIR):
+    """
+    Get a signature identifying the installed xkeyboard-config data.
+
+    :param rules_dir: directory with the xkb config registry files
+    :type rules_dir: str
+    :return: names, sizes and modification times of the registry files or None
+             if they cannot be read
+    :rtype: list or None
+
+    """
+
+    try:
+        signature = []
+        for fname in sorted(os.listdir(rules_dir)):
+            if fname.endswith(".xml"):
+                stat = os.stat(os.path.join(rules_dir, fname))
+                signature.append((fname, stat.st_size, int(stat.st_mtime)))
+    except OSError as oserr:
+        log.warning("Failed to get xkeyboard-config signature: %s", oserr.strerror)
+        return None
+
+    return signature or None
+
+def _load_registry_cache(signature, cache_path=XKL_REGISTRY_CACHE):
+    """
+    Load layouts and switching options cached by _save_registry_cache.
+
+    :param signature: signature of the current xkeyboard-config data
+    :param cache_path: path of the cache file
+    :type cache_path: str
+    :return: a (layout infos, switching option infos) tuple or None if there
+             is no valid cache for the given signature
+    :rtype: (dict, dict) or None
+
+    """
+
+    if not signature or not os.path.exists(cache_path):
+        return None
+
+    try:
+        with open(cache_path, "rb") as f:
+            cache = marshal.load(f)
+    except (IOError, EOFError, ValueError, TypeError) as err:
+        log.warning("Failed to load keyboard layouts cache: %s", err)
+        return None
+
+    if not isinstance(cache, dict) or \
+            cache.get("version") != XKL_REGISTRY_CACHE_VERSION or \
+            cache.get("signature") != signature:
+        return None
+
+    layout_infos = dict((name, LayoutInfo(*info))
+                        for name, info in cache["layouts"].iteritems())
+
+    return (layout_infos, cache["switch_options"])
+
+def _save_registry_cache(signature, layout_infos, switch_opt_infos,
+                         cache_path=XKL_REGISTRY_CACHE):
+    """
+    Save layouts and switching options so that they can be loaded by
+    _load_registry_cache instead of walking the xkb config registry.
+
+    :param signature: signature of the current xkeyboard-config data
+    :param layout_infos: layout-variant -> LayoutInfo
+    :type layout_infos: dict
+    :param switch_opt_infos: switching option -> description
+    :type switch_opt_infos: dict
+    :param cache_path: path of the cache file
+    :type cache_path: str
+
+    """
+
+    if not signature:
+        return
+
+    cache = {"version": XKL_REGISTRY_CACHE_VERSION,
+             "signature": signature,
+             "layouts": dict((name, tuple(info))
+                             for name, info in layout_infos.iteritems()),
+             "switch_options": switch_opt_infos}
+
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        # write to a temporary file first to never leave a partial cache behind
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            marshal.dump(cache, f)
+        os.rename(tmp_path, cache_path)
+    except (IOError, OSError) as err:
+        log.warning("Failed to save keyboard layouts cache: %s", err)
+
 class XklWrapperError(KeyboardConfigError):
     """Exception class for reporting libxklavier-related problems"""
 
@@ -415,6 +519,21 @@ class XklWrapper(object):
         self._layout_infos = dict()
         self._switch_opt_infos = dict()
 
+        #walking the registry might take quite a long time, do it in the
+        #background and only wait for it when layouts are really needed
+        threadMgr.add(AnacondaThread(name=THREAD_XKL_WRAPPER_INIT,
+                                     target=self._load_registry))
+
+    def _load_registry(self):
+        """Load layouts and switching options from the cache or registry"""
+
+        signature = _xkb_config_signature()
+        cached = _load_registry_cache(signature)
+        if cached:
+            self._layout_infos, self._switch_opt_infos = cached
+            log.debug("Keyboard layouts loaded from cache")
+            return
+
         #this might take quite a long time
         self.configreg.foreach_language(self._get_language_variants, None)
         self.configreg.foreach_country(self._get_country_variants, None)
@@ -422,6 +541,22 @@ class XklWrapper(object):
         #'grp' means that we want layout (group) switching options
         self.configreg.foreach_option('grp', self._get_switch_option, None)
 
+        _save_registry_cache(signature, self._layout_infos, self._switch_opt_infos)
+
+    @property
+    def _layouts(self):
+        """Layout infos, waits for the registry to be loaded"""
+
+        threadMgr.wait(THREAD_XKL_WRAPPER_INIT)
+        return self._layout_infos
+
+    @property
+    def _switch_opts(self):
+        """Switching option infos, waits for the registry to be loaded"""
+
+        threadMgr.wait(THREAD_XKL_WRAPPER_INIT)
+        return self._switch_opt_infos
+
     def _get_lang_variant(self, c_reg, item, subitem, lang):
         if subitem:
             name = item_str(item.name) + " (" + item_str(subitem.name) + ")"
@@ -471,12 +606,12 @@ class XklWrapper(object):
     def get_available_layouts(self):
         """A generator yielding layouts (no need to store them as a bunch)"""
 
-        return self._layout_infos.iterkeys()
+        return self._layouts.iterkeys()
 
     def get_switching_options(self):
         """Method returning list of available layout switching options"""
 
-        return self._switch_opt_infos.iterkeys()
+        return self._switch_opts.iterkeys()
 
     def get_layout_variant_description(self, layout_variant, with_lang=True):
         """
@@ -492,7 +627,7 @@ class XklWrapper(object):
 
         """
 
-        layout_info = self._layout_infos[layout_variant]
+        layout_info = self._layouts[layout_variant]
 
         if with_lang and layout_info.lang:
             lang = iutil.upcase_first_letter(iso_(layout_info.lang).decode("utf-8"))
@@ -520,7 +655,7 @@ class XklWrapper(object):
         """
 
         # translate the description of the switching option
-        return Xkb_(self._switch_opt_infos[switch_opt])
+        return Xkb_(self._switch_opts[switch_opt])
 
     def activate_default_layout(self):
         """
@@ -534,7 +669,7 @@ class XklWrapper(object):
     def is_valid_layout(self, layout):
         """Return if given layout is valid layout or not"""
 
-        return layout in self._layout_infos
+        return layout in self._layouts
 
     def add_layout(self, layout):
         """
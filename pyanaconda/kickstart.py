@@ -36,20 +36,22 @@ import blivet.zfcp
 import blivet.arch
 
 import glob
+import itertools
 from pyanaconda import iutil
 import os
 import os.path
 import tempfile
+import time
 import subprocess
 import pyanaconda.flags as flags_module
 from pyanaconda.flags import flags
-from pyanaconda.constants import ADDON_PATHS, IPMI_ABORTED
+from pyanaconda.constants import ADDON_PATHS, IPMI_ABORTED, STORAGE_TARGETS_TIMEOUT, THREAD_STORAGE_TARGETS, \
+                                 THREAD_KS_SCRIPTS
+from pyanaconda.threads import ThreadPool
 import shlex
 import sys
 import urlgrabber
 import pykickstart.commands as commands
-from pyanaconda import keyboard
-from pyanaconda import ntp
 from pyanaconda import timezone
 from pyanaconda.timezone import NTP_PACKAGE, NTP_SERVICE
 from pyanaconda import localization
@@ -61,7 +63,6 @@ from pyanaconda.desktop import Desktop
 from pyanaconda.i18n import _
 from .ui.common import collect
 from .addons import AddonSection, AddonData, AddonRegistry, collect_addon_paths
-from pyanaconda.bootloader import GRUB2, get_bootloader
 
 from pykickstart.constants import CLEARPART_TYPE_NONE, FIRSTBOOT_SKIP, FIRSTBOOT_RECONFIG, KS_SCRIPT_POST, KS_SCRIPT_PRE, \
                                   KS_SCRIPT_TRACEBACK, SELINUX_DISABLED, SELINUX_ENFORCING, SELINUX_PERMISSIVE
@@ -86,10 +87,32 @@ class AnacondaKSScript(KSScript):
         Output is logged by the program logger, the path specified by --log
         or to /tmp/ks-script-*.log
     """
+    # scripts of the same group (--group) following each other run at once
+    group = None
+
+    def __str__(self):
+        retval = KSScript.__str__(self)
+        if self.group is None:
+            return retval
+
+        # pykickstart doesn't know the option, add it to the end of the
+        # header written after the leading newline
+        (header, newline, body) = retval[1:].partition("\n")
+        return "%s%s --group=%s%s%s" % (retval[0], header, self.group, newline, body)
+
     def run(self, chroot):
         """ Run the kickstart script
             @param chroot directory path to chroot into before execution
         """
+        (rc, messages) = self.execute(chroot)
+        self.checkResult(rc, messages)
+
+    def execute(self, chroot):
+        """ Run the kickstart script without handling its failure, so that it
+            can run in a thread.
+            @param chroot directory path to chroot into before execution
+            @return the return code of the script and the path of its log
+        """
         if self.inChroot:
             scriptRoot = chroot
         else:
@@ -118,11 +141,22 @@ class AnacondaKSScript(KSScript):
             # chroot later.
             messages = "/tmp/%s.log" % os.path.basename(path)
 
+        start = time.time()
         with open(messages, "w") as fp:
             rc = iutil.execWithRedirect(self.interp, ["/tmp/%s" % os.path.basename(path)],
                                         stdout=fp,
                                         root = scriptRoot)
+        log.info("Kickstart script at line %s finished in %.3f s",
+                 self.lineno, time.time() - start)
 
+        return (rc, messages)
+
+    def checkResult(self, rc, messages):
+        """ Report the failure of the script and abort the installation if
+            the script has --erroronfail.
+            @param rc the return code of the script
+            @param messages the path of the script's log
+        """
         if rc != 0:
             log.error("Error code %s running the kickstart script at line %s", rc, self.lineno)
             if self.errorOnFail:
@@ -134,6 +168,46 @@ class AnacondaKSScript(KSScript):
                 iutil.ipmi_report(IPMI_ABORTED)
                 sys.exit(0)
 
+class ScriptGroupSection(object):
+    """ A mix-in for script sections adding the --group=<name> option.
+
+        Scripts of the same group following each other run at the same time
+        (see runScripts), other scripts run one by one in the order they are
+        given.  Failures of the scripts of a group are reported when all of
+        them have finished.
+    """
+    def handleHeader(self, lineno, args):
+        self._group = None
+
+        # the option is removed from the header before pykickstart sees it
+        args = list(args)
+        for (i, arg) in enumerate(args):
+            if arg == "--group" and i + 1 < len(args) and not args[i + 1].startswith("-"):
+                self._group = args[i + 1]
+                del args[i:i + 2]
+                break
+            elif arg.startswith("--group="):
+                self._group = arg[len("--group="):]
+                del args[i]
+                break
+            elif arg == "--group":
+                raise KickstartValueError(formatErrorMsg(lineno, msg=_("Option --group requires a name")))
+
+        super(ScriptGroupSection, self).handleHeader(lineno, args)
+
+    def finalize(self):
+        scripts = len(self.handler.scripts)
+        super(ScriptGroupSection, self).finalize()
+
+        for script in self.handler.scripts[scripts:]:
+            script.group = self._group
+
+class AnacondaPreScriptSection(ScriptGroupSection, PreScriptSection):
+    pass
+
+class AnacondaPostScriptSection(ScriptGroupSection, PostScriptSection):
+    pass
+
 class AnacondaInternalScript(AnacondaKSScript):
     def __init__(self, *args, **kwargs):
         AnacondaKSScript.__init__(self, *args, **kwargs)
@@ -341,6 +415,9 @@ class Bootloader(commands.bootloader.RHEL7_Bootloader):
         self.location = "mbr"
 
     def parse(self, args):
+        # the bootloader module is big, only import it when really needed
+        from pyanaconda.bootloader import GRUB2, get_bootloader
+
         commands.bootloader.RHEL7_Bootloader.parse(self, args)
         if self.location == "partition" and isinstance(get_bootloader(), GRUB2):
             raise KickstartValueError(formatErrorMsg(self.lineno,
@@ -618,6 +695,7 @@ class ClearPart(commands.clearpart.F17_ClearPart):
 class Fcoe(commands.fcoe.RHEL7_Fcoe):
     def parse(self, args):
         fc = commands.fcoe.RHEL7_Fcoe.parse(self, args)
+        waitForStorageTargets("FCoE")
 
         if fc.nic not in nm.nm_devices():
             raise KickstartValueError(formatErrorMsg(self.lineno, msg="Specified nonexistent nic %s in fcoe command" % fc.nic))
@@ -708,8 +786,7 @@ class Group(commands.group.F12_Group):
         for grp in self.groupList:
             kwargs = grp.__dict__
             kwargs.update({"root": iutil.getSysroot()})
-            if not users.createGroup(grp.name, **kwargs):
-                log.error("Group %s already exists, not creating.", grp.name)
+            users.createGroup(grp.name, **kwargs)
 
 class IgnoreDisk(commands.ignoredisk.F14_IgnoreDisk):
     def parse(self, args):
@@ -741,6 +818,7 @@ class IgnoreDisk(commands.ignoredisk.F14_IgnoreDisk):
 class Iscsi(commands.iscsi.F17_Iscsi):
     def parse(self, args):
         tg = commands.iscsi.F17_Iscsi.parse(self, args)
+        waitForStorageTargets("iSCSI")
 
         if tg.iface:
             if not network.wait_for_network_devices([tg.iface]):
@@ -771,6 +849,7 @@ class Iscsi(commands.iscsi.F17_Iscsi):
 class IscsiName(commands.iscsiname.FC6_IscsiName):
     def parse(self, args):
         retval = commands.iscsiname.FC6_IscsiName.parse(self, args)
+        waitForStorageTargets("iSCSI")
 
         blivet.iscsi.iscsi().initiator = self.iscsiname
         return retval
@@ -1556,6 +1635,7 @@ class Timezone(commands.timezone.F18_Timezone):
 
         # write out NTP configuration (if set)
         if not self.nontp and self.ntpservers:
+            from pyanaconda import ntp
             chronyd_conf_path = os.path.normpath(iutil.getSysroot() + ntp.NTP_CONFIG_FILE)
             try:
                 ntp.save_servers_to_config(self.ntpservers,
@@ -1576,8 +1656,7 @@ class User(commands.user.F19_User):
             # empty password.
             if ksdata.user.seen and kwargs.get("password", "") == "":
                 kwargs["password"] = None
-            if not users.createUser(usr.name, **kwargs):
-                log.error("User %s already exists, not creating.", usr.name)
+            users.createUser(usr.name, **kwargs)
 
 class VolGroup(commands.volgroup.RHEL7_VolGroup):
     def execute(self, storage, ksdata, instClass):
@@ -1673,6 +1752,7 @@ class SkipX(commands.skipx.FC3_SkipX):
 class ZFCP(commands.zfcp.F14_ZFCP):
     def parse(self, args):
         fcp = commands.zfcp.F14_ZFCP.parse(self, args)
+        waitForStorageTargets("zFCP")
         try:
             blivet.zfcp.ZFCP().addFCP(fcp.devnum, fcp.wwpn, fcp.fcplun)
         except ValueError as e:
@@ -1682,6 +1762,7 @@ class ZFCP(commands.zfcp.F14_ZFCP):
 
 class Keyboard(commands.keyboard.F18_Keyboard):
     def execute(self, *args):
+        from pyanaconda import keyboard
         keyboard.write_keyboard_config(self, iutil.getSysroot())
 
 class Upgrade(commands.upgrade.F20_Upgrade):
@@ -1798,7 +1879,7 @@ class AnacondaPreParser(KickstartParser):
         pass
 
     def setupSections(self):
-        self.registerSection(PreScriptSection(self.handler, dataObj=AnacondaKSScript))
+        self.registerSection(AnacondaPreScriptSection(self.handler, dataObj=AnacondaKSScript))
         self.registerSection(NullSection(self.handler, sectionOpen="%post"))
         self.registerSection(NullSection(self.handler, sectionOpen="%traceback"))
         self.registerSection(NullSection(self.handler, sectionOpen="%packages"))
@@ -1818,8 +1899,8 @@ class AnacondaKSParser(KickstartParser):
         return KickstartParser.handleCommand(self, lineno, args)
 
     def setupSections(self):
-        self.registerSection(PreScriptSection(self.handler, dataObj=self.scriptClass))
-        self.registerSection(PostScriptSection(self.handler, dataObj=self.scriptClass))
+        self.registerSection(AnacondaPreScriptSection(self.handler, dataObj=self.scriptClass))
+        self.registerSection(AnacondaPostScriptSection(self.handler, dataObj=self.scriptClass))
         self.registerSection(TracebackScriptSection(self.handler, dataObj=self.scriptClass))
         self.registerSection(PackageSection(self.handler))
         self.registerSection(AddonSection(self.handler))
@@ -1842,22 +1923,75 @@ def preScriptPass(f):
     # run %pre scripts
     runPreScripts(ksparser.handler.scripts)
 
+# names of storage targets started by parseKickstart and futures of the startups
+_storageTargets = []
+
+def _startStorageTargets():
+    """Start iSCSI, FCoE and zFCP in parallel.
+
+       :returns: the pool running the startups
+       :rtype: ThreadPool
+    """
+    pool = ThreadPool(THREAD_STORAGE_TARGETS, max_workers=3, fatal=False)
+    _storageTargets[:] = [("iSCSI", pool.submit(blivet.iscsi.iscsi().startup)),
+                          ("FCoE", pool.submit(blivet.fcoe.fcoe().startup)),
+                          ("zFCP", pool.submit(blivet.zfcp.ZFCP().startup))]
+    return pool
+
+def _waitForStorageTargets(pool, timeout):
+    """Wait for the startups of storage targets, log how long they took and
+       re-raise their errors.  The ones that don't finish in time keep
+       running, waitForStorageTargets has to be called before their
+       commands are parsed and before the storage is reset.
+    """
+    pool.wait(timeout=timeout)
+
+    late = []
+    for (name, future) in _storageTargets:
+        if future.done():
+            future.result()
+            log.info("%s startup took %.3f s", name, future.duration)
+        else:
+            late.append(name)
+
+    if late:
+        log.warning("%s startup has not finished in %d s, parsing the "
+                    "kickstart until its commands", ", ".join(late), timeout)
+
+def waitForStorageTargets(name=None):
+    """Wait for the storage targets started when parsing the kickstart and
+       re-raise errors of their startups.
+
+       The startups use the blivet singletons the kickstart commands of the
+       targets change, and resetting the storage starts them too, so neither
+       must be done before they finish.
+
+       :param name: the storage target to wait for ("iSCSI", "FCoE" or
+                    "zFCP"), None for all of them
+    """
+    for (targetName, future) in _storageTargets:
+        if name is None or targetName == name:
+            future.result()
+
 def parseKickstart(f):
     # preprocessing the kickstart file has already been handled in initramfs.
 
-    addon_paths = collect_addon_paths(ADDON_PATHS)
-    handler = AnacondaKSHandler(addon_paths["ks"])
-    ksparser = AnacondaKSParser(handler)
-
     # We need this so all the /dev/disk/* stuff is set up before parsing.
     udev.trigger(subsystem="block", action="change")
-    # So that drives onlined by these can be used in the ks file
-    blivet.iscsi.iscsi().startup()
-    blivet.fcoe.fcoe().startup()
-    blivet.zfcp.ZFCP().startup()
+
+    # So that drives onlined by these can be used in the ks file.  They are
+    # independent and each of them may wait for its own timeouts, so run them
+    # at once and prepare the parser in the meantime.
+    pool = _startStorageTargets()
     # Note we do NOT call dasd.startup() here, that does not online drives, but
     # only checks if they need formatting, which requires zerombr to be known
 
+    addon_paths = collect_addon_paths(ADDON_PATHS)
+    handler = AnacondaKSHandler(addon_paths["ks"])
+    ksparser = AnacondaKSParser(handler)
+
+    _waitForStorageTargets(pool, STORAGE_TARGETS_TIMEOUT)
+
     try:
         ksparser.readKickstart(f)
     except KickstartError as e:
@@ -1885,6 +2019,41 @@ def appendPostScripts(ksdata):
     ksparser = AnacondaKSParser(ksdata, scriptClass=AnacondaInternalScript)
     ksparser.readKickstartFromString(scripts, reset=False)
 
+def runScripts(scripts, chroot):
+    """ Run the scripts in the given order.  Scripts of the same group that
+        follow each other run at the same time and their failures are handled
+        in the order of the scripts once all of them have finished.
+    """
+    groups = [(group, list(groupScripts)) for (group, groupScripts)
+              in itertools.groupby(scripts, lambda s: s.group)]
+
+    # one pool for all the groups, big enough to run the largest one at once
+    pool = None
+    parallel = [len(groupScripts) for (group, groupScripts) in groups
+                if group is not None and len(groupScripts) > 1]
+    if parallel:
+        pool = ThreadPool(THREAD_KS_SCRIPTS, max_workers=max(parallel), fatal=False)
+
+    for (group, groupScripts) in groups:
+        if group is None or len(groupScripts) == 1:
+            for script in groupScripts:
+                script.run(chroot)
+            continue
+
+        log.info("Running %d kickstart scripts of group %s in parallel",
+                 len(groupScripts), group)
+        start = time.time()
+
+        futures = [pool.submit(script.execute, chroot) for script in groupScripts]
+        pool.wait(futures)
+
+        log.info("Kickstart scripts of group %s finished in %.3f s", group,
+                 time.time() - start)
+
+        for (script, future) in zip(groupScripts, futures):
+            (rc, messages) = future.result()
+            script.checkResult(rc, messages)
+
 def runPostScripts(scripts):
     postScripts = filter (lambda s: s.type == KS_SCRIPT_POST, scripts)
 
@@ -1897,7 +2066,7 @@ def runPostScripts(scripts):
             del(os.environ[var])
 
     log.info("Running kickstart %%post script(s)")
-    map (lambda s: s.run(iutil.getSysroot()), postScripts)
+    runScripts(postScripts, iutil.getSysroot())
     log.info("All kickstart %%post script(s) have been run")
 
 def runPreScripts(scripts):
@@ -1909,7 +2078,7 @@ def runPreScripts(scripts):
     log.info("Running kickstart %%pre script(s)")
     stdoutLog.info(_("Running pre-installation scripts"))
 
-    map (lambda s: s.run("/"), preScripts)
+    runScripts(preScripts, "/")
 
     log.info("All kickstart %%pre script(s) have been run")
 
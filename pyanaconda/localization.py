@@ -25,8 +25,10 @@ import os
 import re
 import langtable
 import glob
+import marshal
+import threading
 import locale as locale_mod
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 
 from pyanaconda import constants
 from pyanaconda.iutil import upcase_first_letter
@@ -36,6 +38,11 @@ log = logging.getLogger("anaconda")
 
 LOCALE_CONF_FILE_PATH = "/etc/locale.conf"
 
+# lookup database generated from langtable data by scripts/makelangdb at
+# build time, see the script for the format
+LOCALIZATION_DB_PATH = "/usr/share/anaconda/localization.db"
+LOCALIZATION_DB_VERSION = 1
+
 #e.g. 'SR_RS.UTF-8@latin'
 LANGCODE_RE = re.compile(r'(?P<language>[A-Za-z]+)'
                          r'(_(?P<territory>[A-Za-z]+))?'
@@ -52,6 +59,106 @@ class InvalidLocaleSpec(LocalizationConfigError):
 
     pass
 
+_LocaleEntry = namedtuple("LocaleEntry", ["english_name", "native_name", "locales",
+                                          "keyboards", "timezones"])
+
+_localization_db = None
+_localization_db_lock = threading.Lock()
+
+def _get_localization_db():
+    """Load the localization database on the first use."""
+
+    global _localization_db
+
+    with _localization_db_lock:
+        if _localization_db is None:
+            try:
+                with open(LOCALIZATION_DB_PATH, "rb") as f:
+                    db = marshal.load(f)
+                if db.get("version") != LOCALIZATION_DB_VERSION:
+                    raise ValueError("unsupported version %s" % db.get("version"))
+                log.debug("loaded localization database with data from langtable %s",
+                          db.get("langtable"))
+            except (IOError, EOFError, ValueError, TypeError, AttributeError) as e:
+                log.info("localization database not available, using langtable: %s", e)
+                db = {"locales": {}, "territories": {}}
+            _localization_db = db
+
+    return _localization_db
+
+def _get_locale_entry(parts):
+    """
+    Find the localization database entry for the parsed langcode.
+
+    :param parts: parsed langcode as returned by parse_langcode
+    :return: entry for the langcode or None if there is no entry for it
+    :rtype: _LocaleEntry or None
+
+    """
+
+    key = (parts["language"], parts.get("territory") or "", parts.get("script") or "")
+    entry = _get_localization_db()["locales"].get(key)
+    if entry:
+        return _LocaleEntry(*entry)
+    else:
+        return None
+
+class _LRUCache(object):
+    """Thread-safe mapping keeping only the most recently used items."""
+
+    def __init__(self, size):
+        self._size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            if len(self._items) > self._size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+# enough for all the locales known to langtable
+_PARSED_LANGCODES_CACHE_SIZE = 2048
+_parsed_langcodes = _LRUCache(_PARSED_LANGCODES_CACHE_SIZE)
+
+# translated region, city and timezone names, (locale, name) -> translation
+_XLATED_TIMEZONES_CACHE_SIZE = 4096
+_xlated_timezones = _LRUCache(_XLATED_TIMEZONES_CACHE_SIZE)
+
+def _parse_langcode(langcode):
+    """
+    Cached version of parse_langcode, the returned dictionary is shared and
+    must not be modified.
+
+    """
+
+    if not langcode:
+        return None
+
+    parts = _parsed_langcodes.get(langcode)
+    if parts is None:
+        match = LANGCODE_RE.match(langcode)
+        if not match:
+            return None
+        parts = match.groupdict()
+        _parsed_langcodes.set(langcode, parts)
+
+    return parts
+
 def parse_langcode(langcode):
     """
     For a given langcode (e.g. 'SR_RS.UTF-8@latin') returns a dictionary
@@ -66,14 +173,11 @@ def parse_langcode(langcode):
 
     """
 
-    if not langcode:
+    parts = _parse_langcode(langcode)
+    if parts is None:
         return None
-
-    match = LANGCODE_RE.match(langcode)
-    if match:
-        return match.groupdict()
     else:
-        return None
+        return dict(parts)
 
 def is_supported_locale(locale):
     """
@@ -107,8 +211,8 @@ def langcode_matches_locale(langcode, locale):
 
     """
 
-    langcode_parts = parse_langcode(langcode)
-    locale_parts = parse_langcode(locale)
+    langcode_parts = _parse_langcode(langcode)
+    locale_parts = _parse_langcode(locale)
 
     if not langcode_parts or not locale_parts:
         # to match, both need to be valid langcodes (need to have at least
@@ -124,6 +228,89 @@ def langcode_matches_locale(langcode, locale):
 
     return True
 
+class LangcodeIndex(object):
+    """
+    Langcodes indexed by their language, territory, script and encoding for
+    find_best_locale_match. Callers matching more locales against the same
+    langcodes can build the index once and pass it instead of the langcodes.
+
+    """
+
+    def __init__(self, langcodes):
+        """
+        :param langcodes: a list or generator of langcodes (e.g. en, en_US, en_US@latin, etc.)
+        :type langcodes: list(str) or generator(str)
+
+        """
+
+        # language -> territory -> script -> encoding -> (position, langcode, parts)
+        self._index = dict()
+        for position, langcode in enumerate(langcodes):
+            parts = _parse_langcode(langcode)
+            if not parts:
+                continue
+
+            node = self._index.setdefault(parts["language"], dict())
+            for part in ("territory", "script"):
+                node = node.setdefault(parts[part], dict())
+
+            # the first given of the equal langcodes wins
+            node.setdefault(parts["encoding"], (position, langcode, parts))
+
+    def best_match(self, locale_parts):
+        """
+        Find the langcode best matching the parsed locale.
+
+        :param locale_parts: the locale parsed by parse_langcode
+        :type locale_parts: dict
+        :return: (langcode, parsed langcode) or None if no langcode has the
+                 locale's language
+        :rtype: tuple or None
+
+        """
+
+        # langcodes for other languages can't score enough to match
+        node = self._index.get(locale_parts["language"])
+        if not node:
+            return None
+
+        _key, (_position, langcode, parts) = _best_index_entry(node, locale_parts, 0)
+        return (langcode, parts)
+
+_INDEXED_PARTS = ("territory", "script", "encoding")
+
+def _best_index_entry(node, locale_parts, level):
+    """
+    Find the best entry in a node of the LangcodeIndex.
+
+    Each part is scored an order of magnitude higher than the following ones,
+    so the langcodes with the best matching part are always better than the
+    other ones and only they have to be compared by the following parts. The
+    first given of the equally good langcodes wins.
+
+    :return: (match key, index entry), smaller keys are better matches
+    :rtype: tuple
+
+    """
+
+    if level == len(_INDEXED_PARTS):
+        return ((node[0],), node)
+
+    wanted = locale_parts[_INDEXED_PARTS[level]]
+    if wanted and wanted in node:
+        # the part matches
+        (tier, values) = (0, [wanted])
+    elif None in node:
+        # the part is missing in the langcode
+        (tier, values) = (1, [None])
+    else:
+        # the part doesn't match
+        (tier, values) = (2, node.keys())
+
+    key, entry = min(_best_index_entry(node[value], locale_parts, level + 1)
+                     for value in values)
+    return ((tier,) + key, entry)
+
 def find_best_locale_match(locale, langcodes):
     """
     Find the best match for the locale in a list of langcodes. This is useful
@@ -133,54 +320,53 @@ def find_best_locale_match(locale, langcodes):
     :param locale: a valid locale (e.g. en_US.UTF-8 or sr_RS.UTF-8@latin, etc.)
     :type locale: str
     :param langcodes: a list or generator of langcodes (e.g. en, en_US, en_US@latin, etc.)
-    :type langcodes: list(str) or generator(str)
+                      or their LangcodeIndex
+    :type langcodes: list(str) or generator(str) or LangcodeIndex
     :return: the best matching langcode from the list of None if none matches
     :rtype: str or None
 
     """
 
-    score_map = { "language" : 1000,
-                  "territory":  100,
-                  "script"   :   10,
-                  "encoding" :    1 }
-
-    def get_match_score(locale, langcode):
-        score = 0
-
-        locale_parts = parse_langcode(locale)
-        langcode_parts = parse_langcode(langcode)
-        if not locale_parts or not langcode_parts:
-            return score
-
-        for part, part_score in score_map.iteritems():
-            if locale_parts[part] and langcode_parts[part]:
-                if locale_parts[part] == langcode_parts[part]:
-                    # match
-                    score += part_score
-                else:
-                    # not match
-                    score -= part_score
-            elif langcode_parts[part] and not locale_parts[part]:
-                # langcode has something the locale doesn't have
-                score -= part_score
-
-        return score
-
-    scores = []
+    locale_parts = _parse_langcode(locale)
+    if not locale_parts:
+        return None
 
-    # get score for each langcode
-    for langcode in langcodes:
-        scores.append((langcode, get_match_score(locale, langcode)))
+    if not isinstance(langcodes, LangcodeIndex):
+        langcodes = LangcodeIndex(langcodes)
 
-    # find the best one
-    sorted_langcodes = sorted(scores, key=lambda item_score: item_score[1], reverse=True)
+    match = langcodes.best_match(locale_parts)
+    if not match:
+        return None
 
     # matches matching only script or encoding or both are not useful
-    if sorted_langcodes and sorted_langcodes[0][1] > score_map["territory"]:
-        return sorted_langcodes[0][0]
+    best, best_parts = match
+    if _get_match_score(locale_parts, best_parts) > _MATCH_SCORES["territory"]:
+        return best
     else:
         return None
 
+_MATCH_SCORES = { "language" : 1000,
+                  "territory":  100,
+                  "script"   :   10,
+                  "encoding" :    1 }
+
+def _get_match_score(locale_parts, langcode_parts):
+    score = 0
+
+    for part, part_score in _MATCH_SCORES.iteritems():
+        if locale_parts[part] and langcode_parts[part]:
+            if locale_parts[part] == langcode_parts[part]:
+                # match
+                score += part_score
+            else:
+                # not match
+                score -= part_score
+        elif langcode_parts[part] and not locale_parts[part]:
+            # langcode has something the locale doesn't have
+            score -= part_score
+
+    return score
+
 def setup_locale(locale, lang=None):
     """
     Procedure setting the system to use the given locale and store it in to the
@@ -216,10 +402,14 @@ def get_english_name(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
-    name = langtable.language_name(languageId=parts["language"],
-                                   territoryId=parts.get("territory", ""),
-                                   scriptId=parts.get("script", ""),
-                                   languageIdQuery="en")
+    entry = _get_locale_entry(parts)
+    if entry:
+        name = entry.english_name
+    else:
+        name = langtable.language_name(languageId=parts["language"],
+                                       territoryId=parts.get("territory", ""),
+                                       scriptId=parts.get("script", ""),
+                                       languageIdQuery="en")
 
     return upcase_first_letter(name)
 
@@ -239,11 +429,15 @@ def get_native_name(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
-    name = langtable.language_name(languageId=parts["language"],
-                                   territoryId=parts.get("territory", ""),
-                                   scriptId=parts.get("script", ""),
-                                   languageIdQuery=parts["language"],
-                                   scriptIdQuery=parts.get("script", ""))
+    entry = _get_locale_entry(parts)
+    if entry:
+        name = entry.native_name
+    else:
+        name = langtable.language_name(languageId=parts["language"],
+                                       territoryId=parts.get("territory", ""),
+                                       scriptId=parts.get("script", ""),
+                                       languageIdQuery=parts["language"],
+                                       scriptIdQuery=parts.get("script", ""))
 
     return upcase_first_letter(name)
 
@@ -295,6 +489,10 @@ def get_language_locales(lang):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid language" % lang)
 
+    entry = _get_locale_entry(parts)
+    if entry:
+        return list(entry.locales)
+
     return langtable.list_locales(languageId=parts["language"],
                                   territoryId=parts.get("territory", ""),
                                   scriptId=parts.get("script", ""))
@@ -312,6 +510,10 @@ def get_territory_locales(territory):
 
     """
 
+    locales = _get_localization_db()["territories"].get(territory)
+    if locales is not None:
+        return list(locales)
+
     return langtable.list_locales(territoryId=territory)
 
 def get_locale_keyboards(locale):
@@ -330,6 +532,10 @@ def get_locale_keyboards(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
+    entry = _get_locale_entry(parts)
+    if entry:
+        return list(entry.keyboards)
+
     return langtable.list_keyboards(languageId=parts["language"],
                                     territoryId=parts.get("territory", ""),
                                     scriptId=parts.get("script", ""))
@@ -350,6 +556,10 @@ def get_locale_timezones(locale):
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
 
+    entry = _get_locale_entry(parts)
+    if entry:
+        return list(entry.timezones)
+
     return langtable.list_timezones(languageId=parts["language"],
                                     territoryId=parts.get("territory", ""),
                                     scriptId=parts.get("script", ""))
@@ -385,6 +595,10 @@ def get_xlated_timezone(tz_spec_part):
     """
 
     locale = os.environ.get("LANG", constants.DEFAULT_LANG)
+    xlated = _xlated_timezones.get((locale, tz_spec_part))
+    if xlated is not None:
+        return xlated
+
     parts = parse_langcode(locale)
     if "language" not in parts:
         raise InvalidLocaleSpec("'%s' is not a valid locale" % locale)
@@ -392,8 +606,10 @@ def get_xlated_timezone(tz_spec_part):
     xlated = langtable.timezone_name(tz_spec_part, languageIdQuery=parts["language"],
                                      territoryIdQuery=parts.get("territory", ""),
                                      scriptIdQuery=parts.get("script", ""))
+    xlated = xlated.encode("utf-8")
+    _xlated_timezones.set((locale, tz_spec_part), xlated)
 
-    return xlated.encode("utf-8")
+    return xlated
 
 def write_language_configuration(lang, root):
     """
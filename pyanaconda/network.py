@@ -1178,6 +1178,10 @@ def setOnboot(ksdata):
 
 def apply_kickstart(ksdata):
     applied_devices = []
+    # with inst.netparallel the connections are activated concurrently
+    # after all of them are added, mapping device name -> connections
+    parallel = flags.cmdline.getbool("netparallel")
+    activations = {}
 
     for i, network_data in enumerate(ksdata.network.network):
 
@@ -1205,11 +1209,14 @@ def apply_kickstart(ksdata):
                             # apply it overriding configuration generated by NM
                             # taking over connection activated in initramfs
                             log.debug("network: kickstart - reactivating device %s with %s", dev_name, con_uuid)
-                            try:
-                                nm.nm_activate_device_connection(dev_name, con_uuid)
-                            except nm.UnknownConnectionError:
-                                log.warning("network: pre kickstart: can't activate connection %s on %s",
-                                            con_uuid, dev_name)
+                            if parallel:
+                                activations.setdefault(dev_name, []).append((con_uuid, dev_name))
+                            else:
+                                try:
+                                    nm.nm_activate_device_connection(dev_name, con_uuid)
+                                except nm.UnknownConnectionError:
+                                    log.warning("network: pre kickstart: can't activate connection %s on %s",
+                                                con_uuid, dev_name)
                     continue
 
         # If we don't have kickstart ifcfg from initramfs the command was added
@@ -1226,14 +1233,143 @@ def apply_kickstart(ksdata):
             added_connections = add_connection_for_ksdata(network_data, dev_name)
 
         if network_data.activate:
-            for con_uuid, dev_name in added_connections:
-                try:
-                    nm.nm_activate_device_connection(dev_name, con_uuid)
-                except (nm.UnknownConnectionError, nm.UnknownDeviceError) as e:
-                    log.warning("network: pre kickstart: can't activate connection %s on %s: %s",
-                                con_uuid, dev_name, e)
+            if parallel:
+                activations.setdefault(dev_name, []).extend(added_connections)
+            else:
+                _activate_connections(added_connections)
+
+    if activations:
+        activate_connections_parallel(ksdata, activations)
+
     return applied_devices
 
+def _activate_connections(connections):
+    """Start activation of connections.
+
+       :param connections: list of (connection uuid, device name) tuples
+       :return: object paths of active connections being activated
+       :rtype: list of str
+    """
+    active_cons = []
+    for con_uuid, dev_name in connections:
+        try:
+            active_cons.append(nm.nm_activate_device_connection(dev_name, con_uuid))
+        except (nm.UnknownConnectionError, nm.UnknownDeviceError) as e:
+            log.warning("network: pre kickstart: can't activate connection %s on %s: %s",
+                        con_uuid, dev_name, e)
+    return active_cons
+
+def ks_device_dependencies(ksdata):
+    """Return activation dependencies of devices configured in kickstart.
+
+       Vlans depend on their parent device, bonds, teams and bridges on
+       their slaves (which matters if a slave is a virtual device
+       configured in kickstart too, eg a bridge over a bond).
+
+       :return: dict mapping device name to set of names of devices
+                it depends on
+       :rtype: dict
+    """
+    deps = {}
+    for network_data in ksdata.network.network:
+        if network_data.essid:
+            continue
+        dev_name = get_device_name(network_data)
+        if not dev_name:
+            continue
+
+        if network_data.vlanid:
+            required = set([network_data.parent])
+        elif network_data.bondslaves:
+            required = set(network_data.bondslaves.split(","))
+        elif network_data.teamslaves:
+            required = set(slave for slave, _cfg in network_data.teamslaves)
+        elif network_data.bridgeslaves:
+            required = set(network_data.bridgeslaves.split(","))
+        else:
+            required = set()
+        deps.setdefault(dev_name, set()).update(required - set([dev_name]))
+    return deps
+
+def activation_levels(deps):
+    """Split devices into levels which can be activated concurrently.
+
+       Devices of a level depend only on devices of previous levels.
+       Dependencies on devices not present in deps are ignored.
+
+       :param deps: dict mapping device name to set of names of devices
+                    it depends on
+       :return: list of sets of device names
+    """
+    pending = dict((dev, set(required) & set(deps)) for dev, required in deps.items())
+    levels = []
+    while pending:
+        level = set(dev for dev, required in pending.items() if not required)
+        if not level:
+            log.warning("network: circular dependency between devices %s", sorted(pending))
+            level = set(pending)
+        for dev in level:
+            del pending[dev]
+        for required in pending.values():
+            required -= level
+        levels.append(level)
+    return levels
+
+def wait_for_active_connections(active_cons, deadline):
+    """Wait until activation of all the connections finishes.
+
+       :param active_cons: object paths of active connections
+       :param deadline: time (as returned by time.time()) to wait until
+       :return: all the connections have been activated
+       :rtype: bool
+    """
+    pending = set(active_cons)
+    activated = True
+    while pending:
+        for active_con in list(pending):
+            state = nm.nm_active_connection_state(active_con)
+            if state == NetworkManager.ActiveConnectionState.ACTIVATED:
+                pending.remove(active_con)
+            elif state in (NetworkManager.ActiveConnectionState.DEACTIVATING,
+                           NetworkManager.ActiveConnectionState.DEACTIVATED):
+                log.warning("network: activation of %s failed", active_con)
+                pending.remove(active_con)
+                activated = False
+        if pending and time.time() >= deadline:
+            log.warning("network: timed out waiting for activation of %s", sorted(pending))
+            return False
+        elif pending:
+            time.sleep(0.5)
+    return activated
+
+def activate_connections_parallel(ksdata, activations, timeout=NETWORK_CONNECTION_TIMEOUT):
+    """Activate connections of kickstart devices concurrently.
+
+       Devices not depending on each other are activated at the same time,
+       dependent devices (vlans over their parents, masters over virtual
+       slaves) once the devices they need are activated. All the
+       activations share one deadline.
+
+       :param activations: dict mapping device name to list of
+                           (connection uuid, device name) tuples to activate
+       :param timeout: time in seconds to wait for all the activations
+    """
+    start = time.time()
+    deadline = start + timeout
+    deps = ks_device_dependencies(ksdata)
+    deps = dict((dev_name, deps.get(dev_name, set())) for dev_name in activations)
+
+    for level in activation_levels(deps):
+        log.debug("network: activating devices %s", sorted(level))
+        active_cons = []
+        for dev_name in sorted(level):
+            active_cons.extend(_activate_connections(activations[dev_name]))
+        if not wait_for_active_connections(active_cons, deadline):
+            log.warning("network: devices %s have not been activated", sorted(level))
+
+    log.debug("network: activation of devices %s took %.2f s",
+              sorted(activations), time.time() - start)
+
 def networkInitialize(ksdata):
 
     log.debug("network: devices found %s", nm.nm_devices())
@@ -688,6 +688,8 @@ def nm_activate_device_connection(dev_name, con_uuid):
                                     or unavailable
        :raise SettingsNotFoundError: if conneciton with given uuid was not found
        :raise UnknownConnectionError: if connection is not available for the device
+       :return: object path of the active connection being activated
+       :rtype: str
     """
 
     if dev_name is None:
@@ -708,7 +710,7 @@ def nm_activate_device_connection(dev_name, con_uuid):
 
     nm_proxy = _get_proxy()
     try:
-        nm_proxy.ActivateConnection('(ooo)', con_paths[0], device_path, "/")
+        active_con = nm_proxy.ActivateConnection('(ooo)', con_paths[0], device_path, "/")
     except GLib.GError as e:
         if "org.freedesktop.NetworkManager.UnmanagedDevice" in e.message:
             raise UnmanagedDeviceError(dev_name, e)
@@ -718,6 +720,29 @@ def nm_activate_device_connection(dev_name, con_uuid):
             raise UnknownDeviceError(dev_name, e)
         raise
 
+    return active_con
+
+def nm_active_connection_state(active_con):
+    """Return state of active connection.
+
+       NM returns from ActivateConnection as soon as the activation is
+       started, the state can be used to wait for it to finish.
+
+       :param active_con: object path of active connection
+       :type active_con: str
+       :return: state of the connection (NetworkManager.ActiveConnectionState),
+                DEACTIVATED if the active connection does not exist anymore
+       :rtype: int
+    """
+    try:
+        state = _get_property(active_con, "State", ".Connection.Active")
+    except (GLib.GError, UnknownMethodGetError):
+        # the object is removed when the activation fails
+        return NetworkManager.ActiveConnectionState.DEACTIVATED
+    if state is None:
+        return NetworkManager.ActiveConnectionState.UNKNOWN
+    return state
+
 def nm_add_connection(values):
     """Add new connection specified by values.
 
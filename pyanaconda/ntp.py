@@ -27,7 +27,6 @@ import re
 import os
 import tempfile
 import shutil
-import subprocess
 
 from pyanaconda import iutil
 from pyanaconda.threads import threadMgr, AnacondaThread
@@ -51,11 +50,7 @@ def ntp_server_working(server):
 
     """
 
-    # using iutil.execWithRedirect here would mean that if this function was run
-    # multiple times from multiple threads in the same time, the execution would
-    # be serialized because of the program_log lock
-    with open("/dev/null", "w") as dev_null:
-        retc = subprocess.call(["ntpdate", "-q", server], stdout=dev_null, close_fds=True)
+    retc = iutil.execWithRedirect("ntpdate", ["-q", server])
 
     return retc == 0
 
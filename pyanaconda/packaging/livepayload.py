@@ -42,7 +42,7 @@ import glob
 
 from . import ImagePayload, PayloadSetupError, PayloadInstallError
 
-from pyanaconda.constants import INSTALL_TREE, THREAD_LIVE_PROGRESS
+from pyanaconda.constants import INSTALL_TREE, THREAD_LIVE_PROGRESS, PAYLOAD_INSTALL_STEPS
 from pyanaconda.constants import IMAGE_DIR, TAR_SUFFIX
 
 from pyanaconda import iutil
@@ -96,6 +96,7 @@ class LiveImagePayload(ImagePayload):
         """
         mountpoints = self.storage.mountpoints.copy()
         last_pct = -1
+        steps_done = 0
         while self.pct < 100:
             dest_size = 0
             for mnt in mountpoints:
@@ -110,8 +111,19 @@ class LiveImagePayload(ImagePayload):
                     self.pct = pct
                 last_pct = pct
                 progressQ.send_message(_("Installing software") + (" %d%%") % (min(100, self.pct),))
+                progressQ.send_bytes(min(dest_size, self.source_size), self.source_size,
+                                     PAYLOAD_INSTALL_STEPS)
+
+                steps = min(pct * PAYLOAD_INSTALL_STEPS // 100, PAYLOAD_INSTALL_STEPS)
+                for _i in range(steps_done, steps):
+                    progressQ.send_step()
+                steps_done = max(steps, steps_done)
             sleep(0.777)
 
+        # the payload is installed, do the remaining steps
+        for _i in range(steps_done, PAYLOAD_INSTALL_STEPS):
+            progressQ.send_step()
+
     def install(self):
         """ Install the payload. """
 
@@ -38,6 +38,7 @@
 import ConfigParser
 
 import os
+import re
 import shutil
 import sys
 import time
@@ -66,7 +67,7 @@ except ImportError:
     yum = None
 
 from pyanaconda.constants import BASE_REPO_NAME, DRACUT_ISODIR, DRACUT_REPODIR, INSTALL_TREE, ISO_DIR, MOUNT_DIR, \
-                                 IPMI_ABORTED
+                                 IPMI_ABORTED, PAYLOAD_INSTALL_STEPS
 from pyanaconda.flags import flags
 
 from pyanaconda import iutil
@@ -92,6 +93,9 @@ from pyanaconda.localization import langcode_matches_locale
 
 from pykickstart.constants import GROUP_ALL, GROUP_DEFAULT, KS_MISSING_IGNORE
 
+# matches the "(done/total)" suffix of the PROGRESS_INSTALL lines
+PROGRESS_INSTALL_COUNT_RE = re.compile(r'\((\d+)/(\d+)\)\s*$')
+
 YUM_PLUGINS = ["fastestmirror", "langpacks"]
 YUM_REPOS_DIR = "/etc/yum.repos.d/"
 
@@ -1679,7 +1683,7 @@ reposdir=%s
         log.info("Running anaconda-yum to install packages")
         # Watch output for progress, debug and error information
         install_errors = []
-        prev = 0
+        steps_done = 0
         try:
             for line in execReadlines("/usr/libexec/anaconda/anaconda-yum", args):
                 if line.startswith("PROGRESS_"):
@@ -1687,12 +1691,24 @@ reposdir=%s
                     msg = progress_map[key] + text
                     progressQ.send_message(msg)
                     log.debug(msg)
+
+                    match = PROGRESS_INSTALL_COUNT_RE.search(text)
+                    if key == "PROGRESS_INSTALL" and match:
+                        progressQ.send_items(int(match.group(1)), int(match.group(2)),
+                                             PAYLOAD_INSTALL_STEPS)
+                    elif key == "PROGRESS_POST":
+                        # all packages are installed, do the remaining steps
+                        for _i in range(steps_done, PAYLOAD_INSTALL_STEPS):
+                            progressQ.send_step()
+                        steps_done = PAYLOAD_INSTALL_STEPS
                 elif line.startswith("PERCENT:"):
                     _key, pct = line.split(":", 1)
 
-                    if float(pct) // 10 > prev // 10:
+                    steps = min(int(float(pct) * PAYLOAD_INSTALL_STEPS // 100),
+                                PAYLOAD_INSTALL_STEPS)
+                    for _i in range(steps_done, steps):
                         progressQ.send_step()
-                        prev = float(pct)
+                    steps_done = max(steps, steps_done)
                 elif line.startswith("DEBUG:"):
                     log.debug(line[6:])
                 elif line.startswith("INFO:"):
@@ -32,13 +32,39 @@ from pyanaconda.queue import QueueFactory
 # (PROGRESS_CODE_*, [arguments])
 #
 # Arguments vary based on the code given.  See below.
+#
+# Pending steps, messages and fractional progress updates are coalesced, so
+# that the UI only sees the latest message and fractional progress and the
+# number of steps done since it last read the queue.  Use step_count to get
+# the number of steps a step message stands for.
+#
+# Fractional progress messages (bytes, items) report the progress of a task
+# that spans the given number of steps.  The task still has to send its steps,
+# the fractional progress is just for a smooth progress indication between
+# them.
 progressQ = QueueFactory("progress")
 
-progressQ.addMessage("init", 1)             # num_steps
-progressQ.addMessage("step", 0)
-progressQ.addMessage("message", 1)          # message
+def _latest(old_args, new_args):
+    return new_args
+
+def _add_steps(old_args, new_args):
+    return (step_count(old_args) + step_count(new_args),)
+
+progressQ.addMessage("init", 1)                         # num_steps
+progressQ.addMessage("step", 0, coalesce=_add_steps)
+progressQ.addMessage("message", 1, coalesce=_latest)    # message
 progressQ.addMessage("complete", 0)
-progressQ.addMessage("quit", 1)             # exit_code
+progressQ.addMessage("quit", 1)                         # exit_code
+progressQ.addMessage("bytes", 3, coalesce=_latest)      # done, total, steps
+progressQ.addMessage("items", 3, coalesce=_latest)      # done, total, steps
+
+def step_count(args):
+    """Number of steps a (possibly coalesced) step message stands for"""
+
+    if args:
+        return args[0]
+    else:
+        return 1
 
 # Surround a block of code with progress updating.  Before the code runs, the
 # message is updated so the user can tell what's about to take so long.
@@ -62,3 +88,9 @@ def progress_init(steps):
 
 def progress_complete():
     progressQ.send_complete()
+
+def progress_bytes(done, total, steps=1):
+    progressQ.send_bytes(done, total, steps)
+
+def progress_items(done, total, steps=1):
+    progressQ.send_items(done, total, steps)
@@ -19,6 +19,39 @@
 # Author(s): Chris Lumens <clumens@redhat.com>
 
 import Queue
+import fcntl
+import os
+import threading
+
+class _CoalescingQueue(Queue.Queue):
+    """Queue.Queue merging new items with pending items of the same kind.
+
+       Items are (code, args) tuples.  A new item with a code that has a merge
+       function in coalesce_funcs replaces the last pending item with the same
+       code by an item with args returned by merge_function(old_args, new_args)
+       unless an item with a code that cannot be coalesced was put in between.
+    """
+    def __init__(self, maxsize=0):
+        Queue.Queue.__init__(self, maxsize)
+        self.coalesce_funcs = {}
+
+    def _put(self, item):
+        code, args = item
+        merge = self.coalesce_funcs.get(code)
+
+        if merge:
+            for i in range(len(self.queue) - 1, -1, -1):
+                pending_code, pending_args = self.queue[i]
+                if pending_code == code:
+                    self.queue[i] = (code, merge(pending_args, args))
+
+                    # put() counts every item as a new unfinished task
+                    self.unfinished_tasks -= 1
+                    return
+                elif pending_code not in self.coalesce_funcs:
+                    break
+
+        self.queue.append(item)
 
 class QueueFactory(object):
     """Constructs a new object wrapping a Queue.Queue, complete with constants
@@ -40,6 +73,20 @@ class QueueFactory(object):
        that takes one argument.
 
        Reusing names within the same class is not allowed.
+
+       Messages that only carry the latest state (or a count) can be coalesced
+       so that a slow consumer doesn't have to process all of them:
+
+           q.addMessage("message", 1, coalesce=lambda old, new: new)
+
+       A new message of such type then replaces the pending one with args
+       returned by the coalesce function (given the old and new args), unless
+       a message that is not coalesced was sent in between.
+
+       Instead of polling the queue, a main loop can watch the file descriptor
+       returned by the wakeup_fd property.  It becomes readable when messages
+       are put into the queue and the consumer has to call clear_wakeup before
+       getting the messages out of the queue.
     """
     def __init__(self, name):
         self.name = name
@@ -47,7 +94,11 @@ class QueueFactory(object):
         self.__counter = 0
         self.__names = []
 
-        self.q = Queue.Queue()
+        self.q = _CoalescingQueue()
+
+        self._wakeup_lock = threading.Lock()
+        self._wakeup_fds = None
+        self._wakeup_pending = False
 
     def _makeMethod(self, constant, methodName, argc):
         def __method(*args):
@@ -56,11 +107,54 @@ class QueueFactory(object):
                                 (methodName, argc, len(args)))
 
             self.q.put((constant, args))
+            self._wakeup()
 
         __method.__name__ = methodName
         return __method
 
-    def addMessage(self, name, argc):
+    def _wakeup(self):
+        """Make the wakeup file descriptor readable if it is used"""
+
+        with self._wakeup_lock:
+            if self._wakeup_fds and not self._wakeup_pending:
+                os.write(self._wakeup_fds[1], b"\0")
+                self._wakeup_pending = True
+
+    @property
+    def wakeup_fd(self):
+        """File descriptor that becomes readable when messages arrive"""
+
+        with self._wakeup_lock:
+            if not self._wakeup_fds:
+                self._wakeup_fds = os.pipe()
+                for fd in self._wakeup_fds:
+                    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+                    fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+                    flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+                    fcntl.fcntl(fd, fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
+
+                # messages sent before anybody started watching
+                if not self.q.empty():
+                    os.write(self._wakeup_fds[1], b"\0")
+                    self._wakeup_pending = True
+
+            return self._wakeup_fds[0]
+
+    def clear_wakeup(self):
+        """Make the wakeup file descriptor not readable until new messages
+           are put into the queue.  Needs to be called before getting the
+           messages out of the queue, otherwise a wakeup may be lost.
+        """
+
+        with self._wakeup_lock:
+            if not self._wakeup_fds or not self._wakeup_pending:
+                return
+
+            # exactly one byte is written for a pending wakeup
+            os.read(self._wakeup_fds[0], 1)
+            self._wakeup_pending = False
+
+    def addMessage(self, name, argc, coalesce=None):
         if name in self.__names:
             raise AttributeError("%s queue already has a message named %s" % (self.name, name))
 
@@ -74,4 +168,7 @@ class QueueFactory(object):
         method = self._makeMethod(getattr(self, const_name), method_name, argc)
         setattr(self, method_name, method)
 
+        if coalesce:
+            self.q.coalesce_funcs[getattr(self, const_name)] = coalesce
+
         self.__names.append(name)
@@ -20,6 +20,17 @@
 # Red Hat Author(s): Martin Kolman <mkolman@redhat.com>
 #
 import imp
+import os
+import sys
+import threading
+import time
+import __builtin__
+
+import logging
+log = logging.getLogger("anaconda")
+
+# where the report of the import profiler is written
+IMPORT_PROFILE_FILE = "/tmp/anaconda-imports.log"
 
 
 def module_exists(module_path):
@@ -78,3 +89,150 @@ def get_anaconda_version_string():
     else:
         return "unknown"
 
+
+def get_process_uptime():
+    """Return the number of seconds elapsed since the start of the process.
+
+    :rtype: float
+    """
+
+    with open("/proc/self/stat") as f:
+        # the process name may contain spaces, the start time (in clock
+        # ticks after boot) is the 22nd field
+        fields = f.read().rsplit(")", 1)[1].split()
+    with open("/proc/uptime") as f:
+        uptime = float(f.read().split()[0])
+
+    return uptime - int(fields[19]) / float(os.sysconf("SC_CLK_TCK"))
+
+class ImportProfiler(object):
+    """Profiler measuring how long the imports of modules take.
+
+       For every module imported while the profiler is running the
+       cumulative time (including the imports done by the module) and the
+       self time (excluding them) are recorded.
+    """
+
+    def __init__(self):
+        self._orig_import = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._records = {}
+        self._milestones = []
+
+    @property
+    def running(self):
+        return self._orig_import is not None
+
+    def start(self):
+        if self.running:
+            return
+
+        self._orig_import = __builtin__.__import__
+        __builtin__.__import__ = self._import
+
+    def stop(self):
+        if not self.running:
+            return
+
+        __builtin__.__import__ = self._orig_import
+        self._orig_import = None
+
+    def _import(self, name, globals_=None, locals_=None, fromlist=None, level=-1):
+        # stack of the times spent in the nested imports
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        loaded = len(sys.modules)
+        start = time.time()
+        stack.append(0.0)
+        try:
+            return self._orig_import(name, globals_, locals_, fromlist, level)
+        finally:
+            elapsed = time.time() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+
+            # only imports loading new modules are interesting
+            if len(sys.modules) > loaded:
+                self._record(self._module_name(name, globals_), elapsed, elapsed - nested)
+
+    @staticmethod
+    def _module_name(name, globals_):
+        """Get the full name of the imported module even for relative imports"""
+
+        if name in sys.modules or not globals_ or "__name__" not in globals_:
+            return name
+
+        package = globals_.get("__package__")
+        if not package:
+            package = globals_["__name__"]
+            if "__path__" not in globals_:
+                package = package.rpartition(".")[0]
+
+        full_name = "%s.%s" % (package, name) if package else name
+        return full_name if full_name in sys.modules else name
+
+    def _record(self, name, cumulative, self_time):
+        with self._lock:
+            (old_cumulative, old_self_time) = self._records.get(name, (0.0, 0.0))
+            self._records[name] = (old_cumulative + cumulative, old_self_time + self_time)
+
+    @property
+    def records(self):
+        """Records of the imports sorted by the cumulative time
+
+           :returns: list of (module name, cumulative time, self time) tuples
+        """
+
+        with self._lock:
+            records = [(name, cum, own) for (name, (cum, own)) in self._records.iteritems()]
+
+        return sorted(records, key=lambda r: r[1], reverse=True)
+
+    def add_milestone(self, name, uptime):
+        with self._lock:
+            self._milestones.append((name, uptime))
+
+    def write_report(self, path=IMPORT_PROFILE_FILE):
+        """Write the sorted records of the imports to a file."""
+
+        records = self.records
+        with self._lock:
+            milestones = list(self._milestones)
+
+        with open(path, "w") as f:
+            for (name, uptime) in milestones:
+                f.write("# %s reached %.3f s after the start\n" % (name, uptime))
+            f.write("# %d modules loaded, %.3f s spent in imports\n" %
+                    (len(records), sum(r[2] for r in records)))
+            f.write("%10s %10s  %s\n" % ("cumulative", "self", "module"))
+            for (name, cumulative, self_time) in records:
+                f.write("%10.4f %10.4f  %s\n" % (cumulative, self_time, name))
+
+import_profiler = ImportProfiler()
+
+def startup_milestone(name):
+    """Log the time elapsed since the start of the process when reaching a
+       point of the startup, and update the report of the import profiler if
+       it is running.
+
+       :param str name: name of the point of the startup
+    """
+
+    try:
+        uptime = get_process_uptime()
+    except (IOError, IndexError, ValueError) as e:
+        log.debug("Failed to get the process uptime: %s", e)
+        return
+
+    log.info("Startup milestone '%s' reached %.2f s after the start", name, uptime)
+
+    if import_profiler.running:
+        import_profiler.add_milestone(name, uptime)
+        try:
+            import_profiler.write_report()
+        except IOError as e:
+            log.error("Failed to write the import profile: %s", e.strerror)
@@ -22,7 +22,39 @@
 import logging
 log = logging.getLogger("anaconda")
 
+import itertools
+import json
+import sys
 import threading
+import time
+import traceback
+from collections import deque
+
+# default maximum number of worker threads of a ThreadPool
+DEFAULT_POOL_WORKERS = 4
+
+# where ThreadManager.dump_activity writes the activity records
+THREAD_ACTIVITY_FILE = "/tmp/anaconda-threads.json"
+
+# numbers of finished threads and waits kept in the activity records
+THREAD_HISTORY_SIZE = 500
+WAIT_HISTORY_SIZE = 500
+
+# stacks of threads running longer than THREAD_SAMPLE_MIN_AGE seconds are
+# sampled every THREAD_SAMPLE_INTERVAL seconds, THREAD_SAMPLES last samples
+# (with at most THREAD_SAMPLE_DEPTH innermost frames) are kept for each thread
+THREAD_SAMPLE_INTERVAL = 5
+THREAD_SAMPLE_MIN_AGE = 5
+THREAD_SAMPLES = 12
+THREAD_SAMPLE_DEPTH = 8
+
+# waits longer than this (in seconds) are logged
+LONG_WAIT = 1
+
+# numbers of the ThreadPool workers and tasks, shared by all the pools so
+# that pools with the same name never reuse a name of a thread that hasn't
+# removed itself from the thread manager yet
+_pool_thread_counter = itertools.count()
 
 class ThreadManager(object):
     """A singleton class for managing threads and processes.
@@ -42,6 +74,14 @@ class ThreadManager(object):
         self._errors = {}
         self._main_thread = threading.current_thread()
 
+        # activity records of the running threads (by name), the finished
+        # threads and the waits for threads
+        self._activity_lock = threading.Lock()
+        self._running_activity = {}
+        self._finished_activity = deque(maxlen=THREAD_HISTORY_SIZE)
+        self._waits = deque(maxlen=WAIT_HISTORY_SIZE)
+        self._sampler = None
+
     def __call__(self):
         return self
 
@@ -57,6 +97,11 @@ class ThreadManager(object):
                 raise KeyError("Cannot add thread '%s', a thread with the same name already running" % obj.name)
 
             self._objs[obj.name] = obj
+            with self._activity_lock:
+                self._running_activity[obj.name] = {"name": obj.name,
+                                                    "started": time.time(),
+                                                    "finished": None,
+                                                    "samples": deque(maxlen=THREAD_SAMPLES)}
             obj.start()
 
         return obj.name
@@ -69,6 +114,12 @@ class ThreadManager(object):
         with self._objs_lock:
             self._objs.pop(name)
 
+        with self._activity_lock:
+            activity = self._running_activity.pop(name, None)
+            if activity:
+                activity["finished"] = time.time()
+                self._finished_activity.append(activity)
+
     def exists(self, name):
         """Determine if a thread or process exists with the given name."""
 
@@ -97,10 +148,13 @@ class ThreadManager(object):
         """
         # we don't need a lock here,
         # because get() acquires it itself
+        started = time.time()
         try:
             self.get(name).join()
         except AttributeError:
             pass
+        else:
+            self._record_wait(name, started)
         # - if there is a thread object for the given name,
         #   we join it
         # - if there is not a thread object for the given name,
@@ -109,6 +163,97 @@ class ThreadManager(object):
 
         self.raise_if_error(name)
 
+    def _record_wait(self, name, started):
+        duration = time.time() - started
+        waiter = threading.current_thread().name
+
+        with self._activity_lock:
+            self._waits.append({"thread": name, "waiter": waiter,
+                                "started": started, "duration": duration})
+
+        if duration >= LONG_WAIT:
+            log.debug("%s waited %.3f s for thread %s", waiter, duration, name)
+
+    def start_sampling(self, interval=THREAD_SAMPLE_INTERVAL):
+        """Start periodic sampling of stacks of long running threads."""
+
+        if self._sampler:
+            return
+
+        self._sampler = threading.Thread(name="AnaThreadSampler", target=self._sample,
+                                         args=(interval,))
+        self._sampler.daemon = True
+        self._sampler.start()
+
+    def _sample(self, interval):
+        while True:
+            time.sleep(interval)
+            self.sample_stacks()
+
+    def sample_stacks(self, min_age=THREAD_SAMPLE_MIN_AGE):
+        """Record stacks of the threads running longer than min_age seconds."""
+
+        now = time.time()
+        frames = sys._current_frames()
+
+        with self._objs_lock:
+            idents = dict((name, getattr(obj, "ident", None))
+                          for name, obj in self._objs.iteritems())
+
+        with self._activity_lock:
+            for name, activity in self._running_activity.iteritems():
+                frame = frames.get(idents.get(name))
+                if frame is None or now - activity["started"] < min_age:
+                    continue
+
+                stack = traceback.extract_stack(frame)[-THREAD_SAMPLE_DEPTH:]
+                activity["samples"].append({"time": now,
+                                            "stack": ["%s:%d %s" % (fname, lineno, func)
+                                                      for (fname, lineno, func, _line) in stack]})
+
+    def get_activity(self):
+        """Get the activity records of the threads.
+
+           :returns: a dictionary with lists of records of the running and
+                     finished threads (name, times of start and end, samples
+                     of stacks) and the waits for threads (name of the thread,
+                     name of the waiting thread, start and duration)
+           :rtype: dict
+        """
+
+        def _copy(activity):
+            ret = dict(activity)
+            ret["samples"] = list(activity["samples"])
+            return ret
+
+        with self._activity_lock:
+            return {"time": time.time(),
+                    "running": [_copy(a) for a in self._running_activity.itervalues()],
+                    "finished": [_copy(a) for a in self._finished_activity],
+                    "waits": list(self._waits)}
+
+    def dump_activity(self, path=THREAD_ACTIVITY_FILE):
+        """Log a summary of the threads' activity and write all the activity
+           records to a JSON file.
+        """
+
+        activity = self.get_activity()
+        now = activity["time"]
+
+        running = ", ".join("%s (%.1f s)" % (a["name"], now - a["started"])
+                            for a in activity["running"])
+        waits = sorted(activity["waits"], key=lambda w: w["duration"], reverse=True)[:5]
+        longest_waits = ", ".join("%s for %s (%.1f s)" % (w["waiter"], w["thread"], w["duration"])
+                                  for w in waits)
+        log.info("Threads running: %s; longest waits: %s; activity written to %s",
+                 running or "none", longest_waits or "none", path)
+
+        try:
+            with open(path, "w") as f:
+                json.dump(activity, f, indent=2)
+        except IOError as e:
+            log.error("Failed to write thread activity to %s: %s", path, e.strerror)
+
     def wait_all(self):
         """Wait for all threads to exit and if there was an error re-raise it.
         """
@@ -152,7 +297,7 @@ class ThreadManager(object):
 
         exc_info = self._errors.pop(name)
         if exc_info:
-            raise exc_info
+            raise exc_info[0], exc_info[1], exc_info[2]
 
     def in_main_thread(self):
         """Return True if it is run in the main thread."""
@@ -218,6 +363,217 @@ class AnacondaThread(threading.Thread):
             threadMgr.remove(self.name)
             log.info("Thread Done: %s (%s)", self.name, self.ident)
 
+class TaskTimeoutError(Exception):
+    """Raised when waiting for a result of a task times out"""
+    pass
+
+class ThreadFuture(object):
+    """Result of a task submitted to a ThreadPool.
+
+       The name of the task is used for reporting its error to the thread
+       manager, the same way AnacondaThread does it with thread names.
+    """
+    def __init__(self, name, func, args, kwargs):
+        self.name = name
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+        self._done = threading.Event()
+        self._result = None
+        self._exc_info = None
+
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def _run(self):
+        self.started = time.time()
+        try:
+            self._result = self._func(*self._args, **self._kwargs)
+        # pylint: disable=W0702
+        except:
+            self._exc_info = sys.exc_info()
+        finally:
+            self.finished = time.time()
+
+        log.debug("Task %s finished in %.3f s (waited %.3f s)", self.name,
+                  self.finished - self.started, self.started - self.submitted)
+
+    def done(self):
+        """Return True if the task has finished."""
+
+        return self._done.is_set()
+
+    @property
+    def duration(self):
+        """How long the task was running (in seconds) or None if not finished"""
+
+        if self.finished is None:
+            return None
+
+        return self.finished - self.started
+
+    def wait(self, timeout=None):
+        """Wait for the task to finish.
+
+           :param timeout: maximum number of seconds to wait or None
+           :returns: whether the task has finished
+           :rtype: bool
+        """
+        return self._done.wait(timeout)
+
+    def exception(self, timeout=None):
+        """Return the exception raised by the task or None.
+
+           :raise TaskTimeoutError: if the task doesn't finish in time
+        """
+        if not self.wait(timeout):
+            raise TaskTimeoutError("Task %s has not finished in time" % self.name)
+
+        if self._exc_info:
+            return self._exc_info[1]
+        else:
+            return None
+
+    def result(self, timeout=None):
+        """Return the value returned by the task or re-raise the exception
+           raised by the task (and remove it from the thread manager's errors).
+
+           :raise TaskTimeoutError: if the task doesn't finish in time
+        """
+        if not self.wait(timeout):
+            raise TaskTimeoutError("Task %s has not finished in time" % self.name)
+
+        if self._exc_info:
+            threadMgr.raise_if_error(self.name)
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+
+        return self._result
+
+class ThreadPool(object):
+    """A bounded pool of worker threads running submitted tasks.
+
+       Workers are AnacondaThreads managed by the thread manager.  They are
+       started as needed (up to max_workers) and exit when there are no tasks
+       to run so that idle pools don't block threadMgr.wait_all().
+
+       Errors of the tasks of fatal pools are reported to the thread manager
+       using the tasks' names and invoke the exception handler.  Errors of the
+       other pools' tasks are only re-raised by ThreadFuture.result(), so the
+       ones nobody asks for don't make threadMgr.wait_all() fail.
+
+       Example:
+
+           pool = ThreadPool("AnaNTPCheck", max_workers=4)
+           working = pool.map(ntp.ntp_server_working, servers)
+    """
+    def __init__(self, name, max_workers=DEFAULT_POOL_WORKERS, fatal=True):
+        self.name = name
+        self._max_workers = max_workers
+        self._fatal = fatal
+
+        self._lock = threading.Lock()
+        self._tasks = deque()
+        self._pending = []
+        self._workers = 0
+
+    def submit(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in a worker thread.
+
+           :returns: future of the task's result
+           :rtype: ThreadFuture
+        """
+        with self._lock:
+            future = ThreadFuture("%s-task%d" % (self.name, next(_pool_thread_counter)),
+                                  func, args, kwargs)
+            self._tasks.append(future)
+            self._pending.append(future)
+
+            if self._workers < self._max_workers:
+                self._workers += 1
+                worker_name = "%s-worker%d" % (self.name, next(_pool_thread_counter))
+                threadMgr.add(AnacondaThread(name=worker_name, target=self._work))
+
+        return future
+
+    def map(self, func, iterable, timeout=None):
+        """Run func for every item of the iterable in the worker threads and
+           return the list of results.  The first error of the tasks is
+           re-raised.
+
+           :param timeout: maximum number of seconds to wait for all the tasks
+           :raise TaskTimeoutError: if the tasks don't finish in time
+        """
+        futures = [self.submit(func, item) for item in iterable]
+
+        done, not_done = self.wait(futures, timeout)
+        if not_done:
+            raise TaskTimeoutError("%d tasks of %s have not finished in time"
+                                   % (len(not_done), self.name))
+
+        # get the results of all the tasks so that all the errors are removed
+        # from the thread manager, not only the first one
+        results = []
+        exc_info = None
+        for future in futures:
+            try:
+                results.append(future.result())
+            # pylint: disable=W0702
+            except:
+                if exc_info is None:
+                    exc_info = sys.exc_info()
+
+        if exc_info:
+            raise exc_info[0], exc_info[1], exc_info[2]
+
+        return results
+
+    def wait(self, futures=None, timeout=None):
+        """Wait for the given tasks or for all the pool's tasks to finish.
+
+           :param futures: futures of the tasks to wait for or None for all
+           :param timeout: maximum number of seconds to wait or None
+           :returns: lists of finished and not finished futures
+           :rtype: (list, list)
+        """
+        if futures is None:
+            with self._lock:
+                futures = list(self._pending)
+
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+
+        for future in futures:
+            if deadline is None:
+                future.wait()
+            elif not future.wait(max(0, deadline - time.time())):
+                break
+
+        done = [future for future in futures if future.done()]
+        not_done = [future for future in futures if not future.done()]
+        return (done, not_done)
+
+    def _work(self):
+        while True:
+            with self._lock:
+                if not self._tasks:
+                    self._workers -= 1
+                    return
+                future = self._tasks.popleft()
+
+            future._run()
+            if future._exc_info and self._fatal:
+                threadMgr.set_error(future.name, *future._exc_info)
+
+            with self._lock:
+                self._pending.remove(future)
+            future._done.set()
+
+            if future._exc_info and self._fatal:
+                sys.excepthook(*future._exc_info)
+
 def initThreading():
     """Set up threading for anaconda's use. This method must be called before
        any GTK or threading code is called, or else threads will only run when
@@ -229,5 +585,6 @@ def initThreading():
 
     global threadMgr
     threadMgr = ThreadManager()
+    threadMgr.start_sampling()
 
 threadMgr = None
@@ -27,7 +27,8 @@ configuration, valid timezones recognition etc.
 import os
 import pytz
 import langtable
-from collections import OrderedDict
+import threading
+from collections import OrderedDict, namedtuple
 
 from pyanaconda import iutil
 from pyanaconda.constants import THREAD_STORAGE
@@ -46,6 +47,11 @@ ETC_ZONES = ['GMT+1', 'GMT+2', 'GMT+3', 'GMT+4', 'GMT+5', 'GMT+6', 'GMT+7',
              'GMT-8', 'GMT-9', 'GMT-10', 'GMT-11', 'GMT-12', 'GMT-13',
              'GMT-14', 'UTC', 'GMT']
 
+# index of the known timezones, see _get_timezone_index
+TimezoneIndex = namedtuple("TimezoneIndex", ["valid", "regions", "sorted_cities"])
+_timezone_index = None
+_timezone_index_lock = threading.Lock()
+
 NTP_PACKAGE = "chrony"
 NTP_SERVICE = "chronyd"
 
@@ -180,26 +186,67 @@ def get_preferred_timezone(territory):
 
     return timezones[0]
 
+def _get_timezone_index():
+    """
+    Get the index of known timezones, building it on the first call.
+
+    :return: an index with a frozenset of valid timezones, an OrderedDict
+             mapping regions to frozensets of their cities and a dict mapping
+             regions to sorted tuples of their cities
+    :rtype: TimezoneIndex
+
+    """
+
+    global _timezone_index
+
+    with _timezone_index_lock:
+        if _timezone_index is not None:
+            return _timezone_index
+
+        regions = OrderedDict()
+        for tz in pytz.common_timezones:
+            parts = tz.split("/", 1)
+
+            if len(parts) > 1:
+                regions.setdefault(parts[0], set()).add(parts[1])
+
+        regions["Etc"] = set(ETC_ZONES)
+
+        valid = frozenset(pytz.common_timezones) | \
+                frozenset("Etc/" + zone for zone in ETC_ZONES)
+        regions = OrderedDict((region, frozenset(cities))
+                              for region, cities in regions.iteritems())
+        sorted_cities = dict((region, tuple(sorted(cities)))
+                             for region, cities in regions.iteritems())
+
+        _timezone_index = TimezoneIndex(valid, regions, sorted_cities)
+        return _timezone_index
+
 def get_all_regions_and_timezones():
     """
-    Get a dictionary mapping the regions to the list of their timezones.
+    Get a dictionary mapping the regions to the sets of their timezones.
 
+    :return: an OrderedDict with frozensets of timezones as values, the
+             dictionary is a new one, but the sets are shared
     :rtype: dict
 
     """
 
-    result = OrderedDict()
+    return OrderedDict(_get_timezone_index().regions)
 
-    for tz in pytz.common_timezones:
-        parts = tz.split("/", 1)
+def get_region_timezones(region):
+    """
+    Get sorted timezones (cities) of the given region.
+
+    :param region: a region (e.g. 'Europe')
+    :type region: str
+    :return: alphabetically sorted timezones of the region, empty if the
+             region is not known
+    :rtype: tuple
 
-        if len(parts) > 1:
-            if parts[0] not in result:
-                result[parts[0]] = set()
-            result[parts[0]].add(parts[1])
+    """
 
-    result["Etc"] = set(ETC_ZONES)
-    return result
+    return _get_timezone_index().sorted_cities.get(region, ())
 
 def is_valid_timezone(timezone):
     """
@@ -210,7 +257,5 @@ def is_valid_timezone(timezone):
 
     """
 
-    etc_zones = ["Etc/" + zone for zone in ETC_ZONES]
-
-    return timezone in pytz.common_timezones + etc_zones
+    return timezone in _get_timezone_index().valid
 
@@ -26,6 +26,7 @@ import inspect
 import copy
 import sys
 import types
+import marshal
 
 from pyanaconda.constants import ANACONDA_ENVIRON, FIRSTBOOT_ENVIRON
 from pykickstart.constants import FIRSTBOOT_RECONFIG
@@ -33,6 +34,16 @@ from pykickstart.constants import FIRSTBOOT_RECONFIG
 import logging
 log = logging.getLogger("anaconda")
 
+# where the manifest of the classes found by collect is stored
+COLLECT_MANIFEST = "/var/cache/anaconda/ui-collect"
+COLLECT_MANIFEST_VERSION = 1
+
+# (module pattern, directory) -> (directory mtime, modules, classes)
+_collect_cache = {}
+
+# (module pattern, directory) -> (directory mtime, modules with class names)
+_collect_manifest = {}
+
 class PathDict(dict):
     """Dictionary class supporting + operator"""
     def __add__(self, ext):
@@ -521,6 +532,11 @@ def collect(module_pattern, path, pred):
        module_pattern % filename and find all classes within that match
        the given predicate.  This is then returned as a list of classes.
 
+       The classes found in the directory are cached (and optionally stored in
+       a manifest, see load_collect_manifest) until the directory changes, so
+       collecting classes from the same directory with different predicates
+       doesn't traverse and inspect all the modules again.
+
        It is suggested you use collect_categories or collect_spokes instead of
        this lower-level method.
 
@@ -535,13 +551,108 @@ def collect(module_pattern, path, pred):
        :type pred: function with one argument returning True or False
     """
 
-    retval = []
+    return [cls for (_name, cls) in _collect_classes(module_pattern, path)
+            if pred(cls)]
+
+def collect_index(mask_paths, pred, key):
+    """Collect classes matching the given predicate from all the given
+       directories (see collect) and group them by the given key.
+
+       :param mask_paths: list of mask, path tuples to search for classes
+       :type mask_paths: list of (mask, path)
+
+       :param pred: function which marks classes as good to import
+       :type pred: function with one argument returning True or False
+
+       :param key: function returning the key to group the classes by
+       :type key: function with one argument
+
+       :return: dictionary mapping keys to lists of classes
+       :rtype: dict
+    """
+
+    index = {}
+    for mask, path in mask_paths:
+        for cls in collect(mask, path, pred):
+            index.setdefault(key(cls), []).append(cls)
+
+    return index
+
+def _collect_classes(module_pattern, path):
+    """Get all the classes found in the modules in the given directory.
+
+       :return: list of (name, class) tuples
+    """
+
+    try:
+        mtime = os.stat(path).st_mtime
+    # when the directory "path" does not exist
+    except OSError:
+        return []
+
+    key = (module_pattern, path)
+    cached = _collect_cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[2]
+
+    modules = None
+    manifest_entry = _collect_manifest.get(key)
+    if manifest_entry and manifest_entry[0] == mtime:
+        modules = _load_manifest_modules(module_pattern, path, manifest_entry[1])
+
+    if modules is None:
+        modules = _scan_directory(module_pattern, path)
+
+    classes = [member for (_mod_name, members) in modules for member in members]
+    _collect_cache[key] = (mtime, modules, classes)
+
+    return classes
+
+def _load_manifest_modules(module_pattern, path, manifest_modules):
+    """Import the modules listed in a manifest and get their classes.
+
+       :return: list of (module name, [(name, class)]) tuples or None if the
+                manifest doesn't match the modules
+    """
+
+    modules = []
+    for (mod_name, names) in manifest_modules:
+        full_name = module_pattern % mod_name
+        try:
+            module = sys.modules.get(full_name)
+            if not module:
+                __import__(full_name)
+                module = sys.modules[full_name]
+
+            # the module must be loaded from the directory
+            if module.__file__.rsplit(".", 1)[0] != os.path.join(path, mod_name):
+                return None
+
+            members = [(name, getattr(module, name)) for name in names]
+        except (ImportError, KeyError, AttributeError) as err:
+            log.debug("Collect manifest doesn't match %s: %s", full_name, err)
+            return None
+
+        if not all(inspect.isclass(cls) for (_name, cls) in members):
+            return None
+
+        modules.append((mod_name, members))
+
+    return modules
+
+def _scan_directory(module_pattern, path):
+    """Import all the modules in the given directory and find their classes.
+
+       :return: list of (module name, [(name, class)]) tuples
+    """
+
+    modules = []
     try:
         contents = os.listdir(path)
     # when the directory "path" does not exist
     except OSError:
         return []
-    
+
     for module_file in contents:
         if (not module_file.endswith(".py")) and \
            (not module_file.endswith(".so")):
@@ -633,18 +744,64 @@ def collect(module_pattern, path, pred):
             if mod_info and mod_info[0]:
                 mod_info[0].close()
 
-        p = lambda obj: inspect.isclass(obj) and pred(obj)
-
         # if __all__ is defined in the module, use it
         if not hasattr(module, "__all__"):
-            members = inspect.getmembers(module, p)
+            members = inspect.getmembers(module, inspect.isclass)
         else:
             members = [(name, getattr(module, name))
                        for name in module.__all__
-                       if p(getattr(module, name))]
-        
-        for (name, val) in members:
-            retval.append(val)
+                       if inspect.isclass(getattr(module, name))]
+
+        modules.append((mod_name, members))
+
+    return modules
+
+def load_collect_manifest(manifest_path=COLLECT_MANIFEST):
+    """Load the manifest of the classes found by collect saved by
+       save_collect_manifest.  The classes listed in the manifest for a
+       directory are used instead of traversing and inspecting all the modules
+       in the directory as long as the directory's mtime doesn't change.
+    """
+
+    global _collect_manifest
+
+    if not os.path.exists(manifest_path):
+        return
 
-    return retval
+    try:
+        with open(manifest_path, "rb") as f:
+            manifest = marshal.load(f)
+    except (IOError, EOFError, ValueError, TypeError) as err:
+        log.warning("Failed to load the collect manifest: %s", err)
+        return
+
+    if not isinstance(manifest, dict) or \
+            manifest.get("version") != COLLECT_MANIFEST_VERSION:
+        return
+
+    _collect_manifest = dict(((pattern, path), (mtime, modules))
+                             for (pattern, path, mtime, modules) in manifest["directories"])
+
+def save_collect_manifest(manifest_path=COLLECT_MANIFEST):
+    """Save the manifest of the classes found by collect so far."""
 
+    directories = [(pattern, path, mtime,
+                    [(mod_name, [name for (name, _cls) in members])
+                     for (mod_name, members) in modules])
+                   for ((pattern, path), (mtime, modules, _classes)) in _collect_cache.items()]
+
+    manifest = {"version": COLLECT_MANIFEST_VERSION,
+                "directories": directories}
+
+    try:
+        manifest_dir = os.path.dirname(manifest_path)
+        if not os.path.isdir(manifest_dir):
+            os.makedirs(manifest_dir)
+
+        # write to a temporary file first to never leave a partial manifest behind
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            marshal.dump(manifest, f)
+        os.rename(tmp_path, manifest_path)
+    except (IOError, OSError) as err:
+        log.warning("Failed to save the collect manifest: %s", err)
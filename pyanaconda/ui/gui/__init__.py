@@ -30,7 +30,9 @@ from pyanaconda import product, iutil, constants
 from pyanaconda.ui import UserInterface, common
 from pyanaconda.ui.gui.utils import enlightbox, gtk_action_wait, gtk_call_once, busyCursor, unbusyCursor
 from pyanaconda import ihelp
+from pyanaconda.startup_utils import startup_milestone
 import os.path
+import xml.etree.cElementTree as ET
 
 import logging
 log = logging.getLogger("anaconda")
@@ -41,6 +43,60 @@ _screenshotIndex = 0
 _last_screenshot_timestamp = 0
 SCREENSHOT_DELAY = 1  # in seconds
 
+# parsed UI files: path -> (mtime, root element)
+_ui_files = {}
+
+# UI definitions with only the objects requested by GUIObject subclasses:
+# (path, builder objects) -> (mtime, UI definition string)
+_ui_templates = {}
+
+# UI file paths found for GUIObject subclasses: class -> path
+_ui_paths = {}
+
+def _get_ui_template(path, objects):
+    """Get the UI definition from the given file with only the given top-level
+       objects (or with all of them if no objects are given).
+
+       Every file is read and parsed only once (unless it changes) and the
+       definitions are cached, so that Gtk.Builder doesn't have to parse the
+       whole (possibly big and shared by many objects) file every time an
+       object using it is created.
+
+       :param path: path of the UI file
+       :type path: str
+       :param objects: names of the top-level objects to include
+       :type objects: list of str
+       :return: UI definition for Gtk.Builder.add_from_string
+       :rtype: str
+    """
+
+    mtime = os.stat(path).st_mtime
+    key = (path, tuple(objects))
+    cached = _ui_templates.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    if not objects:
+        with open(path) as f:
+            template = f.read()
+    else:
+        cached = _ui_files.get(path)
+        if cached and cached[0] == mtime:
+            root = cached[1]
+        else:
+            root = ET.parse(path).getroot()
+            _ui_files[path] = (mtime, root)
+
+        # keep everything but the top-level objects not requested
+        template_root = ET.Element(root.tag, root.attrib)
+        for child in root:
+            if child.get("id") is None or child.get("id") in objects:
+                template_root.append(child)
+        template = ET.tostring(template_root)
+
+    _ui_templates[key] = (mtime, template)
+    return template
+
 
 ANACONDA_WINDOW_GROUP = Gtk.WindowGroup()
 
@@ -122,18 +178,20 @@ class GUIObject(common.UIObject):
         self.skipTo = None
         self.applyOnSkip = False
 
+        start = time.time()
+
         self.builder = Gtk.Builder()
         self.builder.set_translation_domain(self.translationDomain)
         self._window = None
 
-        if self.builderObjects:
-            self.builder.add_objects_from_file(self._findUIFile(), self.builderObjects)
-        else:
-            self.builder.add_from_file(self._findUIFile())
+        self.builder.add_from_string(_get_ui_template(self._findUIFile(), self.builderObjects))
 
         ANACONDA_WINDOW_GROUP.add_window(self.window)
         self.builder.connect_signals(self)
 
+        log.debug("UI of %s constructed in %.3f s", self.__class__.__name__,
+                  time.time() - start)
+
         # Keybinder from GI needs to be initialized before use
         Keybinder.init()
         Keybinder.bind("<Shift>Print", self._handlePrntScreen, [])
@@ -143,6 +201,10 @@ class GUIObject(common.UIObject):
         self._autostepDone = False
 
     def _findUIFile(self):
+        ui_path = _ui_paths.get(self.__class__)
+        if ui_path and os.access(ui_path, os.R_OK):
+            return ui_path
+
         path = os.environ.get("UIPATH", "./:/tmp/updates/:/tmp/updates/ui/:/usr/share/anaconda/ui/")
         dirs = path.split(":")
 
@@ -152,6 +214,7 @@ class GUIObject(common.UIObject):
         for d in dirs:
             testPath = os.path.join(d, self.uiFile)
             if os.path.isfile(testPath) and os.access(testPath, os.R_OK):
+                _ui_paths[self.__class__] = testPath
                 return testPath
 
         raise IOError("Could not load UI file '%s' for object '%s'" % (self.uiFile, self))
@@ -489,6 +552,8 @@ class GraphicalUserInterface(UserInterface):
         # Do this at the last possible minute.
         unbusyCursor()
 
+        startup_milestone("first screen shown")
+
         Gtk.main()
 
     ###
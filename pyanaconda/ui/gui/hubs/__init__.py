@@ -22,8 +22,6 @@
 import os
 import gettext
 
-from gi.repository import GLib
-
 from pyanaconda.flags import flags
 from pyanaconda.i18n import _
 from pyanaconda.product import distributionText
@@ -31,8 +29,8 @@ from pyanaconda.product import distributionText
 from pyanaconda.ui import common
 from pyanaconda.ui.gui import GUIObject
 from pyanaconda.ui.gui.categories import collect_categories
-from pyanaconda.ui.gui.spokes import StandaloneSpoke, collect_spokes
-from pyanaconda.ui.gui.utils import gtk_call_once, escape_markup
+from pyanaconda.ui.gui.spokes import StandaloneSpoke, collect_spokes_index
+from pyanaconda.ui.gui.utils import gtk_call_once, escape_markup, watch_queue
 from pyanaconda.constants import ANACONDA_ENVIRON
 
 import logging
@@ -62,6 +60,10 @@ class Hub(GUIObject, common.Hub):
 
     handles_autostep = True
 
+    # Show the selectors of the spokes right away and initialize the spokes
+    # one by one from the main loop once the hub is displayed.
+    defer_spoke_initialization = True
+
     def __init__(self, data, storage, payload, instclass):
         """Create a new Hub instance.
 
@@ -95,9 +97,11 @@ class Hub(GUIObject, common.Hub):
         self._incompleteSpokes = []
         self._inSpoke = False
         self._notReadySpokes = []
+        self._pendingSpokes = []
         self._spokes = {}
 
         self._checker = None
+        self._spokes_watch_id = None
 
     def _runSpoke(self, action):
         from gi.repository import Gtk
@@ -152,8 +156,9 @@ class Hub(GUIObject, common.Hub):
         # spokes belonging to all those categories.
         categories = sorted(filter(lambda c: c.displayOnHub == self.__class__, collect_categories(self.paths["categories"])),
                             key=lambda c: c.sortOrder)
+        spokes = collect_spokes_index(self.paths["spokes"])
         for c in categories:
-            ret[c] = collect_spokes(self.paths["spokes"], c.__name__)
+            ret[c] = spokes.get(c.__name__, [])
 
         return ret
 
@@ -225,22 +230,17 @@ class Hub(GUIObject, common.Hub):
                 # Set all selectors to insensitive before initialize runs.  The call to
                 # _updateCompleteness later will take care of setting it straight.
                 spoke.selector.set_sensitive(False)
-                spoke.initialize()
-
-                if not spoke.ready:
-                    self._notReadySpokes.append(spoke)
-
-                # Set some default values on the associated selector that
-                # affect its display on the hub.
-                self._updateCompleteness(spoke)
                 spoke.selector.connect("button-press-event", self._on_spoke_clicked, spoke)
                 spoke.selector.connect("key-release-event", self._on_spoke_clicked, spoke)
 
-                # If this is a kickstart install, attempt to execute any provided ksdata now.
-                if flags.automatedInstall and spoke.ready and spoke.changed and \
-                   spoke._visitedSinceApplied:
-                    spoke.execute()
-                    spoke._visitedSinceApplied = False
+                if self.defer_spoke_initialization:
+                    # The spoke is not ready until it is initialized, which
+                    # also keeps the continue button insensitive.
+                    spoke.selector.set_property("status", _("Loading..."))
+                    self._pendingSpokes.append(spoke)
+                    self._notReadySpokes.append(spoke)
+                else:
+                    self._initializeSpoke(spoke)
 
                 selectors.append(spoke.selector)
 
@@ -276,6 +276,81 @@ class Hub(GUIObject, common.Hub):
 
         setViewportBackground(viewport)
 
+        if self._pendingSpokes:
+            gtk_call_once(self._initializePendingSpoke)
+
+    def _initializeSpoke(self, spoke):
+        if spoke in self._pendingSpokes:
+            self._pendingSpokes.remove(spoke)
+
+        spoke.initialize()
+
+        if spoke.ready:
+            if spoke in self._notReadySpokes:
+                self._notReadySpokes.remove(spoke)
+        elif spoke not in self._notReadySpokes:
+            self._notReadySpokes.append(spoke)
+
+        # Set some default values on the associated selector that
+        # affect its display on the hub.
+        self._updateCompleteness(spoke)
+
+        # If this is a kickstart install, attempt to execute any provided ksdata now.
+        if flags.automatedInstall and spoke.ready and spoke.changed and \
+           spoke._visitedSinceApplied:
+            spoke.execute()
+            spoke._visitedSinceApplied = False
+
+    def _initializePendingSpoke(self):
+        """Initialize the first pending spoke and schedule the next one so
+           that the main loop can process events (and draw the hub) between
+           the initializations.
+        """
+        if not self._pendingSpokes:
+            return
+
+        spoke = self._pendingSpokes[0]
+        log.debug("initializing spoke %s", spoke.__class__.__name__)
+        self._initializeSpoke(spoke)
+
+        if self._pendingSpokes:
+            gtk_call_once(self._initializePendingSpoke)
+        elif self._autoContinue:
+            # all spokes were ready right after initialization, there may
+            # be no message from them to trigger the continue
+            self._autoContinueIfReady()
+
+    def _autoContinueIfReady(self):
+        """Click the continue button of an automated install if all spokes
+           are ready and there are no messages from them left to process.
+        """
+        from pyanaconda.ui.communication import hubQ
+
+        if not self._autoContinue or self._pendingSpokes or not self.continueButton:
+            return
+
+        if self._inSpoke:
+            self._autoContinue = False
+            return
+
+        if not hubQ.q.empty():
+            # let _update_spokes process the messages first, it clicks the
+            # continue button itself if they make the last spoke ready
+            gtk_call_once(self._autoContinueIfReady)
+            return
+
+        # the spokes may have changed their state since their initialization
+        # without telling the hub
+        for spoke in self._spokes.itervalues():
+            if not spoke.indirect and not spoke.ready and spoke not in self._notReadySpokes:
+                self._notReadySpokes.append(spoke)
+        self._updateContinueButton()
+
+        if self.continuePossible:
+            log.info("_autoContinue clicking continue button")
+            self._autoContinue = False
+            gtk_call_once(self.continueButton.emit, "clicked")
+
     def _updateCompleteness(self, spoke):
         spoke.selector.set_sensitive(spoke.sensitive and spoke.ready)
         spoke.selector.set_property("status", spoke.status)
@@ -336,9 +411,11 @@ class Hub(GUIObject, common.Hub):
                 break
 
             # The first argument to all codes is the name of the spoke we are
-            # acting on.  If no such spoke exists, throw the message away.
+            # acting on.  If no such spoke exists, throw the message away.  The
+            # same applies to spokes not initialized yet, their state is
+            # checked when they are initialized.
             spoke = self._spokes.get(args[0], None)
-            if not spoke:
+            if not spoke or spoke in self._pendingSpokes:
                 q.task_done()
                 continue
 
@@ -388,6 +465,7 @@ class Hub(GUIObject, common.Hub):
         if self._autoContinue and click_continue:
             # enqueue the emit to the Gtk message queue
             log.info("_autoContinue clicking continue button")
+            self._autoContinue = False
             gtk_call_once(self.continueButton.emit, "clicked")
 
         return True
@@ -396,7 +474,11 @@ class Hub(GUIObject, common.Hub):
         GUIObject.refresh(self)
         self._createBox()
 
-        GLib.timeout_add(100, self._update_spokes)
+        # process the messages already queued and then wait for new ones
+        gtk_call_once(self._update_spokes)
+        if self._spokes_watch_id is None:
+            from pyanaconda.ui.communication import hubQ
+            self._spokes_watch_id = watch_queue(hubQ, self._update_spokes)
 
     @property
     def continueButton(self):
@@ -469,14 +551,19 @@ class Hub(GUIObject, common.Hub):
         # autoContinue feature and wait for the user to explicitly state
         # that he is done configuring by pressing the continue button.
         self._autoContinue = False
-        
+
+        # the spoke may be entered (e.g. by autostep or skipTo) before its
+        # deferred initialization
+        if spoke in self._pendingSpokes:
+            self._initializeSpoke(spoke)
+
         self._inSpoke = True
         self._runSpoke(spoke)
         self._inSpoke = False
 
         # Now update the selector with the current status and completeness.
         for sp in self._spokes.itervalues():
-            if not sp.indirect:
+            if not sp.indirect and sp not in self._pendingSpokes:
                 self._updateCompleteness(sp)
 
         # And then if that spoke wants us to jump straight to another one,
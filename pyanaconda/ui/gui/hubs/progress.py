@@ -29,7 +29,7 @@ import sys
 import glob
 
 from pyanaconda.i18n import _
-from pyanaconda.localization import find_best_locale_match
+from pyanaconda.localization import find_best_locale_match, LangcodeIndex
 from pyanaconda.product import productName
 from pyanaconda.flags import flags
 from pyanaconda import iutil
@@ -37,7 +37,7 @@ from pyanaconda.constants import THREAD_INSTALL, THREAD_CONFIGURATION, DEFAULT_L
 from pykickstart.constants import KS_SHUTDOWN, KS_REBOOT
 
 from pyanaconda.ui.gui.hubs import Hub
-from pyanaconda.ui.gui.utils import gtk_action_nowait, gtk_call_once
+from pyanaconda.ui.gui.utils import gtk_action_nowait, watch_queue
 
 __all__ = ["ProgressHub"]
 
@@ -54,6 +54,11 @@ class ProgressHub(Hub):
         self._currentStep = 0
         self._configurationDone = False
 
+        # position reached by fractional progress of the running task and the
+        # step the task started at
+        self._taskPosition = 0
+        self._taskStartStep = None
+
         self._rnotes_id = None
 
     def _do_configuration(self, widget = None, reenable_ransom = True):
@@ -72,7 +77,7 @@ class ProgressHub(Hub):
 
         self._restart_spinner()
 
-        GLib.timeout_add(250, self._update_progress, self._configuration_done)
+        self._watch_progress(self._configuration_done)
         threadMgr.add(AnacondaThread(name=THREAD_CONFIGURATION, target=doConfiguration,
                                      args=(self.storage, self.payload, self.data, self.instclass)))
 
@@ -82,12 +87,23 @@ class ProgressHub(Hub):
         self._cycle_rnotes()
         self._rnotes_id = GLib.timeout_add_seconds(60, self._cycle_rnotes)
 
-    def _update_progress(self, callback = None):
+    def _watch_progress(self, callback):
         from pyanaconda.progress import progressQ
+
+        watch_queue(progressQ, self._update_progress, callback)
+
+    def _update_progress(self, callback = None):
+        from pyanaconda.progress import progressQ, step_count
         import Queue
 
         q = progressQ.q
 
+        # Consecutive steps and messages are only counted and remembered here
+        # and the progress bar and label are updated once for all of them.
+        steps = 0
+        message = None
+        task_progress = None
+
         # Grab all messages may have appeared since last time this method ran.
         while True:
             # Attempt to get a message out of the queue for how we should update
@@ -99,30 +115,41 @@ class ProgressHub(Hub):
 
             if code == progressQ.PROGRESS_CODE_INIT:
                 self._init_progress_bar(args[0])
+                steps = 0
+                task_progress = None
             elif code == progressQ.PROGRESS_CODE_STEP:
-                self._step_progress_bar()
+                steps += step_count(args)
             elif code == progressQ.PROGRESS_CODE_MESSAGE:
-                self._update_progress_message(args[0])
+                message = args[0]
+            elif code in (progressQ.PROGRESS_CODE_BYTES, progressQ.PROGRESS_CODE_ITEMS):
+                task_progress = args
             elif code == progressQ.PROGRESS_CODE_COMPLETE:
                 q.task_done()
 
                 # we are done, stop the progress indication
-                gtk_call_once(self._progressBar.set_fraction, 1.0)
-                gtk_call_once(self._progressLabel.set_text, _("Complete!"))
-                gtk_call_once(self._spinner.stop)
-                gtk_call_once(self._spinner.hide)
+                self._progressBar.set_fraction(1.0)
+                self._progressLabel.set_text(_("Complete!"))
+                self._spinner.stop()
+                self._spinner.hide()
 
                 if callback:
                     callback()
 
                 # There shouldn't be any more progress bar updates, so return False
-                # to indicate this method should be removed from the idle loop.
+                # to indicate this method should be removed from the main loop.
                 return False
             elif code == progressQ.PROGRESS_CODE_QUIT:
                 sys.exit(args[0])
 
             q.task_done()
 
+        if steps:
+            self._step_progress_bar(steps)
+        if task_progress is not None:
+            self._update_task_progress(*task_progress)
+        if message is not None:
+            self._update_progress_message(message)
+
         return True
 
     def _configuration_done(self):
@@ -164,7 +191,7 @@ class ProgressHub(Hub):
         for path in paths:
             all_lang_pixmaps += glob.glob(path + "*/*.png") + glob.glob(path + "*/*.jpg")
 
-        pixmap_langs = [pixmap.split(os.path.sep)[-2] for pixmap in all_lang_pixmaps]
+        pixmap_langs = LangcodeIndex(pixmap.split(os.path.sep)[-2] for pixmap in all_lang_pixmaps)
         best_lang = find_best_locale_match(os.environ["LANG"], pixmap_langs)
 
         if not best_lang:
@@ -251,7 +278,7 @@ class ProgressHub(Hub):
         Hub.refresh(self)
 
         self._start_ransom_notes()
-        GLib.timeout_add(250, self._update_progress, self._install_done)
+        self._watch_progress(self._install_done)
         threadMgr.add(AnacondaThread(name=THREAD_INSTALL, target=doInstall,
                                      args=(self.storage, self.payload, self.data, self.instclass)))
 
@@ -268,21 +295,42 @@ class ProgressHub(Hub):
     def _init_progress_bar(self, steps):
         self._totalSteps = steps
         self._currentStep = 0
+        self._taskPosition = 0
+        self._taskStartStep = None
 
-        gtk_call_once(self._progressBar.set_fraction, 0.0)
+        self._progressBar.set_fraction(0.0)
 
-    def _step_progress_bar(self):
+    def _step_progress_bar(self, steps=1):
         if not self._totalSteps:
             return
 
-        self._currentStep += 1
-        gtk_call_once(self._progressBar.set_fraction, self._currentStep/self._totalSteps)
+        self._currentStep += steps
+        self._update_progress_bar()
+
+    def _update_task_progress(self, done, total, steps):
+        if not self._totalSteps or not total:
+            return
+
+        if self._taskStartStep is None:
+            self._taskStartStep = self._currentStep
+
+        self._taskPosition = self._taskStartStep + steps * min(1.0, done/total)
+        if done >= total:
+            # the next fractional progress belongs to another task
+            self._taskStartStep = None
+
+        self._update_progress_bar()
+
+    def _update_progress_bar(self):
+        # the task's steps may come later than its fractional progress
+        position = max(self._currentStep, self._taskPosition)
+        self._progressBar.set_fraction(min(1.0, position/self._totalSteps))
 
     def _update_progress_message(self, message):
         if not self._totalSteps:
             return
 
-        gtk_call_once(self._progressLabel.set_text, message)
+        self._progressLabel.set_text(message)
 
     @gtk_action_nowait
     def _restart_spinner(self):
@@ -20,14 +20,14 @@
 #                    Martin Sivak <msivak@redhat.com>
 
 from pyanaconda.ui import common
-from pyanaconda.ui.common import collect
+from pyanaconda.ui.common import collect_index
 from pyanaconda.ui.gui import GUIObject
 from pyanaconda.ui.gui.utils import gtk_call_once
 import os.path
 from pyanaconda import ihelp
 
 __all__ = ["StandaloneSpoke", "NormalSpoke", "PersonalizationSpoke",
-           "collect_spokes"]
+           "collect_spokes", "collect_spokes_index"]
 
 class Spoke(GUIObject):
     def __init__(self, data):
@@ -130,8 +130,19 @@ def collect_spokes(mask_paths, category):
        :rtype: list of Spoke classes
 
     """
-    spokes = []
-    for mask, path in mask_paths:
-        spokes.extend(collect(mask, path, lambda obj: hasattr(obj, "category") and obj.category != None and obj.category.__name__ == category))
-        
-    return spokes
+    return collect_spokes_index(mask_paths).get(category, [])
+
+def collect_spokes_index(mask_paths):
+    """Return a dictionary mapping category names to lists of all spoke
+       subclasses that should appear for the categories.
+
+       :param mask_paths: list of mask, path tuples to search for classes
+       :type mask_paths: list of (mask, path)
+
+       :return: dictionary mapping category names to lists of Spoke classes
+       :rtype: dict
+
+    """
+    return collect_index(mask_paths,
+                         lambda obj: getattr(obj, "category", None) != None,
+                         lambda obj: obj.category.__name__)
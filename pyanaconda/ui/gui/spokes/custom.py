@@ -40,7 +40,6 @@ from pyanaconda.i18n import _, N_, P_
 from pyanaconda.product import productName, productVersion
 from pyanaconda.threads import AnacondaThread, threadMgr
 from pyanaconda.constants import THREAD_EXECUTE_STORAGE, THREAD_STORAGE, THREAD_CUSTOM_STORAGE_INIT
-from pyanaconda.bootloader import BootLoaderError
 
 from blivet import devicefactory
 from blivet.formats import device_formats
@@ -2145,6 +2144,8 @@ class CustomPartitioningSpoke(NormalSpoke, StorageChecker):
                 self._removeButton.emit("clicked")
 
     def _do_check(self):
+        from pyanaconda.bootloader import BootLoaderError
+
         self.clear_errors()
         StorageChecker.errors = []
         StorageChecker.warnings = []
@@ -2885,6 +2886,8 @@ class CustomPartitioningSpoke(NormalSpoke, StorageChecker):
 
            Note: There are never any non-existent devices around when this runs.
         """
+        from pyanaconda.bootloader import BootLoaderError
+
         log.debug("running automatic partitioning")
         self.__storage.doAutoPart = True
         self.clear_errors()
@@ -33,15 +33,15 @@ from pyanaconda.ui.gui.utils import enlightbox, gtk_action_nowait, gtk_action_wa
 from pyanaconda.ui.gui.utils import override_cell_property
 
 from pyanaconda.i18n import _, N_
-from pyanaconda.timezone import NTP_SERVICE, get_all_regions_and_timezones, is_valid_timezone
+from pyanaconda.timezone import NTP_SERVICE, get_all_regions_and_timezones, get_region_timezones
+from pyanaconda.timezone import is_valid_timezone
 from pyanaconda.localization import get_xlated_timezone, resolve_date_format
 from pyanaconda import iutil
 from pyanaconda import network
 from pyanaconda import nm
-from pyanaconda import ntp
 from pyanaconda import flags
 from pyanaconda import constants
-from pyanaconda.threads import threadMgr, AnacondaThread
+from pyanaconda.threads import threadMgr, AnacondaThread, ThreadPool
 
 import datetime
 import os
@@ -58,6 +58,13 @@ SERVER_QUERY = 2
 DEFAULT_TZ = "America/New_York"
 
 POOL_SERVERS_NOTE = N_("Note: pool servers may not be available all the time")
+
+def _ntp():
+    # the ntp module is loaded when the servers are used, not when the
+    # spokes are collected
+    from pyanaconda import ntp
+    return ntp
+
 SPLIT_NUMBER_SUFFIX_RE = re.compile(r'([^0-9]*)([-+])([0-9]+)')
 
 def _compare_regions(reg_xlated1, reg_xlated2):
@@ -141,8 +148,8 @@ class NTPconfigDialog(GUIObject):
     def __init__(self, *args):
         GUIObject.__init__(self, *args)
 
-        #used to ensure uniqueness of the threads' names
-        self._threads_counter = 0
+        #checks of the servers run in this pool
+        self._checks_pool = ThreadPool("AnaNTPCheck")
 
         #epoch is increased when serversStore is repopulated
         self._epoch = 0
@@ -202,9 +209,9 @@ class NTPconfigDialog(GUIObject):
                 self._add_server(server)
         else:
             try:
-                for server in ntp.get_servers_from_config():
+                for server in _ntp().get_servers_from_config():
                     self._add_server(server)
-            except ntp.NTPconfigError:
+            except _ntp().NTPconfigError:
                 log.warning("Failed to load NTP servers configuration")
 
     def refresh(self):
@@ -231,7 +238,7 @@ class NTPconfigDialog(GUIObject):
                     new_servers.append(row[0])
 
             if flags.can_touch_runtime_system("save NTP servers configuration"):
-                ntp.save_servers_to_config(new_servers)
+                _ntp().save_servers_to_config(new_servers)
                 iutil.restart_service(NTP_SERVICE)
 
         #Cancel clicked, window destroyed...
@@ -268,7 +275,7 @@ class NTPconfigDialog(GUIObject):
             store.set_value(itr, column, value)
 
         orig_hostname = self._serversStore[itr][0]
-        server_working = ntp.ntp_server_working(self._serversStore[itr][0])
+        server_working = _ntp().ntp_server_working(self._serversStore[itr][0])
 
         #do not let dialog change epoch while we are modifying data
         self._epoch_lock.acquire()
@@ -289,14 +296,10 @@ class NTPconfigDialog(GUIObject):
 
     @gtk_action_nowait
     def _refresh_server_working(self, itr):
-        """ Runs a new thread with _set_server_ok_nok(itr) as a taget. """
+        """ Runs _set_server_ok_nok(itr) in a worker thread. """
 
         self._serversStore.set_value(itr, 1, SERVER_QUERY)
-        new_thread_name = "AnaNTPserver%d" % self._threads_counter
-        threadMgr.add(AnacondaThread(name=new_thread_name,
-                                     target=self._set_server_ok_nok,
-                                     args=(itr, self._epoch)))
-        self._threads_counter += 1
+        self._checks_pool.submit(self._set_server_ok_nok, itr, self._epoch)
 
     def _add_server(self, server):
         """
@@ -898,8 +901,7 @@ class DatetimeSpoke(FirstbootSpokeMixIn, NormalSpoke):
         self._citiesFilter.refilter()
 
         # Set the city to the first one available in this newly selected region.
-        zone = self._regions_zones[region]
-        firstCity = sorted(list(zone))[0]
+        firstCity = get_region_timezones(region)[0]
 
         self._set_combo_selection(self._cityCombo, firstCity)
         self._old_region = region
@@ -1040,7 +1042,7 @@ class DatetimeSpoke(FirstbootSpokeMixIn, NormalSpoke):
                 else:
                     #we need a one-time sync here, because chronyd would not change
                     #the time as drastically as we need
-                    ntp.one_time_sync_async(working_server)
+                    _ntp().one_time_sync_async(working_server)
 
             ret = iutil.start_service(NTP_SERVICE)
             self._set_date_time_setting_sensitive(False)
@@ -21,8 +21,7 @@
 
 from gi.repository import Gtk
 
-from collections import namedtuple
-import itertools
+from collections import namedtuple, OrderedDict
 
 from blivet import arch
 from blivet.devices import DASDDevice, FcoeDiskDevice, iScsiDiskDevice, MultipathDevice, MDRaidArrayDevice, ZFCPDiskDevice
@@ -32,7 +31,7 @@ from blivet.udev import get_device, device_get_wwid
 from pyanaconda.flags import flags
 from pyanaconda.i18n import N_, P_
 
-from pyanaconda.ui.lib.disks import getDisks
+from pyanaconda.ui.lib.disks import DiskIndex, getDisks
 from pyanaconda.ui.gui.utils import enlightbox, escape_markup, timed_action
 from pyanaconda.ui.gui.spokes import NormalSpoke
 from pyanaconda.ui.gui.spokes.advstorage.fcoe import FCoEDialog
@@ -50,6 +49,47 @@ DiskStoreRow = namedtuple("DiskStoreRow", ["visible", "selected", "mutable",
                                            "wwid", "paths", "port", "target",
                                            "lun", "ccw", "wwpn"])
 
+def _long_identifier(disk):
+    # For FCoE devices that have a serial number, we want to display that as
+    # the WWID.  If nothing's found, just default to the link or name below.
+    if isinstance(disk, FcoeDiskDevice):
+        info = get_device(disk.sysfsPath)
+        wwid = device_get_wwid(info)
+        if wwid:
+            return wwid
+
+    # For iSCSI devices, we want the long ip-address:port-iscsi-tgtname-lun-XX
+    # identifier, but blivet doesn't expose that in any useful way and I don't
+    # want to go asking udev.  Instead, we dig around in the deviceLinks and
+    # default to the name if we can't figure anything else out.
+    for link in disk.deviceLinks:
+        if "by-path" in link:
+            lastSlash = link.rindex("/")+1
+            return link[lastSlash:]
+
+    return disk.name
+
+def _by_path_link(disk):
+    for link in disk.deviceLinks:
+        if "by-path" in link:
+            return link
+
+    return None
+
+# The values the pages filter the disks by.  They are collected once for each
+# set of disks in a DiskIndex, so filtering doesn't need to look at the disks.
+DISK_ATTRIBUTES = {"vendor": lambda disk: disk.vendor,
+                   "interconnect": lambda disk: disk.bus,
+                   "wwid": lambda disk: getattr(disk, "wwid", None),
+                   "identifier": _long_identifier,
+                   "path": _by_path_link,
+                   "port": lambda disk: str(disk.node.port) if hasattr(disk, "node") else None,
+                   "lun": lambda disk: disk.node.tpgt if hasattr(disk, "node") else None,
+                   "target": lambda disk: getattr(disk, "initiator", None),
+                   "fcp_lun": lambda disk: getattr(disk, "fcp_lun", None),
+                   "wwpn": lambda disk: getattr(disk, "wwpn", None),
+                   "ccw": lambda disk: getattr(disk, "hba_id", None)}
+
 class FilterPage(object):
     """A FilterPage is the logic behind one of the notebook tabs on the filter
        UI spoke.  Each page has its own specific filtered model overlaid on top
@@ -73,15 +113,19 @@ class FilterPage(object):
            builder      -- A reference to the Gtk.Builder instance containing
                            this page's UI elements.
            filterActive -- Whether the user has chosen to filter results down
-                           on this page.  If set, visible_func should take the
+                           on this page.  If set, filter should take the
                            filter UI elements into account.
+           members      -- A set of names of the disks that belong on this page.
            storage      -- An instance of a blivet object.
+           visible      -- A set of names of the disks displayed on this page.
         """
         self.builder = builder
         self.storage = storage
         self.model = None
 
         self.filterActive = False
+        self.members = set()
+        self.visible = set()
 
     def ismember(self, device):
         """Does device belong on this page?  This function should taken into
@@ -91,39 +135,55 @@ class FilterPage(object):
         """
         return True
 
-    def setup(self, store, selectedNames, disks):
+    def setup(self, disks):
         """Do whatever setup of the UI is necessary before this page can be
            displayed.  This function is called every time the filter spoke
            is revisited, and thus must first do any cleanup that is necessary.
 
-           The setup function is passed a reference to the master store, a list
-           of names of disks the user has selected (either from a previous visit
-           or via kickstart), and a list of all disk objects that belong on this
-           page as determined from the ismember method.
-
-           At the least, this method should add all the disks to the store.  It
-           may also need to populate combos and other lists as appropriate.
+           The setup function is passed a list of all disk objects that belong
+           on this page as determined from the ismember method.  It may need
+           to populate combos and other lists as appropriate.
         """
         pass
 
+    def row(self, disk, selected, index):
+        """Return the row of the master store for a disk belonging on this
+           page or None if this page doesn't put the disk to the store.  The
+           spoke only changes the rows of the store that differ from the rows
+           returned by this method, so it has to return the same values for
+           the same disk.
+        """
+        return None
+
     def clear(self):
         """Blank out any filtering-related fields on this page and return them
            to their defaults.  This is called when the Clear button is clicked.
         """
         pass
 
+    def filter(self, index, names):
+        """Return the names of the disks that should be displayed on this page.
+           This method is given the DiskIndex of all disks and the names of the
+           disks belonging on this page, and should take into account whether
+           filterActive is set, perhaps whether something in pyanaconda.flags
+           is setup, and other settings to make a final decision.  The disks
+           should be looked up by their attributes in the index, not one by
+           one.
+        """
+        return names
+
+    def refilter(self, index):
+        """Update the set of visible disks and refilter the model."""
+        self.visible = self.filter(index, self.members)
+        self.model.refilter()
+
     def visible_func(self, model, itr, *args):
         """This method is called for every row (disk) in the store, in order to
-           determine if it should be displayed on this page or not.  This method
-           should take into account whether filterActive is set, perhaps whether
-           something in pyanaconda.flags is setup, and other settings to make
-           a final decision.  Because filtering can be complicated, many pages
-           will want to farm this decision out to another method.
-
-           The return value is a boolean indicating whether the row is visible
-           or not.
+           determine if it should be displayed on this page or not.  The
+           decision is made by the filter method, so this only looks the name
+           of the disk up in the visible set.
         """
-        return True
+        return model[itr][3] in self.visible
 
     def setupCombo(self, combo, items):
         """Populate a given GtkComboBoxText instance with a list of items.  The
@@ -137,26 +197,6 @@ class FilterPage(object):
         if items:
             combo.set_active(0)
 
-    def _long_identifier(self, disk):
-        # For FCoE devices that have a serial number, we want to display that as
-        # the WWID.  If nothing's found, just default to the link or name below.
-        if isinstance(disk, FcoeDiskDevice):
-            info = get_device(disk.sysfsPath)
-            wwid = device_get_wwid(info)
-            if wwid:
-                return wwid
-
-        # For iSCSI devices, we want the long ip-address:port-iscsi-tgtname-lun-XX
-        # identifier, but blivet doesn't expose that in any useful way and I don't
-        # want to go asking udev.  Instead, we dig around in the deviceLinks and
-        # default to the name if we can't figure anything else out.
-        for link in disk.deviceLinks:
-            if "by-path" in link:
-                lastSlash = link.rindex("/")+1
-                return link[lastSlash:]
-
-        return disk.name
-
     def _on_entry_activated(self, _entry, find_button):
         # User pressed enter on a search related entry box, trigger search by emitting
         # the "clicked" signal from the corresponding find button
@@ -181,7 +221,7 @@ class SearchPage(FilterPage):
         self._wwidEntry.connect("activate", self._on_entry_activated, find_button)
         self._targetEntry.connect("activate", self._on_entry_activated, find_button)
 
-    def setup(self, store, selectedNames, disks):
+    def setup(self, disks):
         self._combo.set_active(0)
         self._combo.emit("changed")
 
@@ -198,49 +238,53 @@ class SearchPage(FilterPage):
         self._targetEntry.set_text("")
         self._wwidEntry.set_text("")
 
-    def _port_equal(self, device):
+    def _port_equal(self, index):
         active = self._portCombo.get_active_text()
-        if active and hasattr(device, "node"):
-            return device.node.port == active
+        if active:
+            # disks without a port are not filtered by it
+            return index.find("port", active) | (index.names - index.having("port"))
         else:
-            return True
+            return index.names
 
-    def _target_equal(self, device):
+    def _target_equal(self, index):
         active = self._targetEntry.get_text().strip()
         if active:
-            return active in getattr(device, "initiator", "")
+            return index.search("target", active)
         else:
-            return True
+            return index.names
 
-    def _lun_equal(self, device):
+    def _lun_equal(self, index):
         active = self._lunEntry.get_text().strip()
-        if active and hasattr(device, "node"):
-            try:
-                return int(active) == device.node.tpgt
-            except ValueError:
-                return True
-        elif active and hasattr(device, "fcp_lun"):
-            return active in device.fcp_lun
-        else:
-            return True
+        if not active:
+            return index.names
+
+        nodeDisks = index.having("lun")
+        fcpDisks = index.having("fcp_lun") - nodeDisks
+        try:
+            nodeMatches = index.find("lun", int(active))
+        except ValueError:
+            nodeMatches = nodeDisks
+
+        return nodeMatches | (index.search("fcp_lun", active) & fcpDisks) | \
+               (index.names - nodeDisks - fcpDisks)
 
-    def _filter_func(self, device):
+    def filter(self, index, names):
         if not self.filterActive:
-            return True
+            return names
 
         filterBy = self._combo.get_active()
 
         if filterBy == 0:
-            return True
+            return names
         elif filterBy == 1:
-            return self._port_equal(device) and self._target_equal(device) and self._lun_equal(device)
+            return names & self._port_equal(index) & self._target_equal(index) & self._lun_equal(index)
         elif filterBy == 2:
-            return self._wwidEntry.get_text() in getattr(device, "wwid", self._long_identifier(device))
+            # disks without a WWID are searched by their long identifier
+            text = self._wwidEntry.get_text()
+            return names & (index.search("wwid", text) |
+                            (index.search("identifier", text) - index.having("wwid")))
 
-    def visible_func(self, model, itr, *args):
-        obj = DiskStoreRow(*model[itr])
-        device = self.storage.devicetree.getDeviceByName(obj.name, hidden=True)
-        return self._filter_func(device)
+        return set()
 
 class MultipathPage(FilterPage):
     def __init__(self, storage, builder):
@@ -260,19 +304,11 @@ class MultipathPage(FilterPage):
     def ismember(self, device):
         return isinstance(device, MultipathDevice)
 
-    def setup(self, store, selectedNames, disks):
+    def setup(self, disks):
         vendors = []
         interconnects = []
 
         for disk in disks:
-            paths = [d.name for d in disk.parents]
-            selected = disk.name in selectedNames
-
-            store.append([True, selected, not disk.protected,
-                          disk.name, "", disk.model, str(disk.size),
-                          disk.vendor, disk.bus, disk.serial,
-                          disk.wwid, "\n".join(paths), "", "",
-                          "", "", ""])
             if not disk.vendor in vendors:
                 vendors.append(disk.vendor)
 
@@ -285,33 +321,38 @@ class MultipathPage(FilterPage):
         self.setupCombo(self._vendorCombo, vendors)
         self.setupCombo(self._icCombo, interconnects)
 
+    def row(self, disk, selected, index):
+        paths = [d.name for d in disk.parents]
+        return [True, selected, not disk.protected,
+                disk.name, "", disk.model, str(disk.size),
+                disk.vendor, disk.bus, disk.serial,
+                disk.wwid, "\n".join(paths), "", "",
+                "", "", ""]
+
     def clear(self):
         self._icCombo.set_active(0)
         self._vendorCombo.set_active(0)
         self._wwidEntry.set_text("")
 
-    def _filter_func(self, device):
+    def filter(self, index, names):
+        if not flags.mpath:
+            return set()
+
         if not self.filterActive:
-            return True
+            return names
 
         filterBy = self._combo.get_active()
 
         if filterBy == 0:
-            return True
+            return names
         elif filterBy == 1:
-            return device.vendor == self._vendorCombo.get_active_text()
+            return names & index.find("vendor", self._vendorCombo.get_active_text())
         elif filterBy == 2:
-            return device.bus == self._icCombo.get_active_text()
+            return names & index.find("interconnect", self._icCombo.get_active_text())
         elif filterBy == 3:
-            return self._wwidEntry.get_text() in device.wwid
-
-    def visible_func(self, model, itr, *args):
-        if not flags.mpath:
-            return False
+            return names & index.search("wwid", self._wwidEntry.get_text())
 
-        obj = DiskStoreRow(*model[itr])
-        device = self.storage.devicetree.getDeviceByName(obj.name, hidden=True)
-        return self.ismember(device) and self._filter_func(device)
+        return set()
 
 class OtherPage(FilterPage):
     def __init__(self, storage, builder):
@@ -331,32 +372,11 @@ class OtherPage(FilterPage):
     def ismember(self, device):
         return isinstance(device, iScsiDiskDevice) or isinstance(device, FcoeDiskDevice)
 
-    def setup(self, store, selectedNames, disks):
+    def setup(self, disks):
         vendors = []
         interconnects = []
 
         for disk in disks:
-            selected = disk.name in selectedNames
-
-            if not disk.vendor in vendors:
-                vendors.append(disk.vendor)
-
-            if not disk.bus in interconnects:
-                interconnects.append(disk.bus)
-
-            if hasattr(disk, "node"):
-                port = str(disk.node.port)
-                lun = str(disk.node.tpgt)
-            else:
-                port = ""
-                lun = ""
-
-            store.append([True, selected, not disk.protected,
-                          disk.name, "", disk.model, str(disk.size),
-                          disk.vendor, disk.bus, disk.serial,
-                          self._long_identifier(disk), "", port, getattr(disk, "initiator", ""),
-                          lun, "", ""])
-
             if not disk.vendor in vendors:
                 vendors.append(disk.vendor)
 
@@ -369,34 +389,41 @@ class OtherPage(FilterPage):
         self.setupCombo(self._vendorCombo, vendors)
         self.setupCombo(self._icCombo, interconnects)
 
+    def row(self, disk, selected, index):
+        if hasattr(disk, "node"):
+            port = str(disk.node.port)
+            lun = str(disk.node.tpgt)
+        else:
+            port = ""
+            lun = ""
+
+        return [True, selected, not disk.protected,
+                disk.name, "", disk.model, str(disk.size),
+                disk.vendor, disk.bus, disk.serial,
+                index.get(disk.name, "identifier"), "", port, getattr(disk, "initiator", ""),
+                lun, "", ""]
+
     def clear(self):
         self._icCombo.set_active(0)
         self._idEntry.set_text("")
         self._vendorCombo.set_active(0)
 
-    def _filter_func(self, device):
+    def filter(self, index, names):
         if not self.filterActive:
-            return True
+            return names
 
         filterBy = self._combo.get_active()
 
         if filterBy == 0:
-            return True
+            return names
         elif filterBy == 1:
-            return device.vendor == self._vendorCombo.get_active_text()
+            return names & index.find("vendor", self._vendorCombo.get_active_text())
         elif filterBy == 2:
-            return device.bus == self._icCombo.get_active_text()
+            return names & index.find("interconnect", self._icCombo.get_active_text())
         elif filterBy == 3:
-            for link in device.deviceLinks:
-                if "by-path" in link:
-                    return self._idEntry.get_text().strip() in link
-
-            return False
+            return names & index.search("path", self._idEntry.get_text().strip())
 
-    def visible_func(self, model, itr, *args):
-        obj = DiskStoreRow(*model[itr])
-        device = self.storage.devicetree.getDeviceByName(obj.name, hidden=True)
-        return self.ismember(device) and self._filter_func(device)
+        return set()
 
 class RaidPage(FilterPage):
     def __init__(self, storage, builder):
@@ -407,13 +434,11 @@ class RaidPage(FilterPage):
     def ismember(self, device):
         return isinstance(device, MDRaidArrayDevice) and device.isDisk
 
-    def visible_func(self, model, itr, *args):
+    def filter(self, index, names):
         if not flags.dmraid:
-            return False
+            return set()
 
-        obj = DiskStoreRow(*model[itr])
-        device = self.storage.devicetree.getDeviceByName(obj.name, hidden=True)
-        return self.ismember(device)
+        return names
 
 class ZPage(FilterPage):
     def __init__(self, storage, builder):
@@ -442,7 +467,7 @@ class ZPage(FilterPage):
     def ismember(self, device):
         return isinstance(device, ZFCPDiskDevice) or isinstance(device, DASDDevice)
 
-    def setup(self, store, selectedNames, disks):
+    def setup(self, disks):
         """ Set up our Z-page, but only if we're running on s390x. """
         if not self._isS390:
             return
@@ -455,9 +480,6 @@ class ZPage(FilterPage):
             self._combo.emit("changed")
 
             for disk in disks:
-                paths = [d.name for d in disk.parents]
-                selected = disk.name in selectedNames
-
                 if getattr(disk, "type") == "zfcp":
                     # remember to store all of the zfcp-related junk so we can
                     # see it in the UI
@@ -468,33 +490,32 @@ class ZPage(FilterPage):
                     if not disk.hba_id in ccws:
                         ccws.append(disk.hba_id)
 
-                    # now add it to our store
-                    store.append([True, selected, not disk.protected,
-                                  disk.name, "", disk.model, str(disk.size),
-                                  disk.vendor, disk.bus, disk.serial, "", "\n".join(paths),
-                                  "", "", disk.fcp_lun, disk.hba_id, disk.wwpn])
+    def row(self, disk, selected, index):
+        if not self._isS390 or getattr(disk, "type") != "zfcp":
+            return None
 
-    def _filter_func(self, device):
+        paths = [d.name for d in disk.parents]
+        return [True, selected, not disk.protected,
+                disk.name, "", disk.model, str(disk.size),
+                disk.vendor, disk.bus, disk.serial, "", "\n".join(paths),
+                "", "", disk.fcp_lun, disk.hba_id, disk.wwpn]
+
+    def filter(self, index, names):
         if not self.filterActive:
-            return True
+            return names
 
         filterBy = self._combo.get_active()
 
         if filterBy == 0:
-            return True
+            return names
         elif filterBy == 1:
-            return self._ccwEntry.get_text() in device.hba_id
+            return names & index.search("ccw", self._ccwEntry.get_text())
         elif filterBy == 2:
-            return self._wwpnEntry.get_text() in device.wwpn
+            return names & index.search("wwpn", self._wwpnEntry.get_text())
         elif filterBy == 3:
-            return self._lunEntry.get_text() in device.fcp_lun
+            return names & index.search("fcp_lun", self._lunEntry.get_text())
 
-        return False
-
-    def visible_func(self, model, itr, *args):
-        obj = DiskStoreRow(*model[itr])
-        device = self.storage.devicetree.getDeviceByName(obj.name, hidden=True)
-        return self.ismember(device) and self._filter_func(device)
+        return set()
 
 class FilterSpoke(NormalSpoke):
     builderObjects = ["diskStore", "filterWindow",
@@ -511,10 +532,12 @@ class FilterSpoke(NormalSpoke):
         NormalSpoke.__init__(self, *args)
         self.applyOnSkip = True
 
-        self.ancestors = []
+        self.ancestors = set()
         self.disks = []
         self.selected_disks = []
 
+        self._index = DiskIndex(DISK_ATTRIBUTES)
+
     @property
     def indirect(self):
         return True
@@ -555,21 +578,16 @@ class FilterSpoke(NormalSpoke):
         self._store = self.builder.get_object("diskStore")
         self._addDisksButton = self.builder.get_object("addDisksButton")
 
-    def _real_ancestors(self, disk):
-        # Return a list of all the ancestors of a disk, but remove the disk
-        # itself from this list.
-        return [d for d in disk.ancestors if d.name != disk.name]
-
     def refresh(self):
         NormalSpoke.refresh(self)
 
         self.disks = getDisks(self.storage.devicetree)
         self.selected_disks = self.data.ignoredisk.onlyuse[:]
 
-        self.ancestors = itertools.chain(*map(self._real_ancestors, self.disks))
-        self.ancestors = map(lambda d: d.name, self.ancestors)
-
-        self._store.clear()
+        # The index (including the ancestors of the disks) is only rebuilt if
+        # the disks changed since the last visit.
+        self._index.update(self.disks)
+        self.ancestors = self._index.allAncestors
 
         allDisks = []
         multipathDisks = []
@@ -577,11 +595,10 @@ class FilterSpoke(NormalSpoke):
         raidDisks = []
         zDisks = []
 
-        # Now all all the non-local disks to the store.  Everything has been set up
-        # ahead of time, so there's no need to configure anything.  We first make
-        # these lists of disks, then call setup on each individual page.  This is
-        # because there could be page-specific setup to do that requires a complete
-        # view of all the disks on that page.
+        # Sort the disks to the pages.  We first make these lists of disks, then
+        # call setup on each individual page.  This is because there could be
+        # page-specific setup to do that requires a complete view of all the
+        # disks on that page.
         for disk in self.disks:
             if self.pages[1].ismember(disk):
                 multipathDisks.append(disk)
@@ -594,14 +611,57 @@ class FilterSpoke(NormalSpoke):
 
             allDisks.append(disk)
 
-        self.pages[0].setup(self._store, self.selected_disks, allDisks)
-        self.pages[1].setup(self._store, self.selected_disks, multipathDisks)
-        self.pages[2].setup(self._store, self.selected_disks, otherDisks)
-        self.pages[3].setup(self._store, self.selected_disks, raidDisks)
-        self.pages[4].setup(self._store, self.selected_disks, zDisks)
+        pageDisks = [allDisks, multipathDisks, otherDisks, raidDisks, zDisks]
+
+        # Now get the rows of all the non-local disks, the pages know what
+        # should be in them.
+        rows = []
+        for (page, disks) in zip(self.pages, pageDisks):
+            page.setup(disks)
+            page.members = set(disk.name for disk in disks)
+
+            for disk in disks:
+                row = page.row(disk, disk.name in self.selected_disks, self._index)
+                if row is not None:
+                    rows.append(row)
+
+        self._update_store(rows)
+
+        for page in self.pages:
+            page.refilter(self._index)
 
         self._update_summary()
 
+    def _update_store(self, rows):
+        """Make the rows of the disk store match the given rows.
+
+           Only the rows that were added, removed or changed are touched, so
+           revisiting the spoke with hundreds of disks doesn't make the views
+           rebuild all of them.
+
+           :param rows: rows of the disks in the order they should be added
+           :type rows: list of lists as described by DiskStoreRow
+        """
+        newRows = OrderedDict((row[3], row) for row in rows)
+        removed = []
+
+        itr = self._store.get_iter_first()
+        while itr:
+            row = newRows.pop(self._store[itr][3], None)
+            if row is None:
+                removed.append(itr)
+            elif list(self._store[itr]) != row:
+                self._store[itr] = row
+
+            itr = self._store.iter_next(itr)
+
+        # iters of a list store persist, so they can be removed at once
+        for itr in removed:
+            self._store.remove(itr)
+
+        for row in newRows.values():
+            self._store.append(row)
+
     def _update_summary(self):
         summaryButton = self.builder.get_object("summary_button")
         label = summaryButton.get_children()[0]
@@ -641,14 +701,14 @@ class FilterSpoke(NormalSpoke):
     def on_find_clicked(self, button):
         n = self._notebook.get_current_page()
         self.pages[n].filterActive = True
-        self.pages[n].model.refilter()
+        self.pages[n].refilter(self._index)
 
     def on_clear_icon_clicked(self, entry, icon_pos, event):
         if icon_pos == Gtk.EntryIconPosition.SECONDARY:
             entry.set_text("")
 
     def on_page_switched(self, notebook, newPage, newPageNum, *args):
-        self.pages[newPageNum].model.refilter()
+        self.pages[newPageNum].refilter(self._index)
         notebook.get_nth_page(newPageNum).show_all()
 
     def on_row_toggled(self, button, path):
@@ -26,7 +26,6 @@ from pyanaconda.ui.gui import GUIObject
 from pyanaconda.ui.gui.spokes import NormalSpoke
 from pyanaconda.ui.gui.categories.localization import LocalizationCategory
 from pyanaconda.ui.gui.utils import enlightbox, gtk_call_once, escape_markup, override_cell_property, timed_action
-from pyanaconda import keyboard
 from pyanaconda import flags
 from pyanaconda.i18n import _, N_
 
@@ -38,6 +37,12 @@ __all__ = ["KeyboardSpoke"]
 # %s will be replaced by key combination like Alt+Shift
 LAYOUT_SWITCHING_INFO = N_("%s to switch layouts.")
 
+def _keyboard():
+    # the keyboard module (and Xkl with it) is loaded when the spoke is
+    # created, not when the spokes are collected
+    from pyanaconda import keyboard
+    return keyboard
+
 def _show_layout(column, renderer, model, itr, wrapper):
     return wrapper.get_layout_variant_description(model[itr][0])
 
@@ -55,7 +60,7 @@ class AddLayoutDialog(GUIObject):
 
     def __init__(self, *args):
         GUIObject.__init__(self, *args)
-        self._xkl_wrapper = keyboard.XklWrapper.get_instance()
+        self._xkl_wrapper = _keyboard().XklWrapper.get_instance()
         self._chosen_layouts = []
 
     def matches_entry(self, model, itr, user_data=None):
@@ -176,7 +181,7 @@ class ConfigureSwitchingDialog(GUIObject):
 
     def __init__(self, *args):
         GUIObject.__init__(self, *args)
-        self._xkl_wrapper = keyboard.XklWrapper.get_instance()
+        self._xkl_wrapper = _keyboard().XklWrapper.get_instance()
 
         self._switchingOptsStore = self.builder.get_object("switchingOptsStore")
 
@@ -265,7 +270,7 @@ class KeyboardSpoke(NormalSpoke):
     def __init__(self, *args):
         NormalSpoke.__init__(self, *args)
         self._remove_last_attempt = False
-        self._xkl_wrapper = keyboard.XklWrapper.get_instance()
+        self._xkl_wrapper = _keyboard().XklWrapper.get_instance()
 
         self._upButton = self.builder.get_object("upButton")
         self._downButton = self.builder.get_object("downButton")
@@ -491,7 +496,7 @@ class KeyboardSpoke(NormalSpoke):
         if not layout_row:
             return
 
-        layout, variant = keyboard.parse_layout_variant(layout_row[0])
+        layout, variant = _keyboard().parse_layout_variant(layout_row[0])
 
         if variant:
             lay_var_spec = "%s\t%s" % (layout, variant)
@@ -554,6 +559,7 @@ class KeyboardSpoke(NormalSpoke):
         self._refresh_switching_info()
 
     def _add_data_layouts(self):
+
         if not self.data.keyboard.x_layouts:
             # nothing specified, just add the default 'us'
             self._addLayout(self._store, "us")
@@ -564,7 +570,7 @@ class KeyboardSpoke(NormalSpoke):
             try:
                 self._addLayout(self._store, layout)
                 valid_layouts += layout
-            except keyboard.XklWrapperError:
+            except _keyboard().XklWrapperError:
                 log.error("Failed to add layout '%s'", layout)
 
         if not valid_layouts:
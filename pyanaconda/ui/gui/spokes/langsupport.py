@@ -23,11 +23,14 @@
 from gi.repository import Pango, Gdk
 from pyanaconda.flags import flags
 from pyanaconda.i18n import N_
-from pyanaconda.ui.gui.utils import escape_markup
+from pyanaconda.ui.gui.utils import escape_markup, gtk_action_wait
 from pyanaconda.ui.gui.spokes import NormalSpoke
 from pyanaconda.ui.gui.spokes.lib.lang_locale_handler import LangLocaleHandler
 from pyanaconda.ui.gui.categories.localization import LocalizationCategory
 from pyanaconda.ui.gui.utils import override_cell_property
+from pyanaconda.ui.communication import hubQ
+from pyanaconda.threads import threadMgr, AnacondaThread
+from pyanaconda.constants import THREAD_LANGSUPPORT_INIT
 from pyanaconda import localization
 
 import re
@@ -96,6 +99,25 @@ class LangsupportSpoke(LangLocaleHandler, NormalSpoke):
         override_cell_property(highlightedColumn, highlightedRenderer,
                 "icon-name", self._render_lang_highlighted)
 
+    def _load_languages(self):
+        # getting the names of all the languages takes a while, don't block
+        # the main loop with it
+        threadMgr.add(AnacondaThread(name=THREAD_LANGSUPPORT_INIT,
+                                     target=self._initialize))
+
+    def _initialize(self):
+        self._fill_languages_in_main_loop(self._get_languages())
+
+        hubQ.send_ready(self.__class__.__name__, False)
+
+    @gtk_action_wait
+    def _fill_languages_in_main_loop(self, languages):
+        self._fill_languages(languages)
+
+    @property
+    def ready(self):
+        return not threadMgr.get(THREAD_LANGSUPPORT_INIT)
+
     def apply(self):
         # store only additional langsupport locales
         self.data.lang.addsupport = sorted(self._selected_locales - set([self.data.lang.lang]))
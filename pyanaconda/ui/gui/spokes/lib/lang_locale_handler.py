@@ -56,15 +56,34 @@ class LangLocaleHandler(object):
         override_cell_property(self._langSelectedColumn, self._langSelectedRenderer,
                                "pixbuf", self._render_lang_selected)
 
-        # fill the list with available translations
-        for lang in localization.get_available_translations():
-            self._add_language(self._languageStore,
-                               localization.get_native_name(lang),
-                               localization.get_english_name(lang), lang)
-
         # make filtering work
         self._languageStoreFilter.set_visible_func(self._matches_entry, None)
 
+        self._load_languages()
+
+    def _load_languages(self):
+        """Fill the list with available translations.  Can be overridden to
+           get the languages (see _get_languages) in a separate thread.
+        """
+
+        self._fill_languages(self._get_languages())
+
+    def _get_languages(self):
+        """Get the available translations with their names.  Doesn't touch
+           any widgets so it can be run in a separate thread.
+
+           :return: list of (native name, English name, language) tuples
+           :rtype: list
+        """
+
+        return [(localization.get_native_name(lang),
+                 localization.get_english_name(lang), lang)
+                for lang in localization.get_available_translations()]
+
+    def _fill_languages(self, languages):
+        for (native, english, lang) in languages:
+            self._add_language(self._languageStore, native, english, lang)
+
     def _matches_entry(self, model, itr, *args):
         # Nothing in the text entry?  Display everything.
         entry = self._languageEntry.get_text().strip()
@@ -22,7 +22,7 @@
 
 from pyanaconda.flags import flags
 from pyanaconda.i18n import _, N_
-from pyanaconda.users import cryptPassword, validatePassword, checkPassword
+from pyanaconda.users import cryptPassword, precryptPassword, forgetPrecryptedPassword, validatePassword, checkPassword
 from pwquality import PWQError
 
 from pyanaconda.ui.gui.spokes import NormalSpoke
@@ -146,8 +146,14 @@ class PasswordSpoke(FirstbootSpokeMixIn, NormalSpoke):
             val = 0
             text = _("Empty")
             self._error = _("The password is empty.")
+            forgetPrecryptedPassword(self)
         elif self.confirm.get_text() and self.pw.get_text() != self.confirm.get_text():
             self._error = _("The passwords do not match.")
+            forgetPrecryptedPassword(self)
+        elif self.pw.get_text() == self.confirm.get_text() and editable:
+            # encrypt the confirmed password before apply needs it, only when
+            # it was typed (refresh shows the password applied already)
+            precryptPassword(self.pw.get_text(), key=self)
 
         self.pw_bar.set_value(val)
         self.pw_label.set_text(text)
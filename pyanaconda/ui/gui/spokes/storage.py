@@ -67,7 +67,6 @@ from pyanaconda.product import productName
 from pyanaconda.flags import flags
 from pyanaconda.i18n import _, N_, P_
 from pyanaconda import constants, iutil
-from pyanaconda.bootloader import BootLoaderError
 
 from pykickstart.constants import CLEARPART_TYPE_NONE, AUTOPART_TYPE_LVM
 from pykickstart.errors import KickstartValueError
@@ -313,6 +312,9 @@ class StorageSpoke(NormalSpoke, StorageChecker):
         self._last_clicked_overview = None
         self._cur_clicked_overview = None
 
+        # disk name -> (disk, overview) of the disks shown in the boxes
+        self._overviews = {}
+
         self._grabObjects()
 
     def _grabObjects(self):
@@ -356,6 +358,8 @@ class StorageSpoke(NormalSpoke, StorageChecker):
                                      target=self._doExecute))
 
     def _doExecute(self):
+        from pyanaconda.bootloader import BootLoaderError
+
         self._ready = False
         hubQ.send_not_ready(self.__class__.__name__)
         # on the off-chance dasdfmt is running, we can't proceed further
@@ -509,10 +513,10 @@ class StorageSpoke(NormalSpoke, StorageChecker):
         self.disks = getDisks(self.storage.devicetree)
 
         # synchronize our local data store with the global ksdata
-        disk_names = [d.name for d in self.disks]
+        disks_by_name = dict((d.name, d) for d in self.disks)
         # don't put disks with hidden formats in selected_disks
         self.selected_disks = [d for d in self.data.ignoredisk.onlyuse
-                                    if d in disk_names]
+                                    if d in disks_by_name]
         self.autopart = self.data.autopart.autopart
         self.autoPartType = self.data.autopart.type
         if self.autoPartType is None:
@@ -522,27 +526,25 @@ class StorageSpoke(NormalSpoke, StorageChecker):
 
         self._previous_autopart = self.autopart
 
-        # First, remove all non-button children.
-        for child in self.localOverviews + self.advancedOverviews:
-            child.destroy()
-
-        # Then deal with local disks, which are really easy.  They need to be
+        # First deal with local disks, which are really easy.  They need to be
         # handled here instead of refresh to take into account the user pressing
         # the rescan button on custom partitioning.
+        localDisks = []
         for disk in filter(isLocalDisk, self.disks):
             # While technically local disks, zFCP devices are specialized
             # storage and should not be shown here.
             if disk.type is not "zfcp":
-                self._add_disk_overview(disk, self.local_disks_box)
+                localDisks.append(disk)
 
         # Advanced disks are different.  Because there can potentially be a lot
         # of them, we do not display them in the box by default.  Instead, only
         # those selected in the filter UI are displayed.  This means refresh
         # needs to know to create and destroy overviews as appropriate.
+        advancedDisks = []
         for name in self.data.ignoredisk.onlyuse:
-            if name not in disk_names:
+            if name not in disks_by_name:
                 continue
-            obj = self.storage.devicetree.getDeviceByName(name, hidden=True)
+            obj = disks_by_name[name]
             # since zfcp devices may be detected as local disks when added
             # manually, specifically check the disk type here to make sure
             # we won't accidentally bypass adding zfcp devices to the disk
@@ -550,7 +552,9 @@ class StorageSpoke(NormalSpoke, StorageChecker):
             if isLocalDisk(obj) and obj.type is not "zfcp":
                 continue
 
-            self._add_disk_overview(obj, self.specialized_disks_box)
+            advancedDisks.append(obj)
+
+        self._update_disk_overviews(localDisks, advancedDisks)
 
         # update the selections in the ui
         for overview in self.localOverviews + self.advancedOverviews:
@@ -588,7 +592,43 @@ class StorageSpoke(NormalSpoke, StorageChecker):
         threadMgr.add(AnacondaThread(name=constants.THREAD_STORAGE_WATCHER,
                       target=self._initialize))
 
-    def _add_disk_overview(self, disk, box):
+    def _update_disk_overviews(self, localDisks, advancedDisks):
+        """Show overviews of the given disks in the boxes.
+
+           Overviews of the disks that are already shown are only updated and
+           moved to their places, new ones are created only for the disks that
+           are not shown yet (or were replaced by new objects, e.g. after a
+           rescan) and the overviews of the disks not to be shown are destroyed.
+        """
+        free_space = self.storage.getFreeSpace(disks=localDisks + advancedDisks)
+
+        shown = set()
+        for (disks, box) in ((localDisks, self.local_disks_box),
+                             (advancedDisks, self.specialized_disks_box)):
+            # the overviews go after the other children (buttons) of the box
+            offset = len([child for child in box.get_children()
+                          if not isinstance(child, AnacondaWidgets.DiskOverview)])
+
+            for (position, disk) in enumerate(disks, offset):
+                free = free_space[disk.name][0]
+                (shownDisk, overview) = self._overviews.get(disk.name, (None, None))
+
+                if shownDisk is disk and overview.get_parent() is box:
+                    overview.set_property("capacity", str(disk.size))
+                    overview.set_property("free", _("%s free") % free)
+                else:
+                    if overview:
+                        overview.destroy()
+                    overview = self._add_disk_overview(disk, box, free)
+                    self._overviews[disk.name] = (disk, overview)
+
+                box.reorder_child(overview, position)
+                shown.add(disk.name)
+
+        for name in set(self._overviews.keys()) - shown:
+            self._overviews.pop(name)[1].destroy()
+
+    def _add_disk_overview(self, disk, box, free):
         if disk.removable:
             kind = "drive-removable-media"
         else:
@@ -612,8 +652,6 @@ class StorageSpoke(NormalSpoke, StorageChecker):
         else:
             description = disk.description
 
-        free = self.storage.getFreeSpace(disks=[disk])[disk.name][0]
-
         overview = AnacondaWidgets.DiskOverview(description,
                                                 kind,
                                                 str(disk.size),
@@ -632,6 +670,8 @@ class StorageSpoke(NormalSpoke, StorageChecker):
         overview.connect("focus-in-event", self._on_disk_focus_in)
         overview.show_all()
 
+        return overview
+
     def _initialize(self):
         hubQ.send_message(self.__class__.__name__, _("Probing storage..."))
 
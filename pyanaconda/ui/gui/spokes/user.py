@@ -23,7 +23,7 @@
 import os
 from pyanaconda.flags import flags
 from pyanaconda.i18n import _, N_
-from pyanaconda.users import cryptPassword, validatePassword, guess_username, USERNAME_VALID
+from pyanaconda.users import cryptPassword, precryptPassword, forgetPrecryptedPassword, validatePassword, guess_username, USERNAME_VALID
 from pwquality import PWQError
 
 from pyanaconda.ui.gui.spokes import NormalSpoke
@@ -272,6 +272,7 @@ class UserSpoke(FirstbootSpokeMixIn, NormalSpoke):
 
         # reset the password when the user unselects it
         else:
+            forgetPrecryptedPassword(self)
             self.pw.set_placeholder_text("")
             self.confirm.set_placeholder_text("")
             self._user.password = ""
@@ -387,8 +388,14 @@ class UserSpoke(FirstbootSpokeMixIn, NormalSpoke):
             val = 0
             text = _("Empty")
             self._error = _("The password is empty.")
+            forgetPrecryptedPassword(self)
         elif self.confirm.get_text() and self.pw.get_text() != self.confirm.get_text():
             self._error = _("The passwords do not match.")
+            forgetPrecryptedPassword(self)
+        elif self.pw.get_text() == self.confirm.get_text() and editable:
+            # encrypt the confirmed password before apply needs it, only when
+            # it was typed (refresh shows the password applied already)
+            precryptPassword(self.pw.get_text(), key=self)
 
         self.pw_bar.set_value(val)
         self.pw_label.set_text(text)
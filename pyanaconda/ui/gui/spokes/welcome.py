@@ -31,9 +31,7 @@ from pyanaconda.ui.gui.spokes.lib.lang_locale_handler import LangLocaleHandler
 
 from pyanaconda import localization
 from pyanaconda.product import distributionText, isFinal, productName, productVersion
-from pyanaconda import keyboard
 from pyanaconda import flags
-from pyanaconda import geoloc
 from pyanaconda.i18n import _
 from pyanaconda.iutil import is_unsupported_hw, ipmi_report
 from pyanaconda.constants import DEFAULT_LANG, IPMI_ABORTED
@@ -43,6 +41,16 @@ log = logging.getLogger("anaconda")
 
 __all__ = ["WelcomeLanguageSpoke"]
 
+def _keyboard():
+    # the keyboard and geoloc modules are loaded when the spoke is created,
+    # not when the spokes are collected
+    from pyanaconda import keyboard
+    return keyboard
+
+def _geoloc():
+    from pyanaconda import geoloc
+    return geoloc
+
 class WelcomeLanguageSpoke(LangLocaleHandler, StandaloneSpoke):
     mainWidgetName = "welcomeWindow"
     uiFile = "spokes/welcome.glade"
@@ -56,7 +64,7 @@ class WelcomeLanguageSpoke(LangLocaleHandler, StandaloneSpoke):
     def __init__(self, *args, **kwargs):
         StandaloneSpoke.__init__(self, *args, **kwargs)
         LangLocaleHandler.__init__(self)
-        self._xklwrapper = keyboard.XklWrapper.get_instance()
+        self._xklwrapper = _keyboard().XklWrapper.get_instance()
         self._origStrings = {}
 
     def apply(self):
@@ -71,7 +79,7 @@ class WelcomeLanguageSpoke(LangLocaleHandler, StandaloneSpoke):
         if flags.flags.automatedInstall:
             return
 
-        geoloc_timezone = geoloc.get_timezone()
+        geoloc_timezone = _geoloc().get_timezone()
         loc_timezones = localization.get_locale_timezones(self.data.lang.lang)
         if geoloc_timezone:
             # (the geolocation module makes sure that the returned timezone is
@@ -113,7 +121,7 @@ class WelcomeLanguageSpoke(LangLocaleHandler, StandaloneSpoke):
         if layouts:
             # take the first locale (with highest rank) from the list and
             # store it normalized
-            new_layouts = [keyboard.normalize_layout_variant(layouts[0])]
+            new_layouts = [_keyboard().normalize_layout_variant(layouts[0])]
             if not langtable.supports_ascii(layouts[0]):
                 # does not support typing ASCII chars, append the 'us' layout
                 new_layouts.append("us")
@@ -169,7 +177,7 @@ class WelcomeLanguageSpoke(LangLocaleHandler, StandaloneSpoke):
 
         # We can use the territory from geolocation here
         # to preselect the translation, when it's available.
-        territory = geoloc.get_territory_code()
+        territory = _geoloc().get_territory_code()
 
         locales = localization.get_territory_locales(territory)
         if locales and not (self.data.lang.lang and self.data.lang.seen):
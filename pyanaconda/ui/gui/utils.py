@@ -93,6 +93,20 @@ def gtk_action_nowait(func):
     return _call_method
 
 
+def watch_queue(queue, callback, *args):
+    """Call the callback in the main loop whenever messages arrive to the
+       queue (a QueueFactory object) instead of polling it.  The callback is
+       expected to get all the messages out of the queue and return True to
+       keep watching the queue or False to stop.
+    """
+
+    def _on_wakeup(fd, condition):
+        queue.clear_wakeup()
+        return callback(*args)
+
+    return GLib.io_add_watch(queue.wakeup_fd, GLib.IOCondition.IN, _on_wakeup)
+
+
 def timed_action(delay=300, threshold=750, busy_cursor=True):
     """
     Function returning decorator for decorating often repeated actions that need
@@ -24,7 +24,7 @@ from blivet.devices import MultipathDevice, iScsiDiskDevice, FcoeDiskDevice
 
 from pyanaconda.flags import flags
 
-__all__ = ["FakeDiskLabel", "FakeDisk", "getDisks", "isLocalDisk"]
+__all__ = ["FakeDiskLabel", "FakeDisk", "DiskIndex", "getDisks", "isLocalDisk"]
 
 class FakeDiskLabel(object):
     def __init__(self, free=0):
@@ -79,6 +79,105 @@ def getDisks(devicetree, fake=False):
     # Remove duplicate names from the list.
     return sorted(list(set(disks)), key=lambda d: d.name)
 
+class DiskIndex(object):
+    """An index of a list of disks for the UIs showing lots of them.
+
+       The index maps the disk names to the disks, to the names of their
+       ancestors and to the values of the given attributes, and the values
+       back to the names of the disks.  It is only rebuilt when the list of
+       disks changes, so the UI can look up disks and filter them by the
+       attribute values without walking the devicetree again.
+    """
+    def __init__(self, attributes=None):
+        """Create a new DiskIndex instance.
+
+           :param attributes: functions returning the indexed values of a disk,
+                              the value is None if the disk doesn't have it
+           :type attributes: dict of attribute name -> function(disk)
+        """
+        self._attributes = attributes or {}
+        self.revision = None
+
+        self.disks = {}
+        self.ancestors = {}
+        self.allAncestors = set()
+
+        # attribute -> disk name -> value
+        self._values = {}
+
+        # attribute -> value -> set of disk names
+        self._names = {}
+
+    @staticmethod
+    def diskRevision(disks):
+        """Return a value identifying the given list of disks.  It changes
+           whenever a disk is added, removed or replaced by a new object (e.g.
+           after the devicetree is populated again).
+        """
+        return tuple((d.name, getattr(d, "id", id(d))) for d in disks)
+
+    def update(self, disks):
+        """Rebuild the index if the list of disks changed.
+
+           :param disks: the disks to index
+           :type disks: list of blivet devices
+           :return: whether the index was rebuilt
+           :rtype: bool
+        """
+        revision = self.diskRevision(disks)
+        if revision == self.revision:
+            return False
+
+        self.revision = revision
+        self.disks = dict((d.name, d) for d in disks)
+
+        # ancestors of the disks, excluding the disks themselves
+        self.ancestors = {}
+        for disk in disks:
+            self.ancestors[disk.name] = set(d.name for d in disk.ancestors
+                                            if d.name != disk.name)
+        self.allAncestors = set().union(*self.ancestors.values())
+
+        self._values = {}
+        self._names = {}
+        for (attr, func) in self._attributes.items():
+            values = self._values[attr] = {}
+            names = self._names[attr] = {}
+            for disk in disks:
+                value = func(disk)
+                values[disk.name] = value
+                if value is not None:
+                    names.setdefault(value, set()).add(disk.name)
+
+        return True
+
+    @property
+    def names(self):
+        """Names of all the indexed disks."""
+        return set(self.disks.keys())
+
+    def get(self, name, attr):
+        """Return the value of the attribute of the disk with the given name."""
+        return self._values[attr].get(name)
+
+    def find(self, attr, value):
+        """Return names of the disks with the attribute equal to value."""
+        return set(self._names[attr].get(value, set()))
+
+    def search(self, attr, text):
+        """Return names of the disks with the attribute containing text."""
+        names = set()
+        for (value, value_names) in self._names[attr].items():
+            if text in value:
+                names.update(value_names)
+
+        return names
+
+    def having(self, attr):
+        """Return names of the disks that have a value of the attribute."""
+        return set(name for (name, value) in self._values[attr].items()
+                   if value is not None)
+
 def isLocalDisk(disk):
     return (not isinstance(disk, MultipathDevice)
             and not isinstance(disk, iScsiDiskDevice)
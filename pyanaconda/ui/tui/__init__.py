@@ -25,6 +25,7 @@ from pyanaconda.ui import common
 from pyanaconda.ui.communication import hubQ
 from pyanaconda.flags import flags
 from pyanaconda.threads import threadMgr
+from pyanaconda.startup_utils import startup_milestone
 from pyanaconda.ui.tui import simpleline as tui
 from pyanaconda.ui.tui.hubs.summary import SummaryHub
 from pyanaconda.ui.tui.hubs.progress import ProgressHub
@@ -137,7 +138,8 @@ class TextUserInterface(ui.UserInterface):
            This method must be provided by all subclasses.
         """
         self._app = tui.App(self.productTitle, yes_or_no_question = YesNoDialog,
-                            quit_message = self.quitMessage, queue = hubQ.q)
+                            quit_message = self.quitMessage, queue = hubQ.q,
+                            differential = flags.cmdline.getbool("tuidiff", False))
 
         # tell python-meh it should use our raw_input
         self._meh_interface.set_io_handler(meh.ui.text.IOHandler(in_func=self._app.raw_input))
@@ -175,6 +177,7 @@ class TextUserInterface(ui.UserInterface):
            through to something else's run method, but is provided here in
            case more is needed.  This method must be provided by all subclasses.
         """
+        startup_milestone("first screen shown")
         return self._app.run()
 
     ###
@@ -20,7 +20,7 @@
 #
 from .. import simpleline as tui
 from pyanaconda.ui.tui.tuiobject import TUIObject
-from pyanaconda.ui.tui.spokes import collect_spokes
+from pyanaconda.ui.tui.spokes import collect_spokes_index
 from pyanaconda.ui import common
 
 from pyanaconda.i18n import _, N_
@@ -51,8 +51,9 @@ class TUIHub(TUIObject, common.Hub):
 
     def setup(self, environment="anaconda"):
         # look for spokes having category present in self.categories
+        spokes_index = collect_spokes_index(self.paths["spokes"])
         for c in self.categories:
-            spokes = collect_spokes(self.paths["spokes"], c)
+            spokes = spokes_index.get(c, [])
 
             # sort them according to their priority
             for s in sorted(spokes, key = lambda s: s.priority):
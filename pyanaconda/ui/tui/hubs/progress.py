@@ -42,7 +42,7 @@ class ProgressHub(TUIHub):
     def _update_progress(self):
         """Handle progress updates from install thread."""
 
-        from pyanaconda.progress import progressQ
+        from pyanaconda.progress import progressQ, step_count
         import Queue
 
         q = progressQ.q
@@ -69,7 +69,7 @@ class ProgressHub(TUIHub):
             elif code == progressQ.PROGRESS_CODE_STEP:
                 # Instead of updating a progress bar, we just print a pip
                 # but print it without a new line.
-                sys.stdout.write('.')
+                sys.stdout.write('.' * step_count(args))
                 sys.stdout.flush()
                 # Use _stepped as an indication to if we need a newline before
                 # the next message
@@ -81,6 +81,9 @@ class ProgressHub(TUIHub):
                     self._stepped = False
                     print('')
                 print(args[0])
+            elif code in (progressQ.PROGRESS_CODE_BYTES, progressQ.PROGRESS_CODE_ITEMS):
+                # Text mode only prints pips for steps
+                pass
             elif code == progressQ.PROGRESS_CODE_COMPLETE:
                 # There shouldn't be any more progress updates, so return
                 q.task_done()
@@ -65,8 +65,11 @@ class App(object):
     STOP_MAINLOOP = False
     NOP = None
 
+    # redraw the whole screen if more than this part of its lines changed
+    DIFF_MAX_CHANGED = 0.5
+
     def __init__(self, title, yes_or_no_question = None, width = 80, queue = None,
-                 quit_message = None):
+                 quit_message = None, differential = False):
         """
         :param title: application title for whenever we need to display app name
         :type title: unicode
@@ -76,12 +79,22 @@ class App(object):
 
         :param width: screen width for rendering purposes
         :type width: int
+
+        :param differential: when the same screen is redrawn, print only the
+                             lines that changed since it was printed last time
+                             (useful for slow consoles)
+        :type differential: bool
         """
 
         self._header = title
         self._redraw = True
         self._spacer = "\n".join(2*[width*"="])
+        self._diff_spacer = width*"-"
         self._width = width
+        self._differential = differential
+
+        # the last screen printed and its lines
+        self._last_frame = (None, [])
         self.quit_question = yes_or_no_question
         self.quit_message = quit_message or N_(u"Do you really want to quit?")
 
@@ -280,7 +293,10 @@ class App(object):
             # get the widget tree from the screen and show it in the screen
             try:
                 input_needed = screen.refresh(args)
-                screen.window.show_all()
+                if self._differential:
+                    self._show_changes(screen.window)
+                else:
+                    screen.window.show_all()
                 self._redraw = False
             except ExitMainLoop:
                 raise
@@ -295,6 +311,34 @@ class App(object):
 
         return input_needed
 
+    def _show_changes(self, window):
+        """Show the window or only the lines that changed since it was shown
+           last time if it was the last window shown, it has the same number
+           of lines and not too many of them changed.
+
+           :param window: the window to show
+           :type window: UIScreen instance
+        """
+
+        rendered = window.render_window()
+        lines = [line for (block, _paginate) in rendered for line in block]
+
+        (last_window, last_lines) = self._last_frame
+        self._last_frame = (window, lines)
+
+        # lines added or removed shift the rest of the screen, show it whole
+        if last_window is window and len(lines) == len(last_lines):
+            changed = [line for (line, last_line) in zip(lines, last_lines)
+                       if line != last_line]
+            if len(changed) <= len(lines) * self.DIFF_MAX_CHANGED:
+                if changed:
+                    print self._diff_spacer
+                    print u"\n".join(changed)
+                return
+
+        print self._spacer
+        window.show_rendered(rendered)
+
     def run(self):
         """This methods starts the application. Do not use self.mainloop() directly
         as run() handles all the required exceptions needed to keep nested mainloops
@@ -322,8 +366,9 @@ class App(object):
             self.process_events()
 
             # if redraw is needed, separate the content on the screen from the
-            # stuff we are about to display now
-            if self._redraw:
+            # stuff we are about to display now (unless only the changes
+            # are printed, then the separation is done when printing them)
+            if self._redraw and not self._differential:
                 print self._spacer
 
             try:
@@ -447,6 +492,8 @@ class App(object):
 
         # global refresh command
         if self._screens and (key == _('r')):
+            # show the whole screen again, not just the changes
+            self._last_frame = (None, [])
             self._do_redraw()
             return True
 
@@ -539,8 +586,17 @@ class UIScreen(object):
 
         """
 
+        self._print_long_lines(widget.get_lines())
+
+    def _print_long_lines(self, lines):
+        """Prints possibly long list of lines with user interaction (when needed).
+
+           :param lines: lines to print
+           :type lines: list(unicode)
+
+        """
+
         pos = 0
-        lines = widget.get_lines()
         num_lines = len(lines)
 
         if num_lines < self._screen_height - 2:
@@ -564,20 +620,43 @@ class UIScreen(object):
                 self._app.raw_input(_("Press ENTER to continue"))
                 pos += self._screen_height - 1
 
-    def show_all(self):
-        """Prepares all elements of self._window for output and then prints
-        them on the screen."""
+    def render_window(self):
+        """Prepares all elements of self._window for output.
 
+           :return: list of (lines, paginate) tuples, one for each element,
+                    paginate is True for widgets that may need to be printed
+                    in steps
+           :rtype: list of (list(unicode), bool)
+        """
+
+        rendered = []
         for w in self._window:
             if hasattr(w, "render"):
                 w.render(self.app.width)
             if isinstance(w, Widget):
-                self._print_long_widget(w)
+                rendered.append((w.get_lines(), True))
             elif type(w) == str:
-                print w.decode("utf-8")
+                rendered.append(([w.decode("utf-8")], False))
             else:
-                # not a widget, just print its unicode representation
-                print unicode(w)
+                # not a widget, just use its unicode representation
+                rendered.append(([unicode(w)], False))
+
+        return rendered
+
+    def show_rendered(self, rendered):
+        """Prints the output of render_window on the screen."""
+
+        for (lines, paginate) in rendered:
+            if paginate:
+                self._print_long_lines(lines)
+            else:
+                print lines[0]
+
+    def show_all(self):
+        """Prepares all elements of self._window for output and then prints
+        them on the screen."""
+
+        self.show_rendered(self.render_window())
     show = show_all
 
     def hide(self):
@@ -634,7 +713,7 @@ class Widget(object):
 
         self._buffer = []
         if default:
-            self._buffer = [[c for c in l] for l in default.split("\n")]
+            self._buffer = [unicode(l) for l in default.split("\n")]
         self._max_width = max_width
         self._cursor = (0, 0) # row, col
 
@@ -647,7 +726,7 @@ class Widget(object):
     def width(self):
         """The current width of the internal buffer
            (id of the first empty column)."""
-        return reduce(lambda acc,l: max(acc, len(l)), self._buffer, 0)
+        return max([len(l) for l in self._buffer] or [0])
 
     def clear(self):
         """Clears this widgets buffer and resets cursor."""
@@ -656,7 +735,7 @@ class Widget(object):
 
     @property
     def content(self):
-        """This has to return list (rows) of lists (columns) with one character elements."""
+        """This has to return list of rows (unicode strings)."""
         return self._buffer
 
     def render(self, width = None):
@@ -677,7 +756,7 @@ class Widget(object):
            :rtype: list(unicode)
            """
 
-        return [unicode(u"".join(line)) for line in self._buffer]
+        return list(self._buffer)
 
     def setxy(self, row, col):
         """Sets cursor position.
@@ -698,6 +777,23 @@ class Widget(object):
         """Sets the cursor to first column in new line at the end."""
         self._cursor = (self.height, 0)
 
+    def _put(self, row, col, text):
+        """Put text to the buffer at row, col position replacing the
+           characters there and filling the gaps with spaces.
+        """
+
+        # if the line is not in buffer, create it
+        if row >= len(self._buffer):
+            self._buffer.extend((row - len(self._buffer) + 1) * [u""])
+
+        line = self._buffer[row]
+
+        # if the line's length is not enough, fill it with spaces
+        if len(line) < col:
+            line += (col - len(line)) * u" "
+
+        self._buffer[row] = line[:col] + text + line[col + len(text):]
+
     def draw(self, w, row = None, col = None, block = False):
         """This method copies w widget's content to this widget's buffer at row, col position.
 
@@ -724,16 +820,11 @@ class Widget(object):
 
         # fill up rows to accomodate for w.height
         if self.height < row + w.height:
-            for _i in range(row + w.height - self.height):
-                self._buffer.append(list())
+            self._buffer.extend((row + w.height - self.height) * [u""])
 
-        # append columns to accomodate for w.width
-        for l in range(row, row + w.height):
-            l_len = len(self._buffer[l])
-            w_len = len(w.content[l - row])
-            if l_len < col + w_len:
-                self._buffer[l] += ((col + w_len - l_len) * list(u" "))
-            self._buffer[l][col:col + w_len] = w.content[l - row][:]
+        # copy the rows, appending columns to accomodate for w.width
+        for l, line in enumerate(w.content, row):
+            self._put(l, col, line)
 
         # move the cursor to new spot
         if block:
@@ -781,38 +872,36 @@ class Widget(object):
         x = row
         y = col
 
-        # emulate typing machine
-        for c in text:
+        # emulate typing machine, but "type" whole pieces of lines at once
+        for (i, line) in enumerate(text.split("\n")):
             # process newline
-            if c == "\n":
+            if i > 0:
                 x += 1
                 if block:
                     y = col
                 else:
                     y = 0
-                continue
-
-            # if the line is not in buffer, create it
-            if x >= len(self._buffer):
-                for _i in range(x - len(self._buffer) + 1):
-                    self._buffer.append(list())
-
-            # if the line's length is not enough, fill it with spaces
-            if y >= len(self._buffer[x]):
-                self._buffer[x] += ((y - len(self._buffer[x]) + 1) * list(u" "))
-
 
-            # "type" character
-            self._buffer[x][y] = c
-
-            # shift to the next char
-            y += 1
-            if not width is None and y >= col + width:
-                x += 1
-                if block:
-                    y = col
+            pos = 0
+            while pos < len(line):
+                # the number of characters that fit before wrapping (at
+                # least one character is typed even if there is no space)
+                if width is None:
+                    count = len(line) - pos
                 else:
-                    y = 0
+                    count = min(max(col + width - y, 1), len(line) - pos)
+
+                self._put(x, y, line[pos:pos + count])
+                pos += count
+
+                # shift to the next char
+                y += count
+                if not width is None and y >= col + width:
+                    x += 1
+                    if block:
+                        y = col
+                    else:
+                        y = 0
 
         self._cursor = (x, y)
 
@@ -20,8 +20,8 @@
 #
 from pyanaconda.ui.tui import simpleline as tui
 from pyanaconda.ui.tui.tuiobject import TUIObject, YesNoDialog
-from pyanaconda.ui.common import Spoke, StandaloneSpoke, NormalSpoke, PersonalizationSpoke, collect
-from pyanaconda.users import validatePassword, checkPassword, cryptPassword
+from pyanaconda.ui.common import Spoke, StandaloneSpoke, NormalSpoke, PersonalizationSpoke, collect, collect_index
+from pyanaconda.users import validatePassword, checkPassword, cryptPassword, precryptPassword, forgetPrecryptedPassword
 from pwquality import PWQError
 import re
 from collections import namedtuple
@@ -29,7 +29,7 @@ from pyanaconda.iutil import setdeepattr, getdeepattr
 from pyanaconda.i18n import N_, _
 
 __all__ = ["TUISpoke", "EditTUISpoke", "EditTUIDialog", "EditTUISpokeEntry", "StandaloneSpoke", "NormalSpoke", "PersonalizationSpoke",
-           "collect_spokes", "collect_categories"]
+           "collect_spokes", "collect_spokes_index", "collect_categories"]
 
 # Inherit abstract methods from Spoke
 # pylint: disable=W0223
@@ -122,6 +122,9 @@ class EditTUIDialog(NormalTUISpoke):
                 if error:
                     print(error)
                     return None
+                # encrypt the password while its strength is checked and
+                # a weak one is confirmed
+                precryptPassword(pw, key=self)
                 strength = checkPassword(pw)
                 if strength < 50:
                     error = _("The password you have provided is weak")
@@ -133,6 +136,7 @@ class EditTUIDialog(NormalTUISpoke):
                 question_window = YesNoDialog(self._app, error)
                 self._app.switch_screen_modal(question_window)
                 if not question_window.answer:
+                    forgetPrecryptedPassword(self)
                     return None
 
             self.value = cryptPassword(pw)
@@ -288,11 +292,15 @@ def collect_spokes(mask_paths, category):
     """Return a list of all spoke subclasses that should appear for a given
        category.
     """
-    spokes = []
-    for mask, path in mask_paths:
-        spokes.extend(collect(mask, path, lambda obj: hasattr(obj, "category") and obj.category != None and obj.category == category))
-        
-    return spokes
+    return collect_spokes_index(mask_paths).get(category, [])
+
+def collect_spokes_index(mask_paths):
+    """Return a dictionary mapping categories to lists of all spoke subclasses
+       that should appear for the categories.
+    """
+    return collect_index(mask_paths,
+                         lambda obj: getattr(obj, "category", None) != None,
+                         lambda obj: obj.category)
         
 def collect_categories(mask_paths):
     classes = []
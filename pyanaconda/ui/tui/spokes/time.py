@@ -33,13 +33,12 @@ class TimeZoneSpoke(FirstbootSpokeMixIn, NormalTUISpoke):
         NormalTUISpoke.__init__(self, app, data, storage, payload, instclass)
 
     def initialize(self):
-        # it's stupid to call get_all_regions_and_timezones twice, but regions
-        # needs to be unsorted in order to display in the same order as the GUI
-        # so whatever
+        # regions need to be unsorted in order to display in the same order
+        # as the GUI
         self._regions = timezone.get_all_regions_and_timezones().keys()
-        self._timezones = dict((k, sorted(v)) for k,v in timezone.get_all_regions_and_timezones
-().iteritems())
-        self._lower_regions = [r.lower() for r in self._timezones]
+        self._timezones = dict((region, timezone.get_region_timezones(region))
+                               for region in self._regions)
+        self._lower_regions = [r.lower() for r in self._regions]
 
         self._zones = ["%s/%s" % (region, z) for region in self._timezones for z in self._timezones[region]]
         self._lower_zones = [z.lower().replace("_", " ") for region in self._timezones for z in self._timezones[region]] # for lowercase lookup
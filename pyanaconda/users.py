@@ -26,12 +26,15 @@ import random
 import tempfile
 import os
 import os.path
+import threading
 from pyanaconda import iutil
+from pyanaconda import threads
 import pwquality
 import re
 from pyanaconda.iutil import strip_accents
 from pyanaconda.i18n import _
 from pyanaconda.errors import errorHandler, PasswordCryptError, ERROR_RAISE
+from pyanaconda.constants import THREAD_PASSWORD_CRYPT
 
 import logging
 log = logging.getLogger("anaconda")
@@ -99,13 +102,10 @@ def getPassAlgo(authconfigStr):
 #     $1$    MD5
 #     $5$    SHA256
 #     $6$    SHA512
-def cryptPassword(password, algo=None):
+def _crypt(password, algo):
     salts = {'md5': '$1$', 'sha256': '$5$', 'sha512': '$6$'}
     saltlen = 2
 
-    if algo is None:
-        algo = 'sha512'
-
     if algo == 'md5' or algo == 'sha256' or algo == 'sha512':
         saltlen = 16
 
@@ -115,7 +115,74 @@ def cryptPassword(password, algo=None):
         saltstr = saltstr + random.choice (string.letters +
                                            string.digits + './')
 
-    cryptpw = crypt.crypt (password, saltstr)
+    return crypt.crypt (password, saltstr)
+
+# Passwords being encrypted in advance by precryptPassword, keyed by what the
+# passwords are for, values are (password, algo, future of the result).
+_cryptCache = {}
+_cryptCacheLock = threading.Lock()
+_cryptPool = threads.ThreadPool(THREAD_PASSWORD_CRYPT, max_workers=1, fatal=False)
+
+def precryptPassword(password, algo=None, key=None):
+    """Start encrypting the password in a background thread.
+
+       The next cryptPassword call with the same password and algorithm
+       returns the result instead of encrypting the password again.  Every
+       result is returned only once, so no two hashes share a salt.
+
+       Only the last password given for a key is kept, so the passwords
+       typed before the final one don't stay in memory.  The ones that
+       will not be used at all have to be dropped with
+       forgetPrecryptedPassword.
+
+       :param password: the password to encrypt
+       :param algo: the algorithm, see cryptPassword
+       :param key: what the password is for, e.g. the spoke asking for it,
+                   or None to keep it apart from all the other passwords
+    """
+    if algo is None:
+        algo = 'sha512'
+
+    if key is None:
+        key = (password, algo)
+
+    with _cryptCacheLock:
+        entry = _cryptCache.get(key)
+        if entry is None or entry[:2] != (password, algo):
+            _cryptCache[key] = (password, algo, _cryptPool.submit(_crypt, password, algo))
+
+def forgetPrecryptedPassword(key):
+    """Drop the password precrypted for the key if it hasn't been used.
+
+       :param key: the key given to precryptPassword
+    """
+    with _cryptCacheLock:
+        _cryptCache.pop(key, None)
+
+def cryptPassword(password, algo=None):
+    """Encrypt the password with a random salt, or return the result of
+       encrypting it started by precryptPassword.
+
+       :param password: the password to encrypt
+       :param algo: 'md5', 'sha256' or 'sha512' (the default)
+       :returns: the encrypted password
+    """
+    if algo is None:
+        algo = 'sha512'
+
+    future = None
+    with _cryptCacheLock:
+        for (key, (cachedpw, cachedalgo, cachedfuture)) in _cryptCache.items():
+            if cachedpw == password and cachedalgo == algo:
+                del _cryptCache[key]
+                future = cachedfuture
+                break
+
+    if future:
+        cryptpw = future.result()
+    else:
+        cryptpw = _crypt(password, algo)
+
     if cryptpw is None:
         exn = PasswordCryptError(algo=algo)
         if errorHandler.cb(exn) == ERROR_RAISE:
@@ -181,10 +248,242 @@ def guess_username(fullname):
     username = strip_accents(username).encode("utf-8")
     return username
 
+def _createGroup(admin, group_name, **kwargs):
+    """Create a new group using the given libuser admin.  See
+       Users.createGroup for the kwargs.
+
+       :returns: False if the group already exists, True otherwise
+       :raises RuntimeError: if libuser fails
+    """
+    if admin.lookupGroupByName(group_name):
+        log.error("Group %s already exists, not creating.", group_name)
+        return False
+
+    groupEnt = admin.initGroup(group_name)
+
+    if kwargs.get("gid", -1) >= 0:
+        groupEnt.set(libuser.GIDNUMBER, kwargs["gid"])
+
+    admin.addGroup(groupEnt)
+    return True
+
+def _createUser(admin, user_name, **kwargs):
+    """Create a new user using the given libuser admin.  See
+       Users.createUser for the kwargs.
+
+       :returns: False if the user already exists, True otherwise
+       :raises RuntimeError: if libuser fails
+    """
+    if admin.lookupUserByName(user_name):
+        log.error("User %s already exists, not creating.", user_name)
+        return False
+
+    userEnt = admin.initUser(user_name)
+    groupEnt = admin.initGroup(user_name)
+
+    if kwargs.get("gid", -1) >= 0:
+        groupEnt.set(libuser.GIDNUMBER, kwargs["gid"])
+
+    grpLst = filter(lambda grp: grp,
+                    map(admin.lookupGroupByName, kwargs.get("groups", [])))
+    userEnt.set(libuser.GIDNUMBER, [groupEnt.get(libuser.GIDNUMBER)[0]] +
+                map(lambda grp: grp.get(libuser.GIDNUMBER)[0], grpLst))
+
+    homedir = kwargs.get("homedir", None)
+    if not homedir:
+        homedir = "/home/" + user_name
+    # libuser expects the parent directory tree to exist.
+    parent_dir = iutil.parent_dir(homedir)
+    if parent_dir:
+        iutil.mkdirChain(parent_dir)
+    userEnt.set(libuser.HOMEDIRECTORY, homedir)
+
+    if kwargs.get("shell", False):
+        userEnt.set(libuser.LOGINSHELL, kwargs["shell"])
+
+    if kwargs.get("uid", -1) >= 0:
+        userEnt.set(libuser.UIDNUMBER, kwargs["uid"])
+
+    if kwargs.get("gecos", False):
+        userEnt.set(libuser.GECOS, kwargs["gecos"])
+
+    # need to create home directory for the user or does it already exist?
+    # userEnt.get returns lists (usually with a single item)
+    mk_homedir = not os.path.exists(userEnt.get(libuser.HOMEDIRECTORY)[0])
+
+    admin.addUser(userEnt, mkmailspool=kwargs.get("mkmailspool", True),
+                  mkhomedir=mk_homedir)
+    admin.addGroup(groupEnt)
+
+    if not mk_homedir:
+        stats = os.stat(userEnt.get(libuser.HOMEDIRECTORY)[0])
+        orig_uid = stats.st_uid
+        orig_gid = stats.st_gid
+
+        log.info("Home directory for the user %s already existed, "
+                 "fixing the owner.", user_name)
+        # home directory already existed, change owner of it properly
+        iutil.chown_dir_tree(userEnt.get(libuser.HOMEDIRECTORY)[0],
+                             userEnt.get(libuser.UIDNUMBER)[0],
+                             groupEnt.get(libuser.GIDNUMBER)[0],
+                             orig_uid, orig_gid)
+
+    pw = kwargs.get("password", False)
+    if pw:
+        if kwargs.get("isCrypted", False):
+            password = kwargs["password"]
+        else:
+            password = cryptPassword(kwargs["password"], algo=kwargs.get("algo", None))
+        admin.setpassUser(userEnt, password, True)
+    elif pw == "":
+        # Setup the account with *NO* password
+        admin.unlockUser(userEnt)
+        log.info("user account %s setup with no password", user_name)
+
+    if kwargs.get("lock", False):
+        admin.lockUser(userEnt)
+        log.info("user account %s locked", user_name)
+
+
+    # Add the user to all the groups they should be part of.
+    grpLst.append(admin.lookupGroupByName(user_name))
+    for grp in grpLst:
+        grp.add(libuser.MEMBERNAME, user_name)
+        admin.modifyGroup(grp)
+
+    return True
+
+def _setUserPassword(admin, username, password, isCrypted, lock, algo=None):
+    user = admin.lookupUserByName(username)
+
+    if isCrypted:
+        admin.setpassUser(user, password, True)
+    else:
+        admin.setpassUser(user, cryptPassword(password, algo=algo), True)
+
+    if lock:
+        admin.lockUser(user)
+
+    admin.modifyUser(user)
+    return True
+
+def _chroot(root):
+    """Chroot a child process to root for using libuser there."""
+    if not root in ["","/"]:
+        os.chroot(root)
+        os.chdir("/")
+        del(os.environ["LIBUSER_CONF"])
+
+class UsersBatch(object):
+    """Changes of users, groups and passwords applied at once.
+
+       The changes are collected by the same methods Users has and applied
+       by commit in a single child process chrooted to the root, using a
+       single libuser admin, so the passwd, group and shadow files are not
+       loaded again for every change.  Passwords are encrypted when the
+       changes are collected, not in the child process.
+    """
+    def __init__(self, root):
+        self.root = root
+        self._changes = []
+
+    def createGroup(self, group_name, **kwargs):
+        """Create a new group when the batch is committed.  See
+           Users.createGroup for the kwargs, root is ignored.
+        """
+        self._changes.append((_createGroup, (group_name,), self._kwargs(kwargs)))
+
+    def createUser(self, user_name, *args, **kwargs):
+        """Create a new user when the batch is committed.  See
+           Users.createUser for the kwargs, root is ignored.
+        """
+        kwargs = self._kwargs(kwargs)
+        if kwargs.get("password") and not kwargs.get("isCrypted", False):
+            kwargs["password"] = cryptPassword(kwargs["password"], algo=kwargs.get("algo", None))
+            kwargs["isCrypted"] = True
+
+        self._changes.append((_createUser, (user_name,), kwargs))
+
+    def setUserPassword(self, username, password, isCrypted, lock, algo=None):
+        if not isCrypted:
+            password = cryptPassword(password, algo=algo)
+
+        self._changes.append((_setUserPassword, (username, password, True, lock), {}))
+
+    def setRootPassword(self, password, isCrypted=False, isLocked=False, algo=None):
+        return self.setUserPassword("root", password, isCrypted, isLocked, algo)
+
+    def _kwargs(self, kwargs):
+        # the kwargs are often __dict__ of kickstart data objects
+        kwargs = dict(kwargs)
+        kwargs.pop("root", None)
+        return kwargs
+
+    def commit(self):
+        """Apply all the changes and clear the batch.
+
+           :returns: results of the changes in the order they were made, False
+                     for the ones that failed and the ones that were not
+                     applied because of a failure of the child process
+           :rtype: list of bool
+        """
+        changes = self._changes
+        self._changes = []
+        if not changes:
+            return []
+
+        (readFd, writeFd) = os.pipe()
+        childpid = os.fork()
+
+        if not childpid:
+            try:
+                os.close(readFd)
+                _chroot(self.root)
+                admin = libuser.admin()
+
+                for (func, args, kwargs) in changes:
+                    try:
+                        result = func(admin, *args, **kwargs)
+                    except RuntimeError as e:
+                        log.critical("Error when changing users and groups: %s", str(e))
+                        result = False
+
+                    os.write(writeFd, "1" if result else "0")
+            except (OSError, RuntimeError) as e:
+                log.critical("Error when changing users and groups: %s", str(e))
+            finally:
+                os._exit(0)
+
+        os.close(writeFd)
+        with os.fdopen(readFd) as f:
+            results = [r == "1" for r in f.read()]
+
+        try:
+            os.waitpid(childpid, 0)
+        except OSError as e:
+            log.critical("exception from waitpid while changing users and groups: %s %s", e.errno, e.strerror)
+
+        # the changes the child didn't get to failed
+        results.extend([False] * (len(changes) - len(results)))
+        log.info("Applied %d changes of users and groups, %d failed",
+                 len(changes), results.count(False))
+        return results
+
 class Users:
     def __init__ (self):
         self.admin = libuser.admin()
 
+    def batch(self, root=None):
+        """Return a new UsersBatch for applying changes in the given root.
+
+           :param root: the directory of the system to change, defaults to
+                        the sysroot
+        """
+        if root is None:
+            root = iutil.getSysroot()
+
+        return UsersBatch(root)
+
     def createGroup (self, group_name, **kwargs):
         """Create a new user on the system with the given name.  Optional kwargs:
 
@@ -199,23 +498,13 @@ class Users:
         root = kwargs.get("root", iutil.getSysroot())
 
         if not childpid:
-            if not root in ["","/"]:
-                os.chroot(root)
-                os.chdir("/")
-                del(os.environ["LIBUSER_CONF"])
-
+            _chroot(root)
             self.admin = libuser.admin()
 
             try:
-                if self.admin.lookupGroupByName(group_name):
+                if not _createGroup(self.admin, group_name, **kwargs):
                     os._exit(1)
 
-                groupEnt = self.admin.initGroup(group_name)
-
-                if kwargs.get("gid", -1) >= 0:
-                    groupEnt.set(libuser.GIDNUMBER, kwargs["gid"])
-
-                self.admin.addGroup(groupEnt)
                 os._exit(0)
             except RuntimeError as e:
                 log.critical("Error when creating new group: %s", str(e))
@@ -265,90 +554,13 @@ class Users:
         root = kwargs.get("root", iutil.getSysroot())
 
         if not childpid:
-            if not root in ["","/"]:
-                os.chroot(root)
-                os.chdir("/")
-                del(os.environ["LIBUSER_CONF"])
-
+            _chroot(root)
             self.admin = libuser.admin()
 
             try:
-                if self.admin.lookupUserByName(user_name):
+                if not _createUser(self.admin, user_name, **kwargs):
                     os._exit(1)
 
-                userEnt = self.admin.initUser(user_name)
-                groupEnt = self.admin.initGroup(user_name)
-
-                if kwargs.get("gid", -1) >= 0:
-                    groupEnt.set(libuser.GIDNUMBER, kwargs["gid"])
-
-                grpLst = filter(lambda grp: grp,
-                                map(self.admin.lookupGroupByName, kwargs.get("groups", [])))
-                userEnt.set(libuser.GIDNUMBER, [groupEnt.get(libuser.GIDNUMBER)[0]] +
-                            map(lambda grp: grp.get(libuser.GIDNUMBER)[0], grpLst))
-
-                homedir = kwargs.get("homedir", None)
-                if not homedir:
-                    homedir = "/home/" + user_name
-                # libuser expects the parent directory tree to exist.
-                parent_dir = iutil.parent_dir(homedir)
-                if parent_dir:
-                    iutil.mkdirChain(parent_dir)
-                userEnt.set(libuser.HOMEDIRECTORY, homedir)
-
-                if kwargs.get("shell", False):
-                    userEnt.set(libuser.LOGINSHELL, kwargs["shell"])
-
-                if kwargs.get("uid", -1) >= 0:
-                    userEnt.set(libuser.UIDNUMBER, kwargs["uid"])
-
-                if kwargs.get("gecos", False):
-                    userEnt.set(libuser.GECOS, kwargs["gecos"])
-
-                # need to create home directory for the user or does it already exist?
-                # userEnt.get returns lists (usually with a single item)
-                mk_homedir = not os.path.exists(userEnt.get(libuser.HOMEDIRECTORY)[0])
-
-                self.admin.addUser(userEnt, mkmailspool=kwargs.get("mkmailspool", True),
-                                   mkhomedir=mk_homedir)
-                self.admin.addGroup(groupEnt)
-
-                if not mk_homedir:
-                    stats = os.stat(userEnt.get(libuser.HOMEDIRECTORY)[0])
-                    orig_uid = stats.st_uid
-                    orig_gid = stats.st_gid
-
-                    log.info("Home directory for the user %s already existed, "
-                             "fixing the owner.", user_name)
-                    # home directory already existed, change owner of it properly
-                    iutil.chown_dir_tree(userEnt.get(libuser.HOMEDIRECTORY)[0],
-                                         userEnt.get(libuser.UIDNUMBER)[0],
-                                         groupEnt.get(libuser.GIDNUMBER)[0],
-                                         orig_uid, orig_gid)
-
-                pw = kwargs.get("password", False)
-                if pw:
-                    if kwargs.get("isCrypted", False):
-                        password = kwargs["password"]
-                    else:
-                        password = cryptPassword(kwargs["password"], algo=kwargs.get("algo", None))
-                    self.admin.setpassUser(userEnt, password, True)
-                elif pw == "":
-                    # Setup the account with *NO* password
-                    self.admin.unlockUser(userEnt)
-                    log.info("user account %s setup with no password", user_name)
-
-                if kwargs.get("lock", False):
-                    self.admin.lockUser(userEnt)
-                    log.info("user account %s locked", user_name)
-
-
-                # Add the user to all the groups they should be part of.
-                grpLst.append(self.admin.lookupGroupByName(user_name))
-                for grp in grpLst:
-                    grp.add(libuser.MEMBERNAME, user_name)
-                    self.admin.modifyGroup(grp)
-
                 os._exit(0)
             except RuntimeError as e:
                 log.critical("Error when creating new user: %s", str(e))
@@ -369,11 +581,7 @@ class Users:
         childpid = os.fork()
 
         if not childpid:
-            if not root in ["","/"]:
-                os.chroot(root)
-                os.chdir("/")
-                del(os.environ["LIBUSER_CONF"])
-
+            _chroot(root)
             self.admin = libuser.admin()
 
             try:
@@ -395,17 +603,7 @@ class Users:
             return False
 
     def setUserPassword(self, username, password, isCrypted, lock, algo=None):
-        user = self.admin.lookupUserByName(username)
-
-        if isCrypted:
-            self.admin.setpassUser(user, password, True)
-        else:
-            self.admin.setpassUser(user, cryptPassword(password, algo=algo), True)
-
-        if lock:
-            self.admin.lockUser(user)
-
-        self.admin.modifyUser(user)
+        _setUserPassword(self.admin, username, password, isCrypted, lock, algo)
 
     def setRootPassword(self, password, isCrypted=False, isLocked=False, algo=None):
         return self.setUserPassword("root", password, isCrypted, isLocked, algo)
@@ -0,0 +1,130 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda import anaconda_log
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+class AsyncLoggingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.tmp_dir, "test.log")
+
+        self.writer = anaconda_log.AsyncLogWriter(max_records=10, batch_size=3)
+        self.file_handler = anaconda_log.BatchFileHandler(self.log_file)
+        self.file_handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        self.handler = anaconda_log.AsyncLogHandler(self.writer, self.file_handler)
+
+        self.logger = logging.getLogger("anaconda_log_test")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.file_handler.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def _read_log(self):
+        with open(self.log_file) as f:
+            return f.read().splitlines()
+
+    def logging_test(self):
+        """Records should be written out by the writer thread."""
+
+        self.logger.info("message %d from %s", 1, "test")
+        try:
+            raise ValueError("test error")
+        except ValueError:
+            self.logger.exception("an exception")
+
+        self.handler.flush()
+        lines = self._read_log()
+        self.assertEqual(lines[0], "INFO message 1 from test")
+        self.assertEqual(lines[1], "ERROR an exception")
+        self.assertEqual(lines[-1], "ValueError: test error")
+
+    def threads_test(self):
+        """Records from many threads should all be written out."""
+
+        def log_messages(num):
+            for i in range(100):
+                self.logger.info("thread %d message %d", num, i)
+
+        threads = [threading.Thread(target=log_messages, args=(num,)) for num in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.handler.flush()
+        lines = self._read_log()
+        self.assertEqual(len(lines), 500)
+        for num in range(5):
+            thread_lines = [l for l in lines if l.startswith("INFO thread %d " % num)]
+            self.assertEqual(thread_lines, ["INFO thread %d message %d" % (num, i) for i in range(100)])
+
+    def back_pressure_test(self):
+        """Only debug records should be dropped when the queue is full."""
+
+        for i in range(1000):
+            self.logger.debug("debug %d", i)
+            self.logger.info("info %d", i)
+
+        self.handler.flush()
+        lines = self._read_log()
+        info_lines = [l for l in lines if l.startswith("INFO info")]
+        self.assertEqual(info_lines, ["INFO info %d" % i for i in range(1000)])
+
+    def record_test(self):
+        """The records passed to the other handlers should not be changed."""
+
+        records = []
+        class RecordingHandler(logging.Handler):
+            def emit(self, record):
+                records.append((record.msg, record.args, record.exc_info))
+
+        sent = []
+        orig_emit = anaconda_log.SysLogHandler.emit
+        anaconda_log.SysLogHandler.emit = lambda handler, record: sent.append(record.getMessage())
+        syslog_handler = anaconda_log.AnacondaSyslogHandler(tag="test")
+        recording_handler = RecordingHandler()
+
+        self.logger.addHandler(syslog_handler)
+        self.logger.addHandler(recording_handler)
+        try:
+            try:
+                raise ValueError("test error")
+            except ValueError as e:
+                exc = e
+                self.logger.exception("message %d", 1)
+        finally:
+            anaconda_log.SysLogHandler.emit = orig_emit
+            self.logger.removeHandler(syslog_handler)
+            self.logger.removeHandler(recording_handler)
+            syslog_handler.close()
+
+        self.handler.flush()
+        self.assertEqual(sent, ["test: message 1"])
+        self.assertEqual(records[0][:2], ("message %d", (1,)))
+        self.assertIs(records[0][2][1], exc)
+        self.assertEqual(self._read_log()[0], "ERROR message 1")
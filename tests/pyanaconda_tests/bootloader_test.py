@@ -0,0 +1,235 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda import bootloader
+from StringIO import StringIO
+import unittest
+
+VERSION = "3.17.4-301.fc21.x86_64"
+BOOT_UUID = "2d6a1ef3-7c4f-4c3a-9f2a-5b0c1d3e4f50"
+ROOT_UUID = "8e5c4b36-1a2d-4f6e-b7c8-9d0e1f2a3b4c"
+
+class Format(object):
+    def __init__(self, fmt_type=None, uuid=None, mountpoint=None, label_type=None):
+        self.type = fmt_type
+        self.uuid = uuid
+        self.mountpoint = mountpoint
+        self.labelType = label_type
+
+class PartedPartition(object):
+    def __init__(self, number):
+        self.number = number
+
+class Disk(object):
+    isDisk = True
+    type = "disk"
+
+    def __init__(self, name, label_type="msdos"):
+        self.name = name
+        self.format = Format("disklabel", label_type=label_type)
+
+    @property
+    def disks(self):
+        return [self]
+
+class Partition(object):
+    isDisk = False
+    type = "partition"
+
+    def __init__(self, disk, number, fmt):
+        self.name = "%s%d" % (disk.name, number)
+        self.disk = disk
+        self.format = fmt
+        self.partedPartition = PartedPartition(number)
+
+    @property
+    def disks(self):
+        return [self.disk]
+
+    @property
+    def fstabSpec(self):
+        return "UUID=%s" % self.format.uuid
+
+class MDArray(object):
+    isDisk = False
+    type = "mdarray"
+
+    def __init__(self, disks, metadata_version, fmt):
+        self.name = "md0"
+        self.disks = disks
+        self.metadataVersion = metadata_version
+        self.format = fmt
+
+class GRUB2ConfigTests(unittest.TestCase):
+    def setUp(self):
+        self._orig_product = bootloader.productName
+        bootloader.productName = "Fedora"
+
+        self.disk = Disk("sda")
+        self.boot = Partition(self.disk, 1, Format("ext4", BOOT_UUID, "/boot"))
+        self.root = Partition(self.disk, 2, Format("ext4", ROOT_UUID, "/"))
+
+    def tearDown(self):
+        bootloader.productName = self._orig_product
+
+    def _bootloader(self, cls=bootloader.GRUB2, stage2=None, disks=None):
+        bl = cls()
+        # not the console of the system running the tests
+        bl.console = ""
+        bl.set_disk_list(disks or [self.disk])
+        bl.stage2_device = stage2 or self.boot
+        bl.add_image(bootloader.LinuxBootLoaderImage(device=self.root, version=VERSION))
+        bl.boot_args.add("quiet")
+        return bl
+
+    def _config(self, bl):
+        config = StringIO()
+        bl.write_config_header(config)
+        bl.write_config_images(config)
+        return config.getvalue()
+
+    def _entries(self, config):
+        """Return the menu entries as lists of their stripped lines."""
+        entries = []
+        for line in config.splitlines():
+            if line.startswith("menuentry "):
+                entries.append([line])
+            elif entries and entries[-1][-1] != "}":
+                entries[-1].append(line.strip())
+        return entries
+
+    def bios_test(self):
+        """BIOS entries should load the kernel from /boot with linux16."""
+
+        bl = self._bootloader()
+        self.assertIsNone(bl._fast_config_problem())
+
+        config = self._config(bl)
+        self.assertIn("set timeout=5\n", config)
+        self.assertIn("terminal_output console\n", config)
+        self.assertNotIn("load_video", config)
+        self.assertNotIn("superusers", config)
+
+        entries = self._entries(config)
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry[0], "menuentry 'Fedora Linux, with Linux %s' --class gnu-linux "
+                                   "--class gnu --class os --unrestricted {" % VERSION)
+        self.assertEqual(entry[1:4], ["insmod part_msdos", "insmod ext2",
+                                      "search --no-floppy --fs-uuid --set=root %s" % BOOT_UUID])
+
+        linux = entry[4].split()
+        self.assertEqual(linux[:2], ["linux16", "/vmlinuz-%s" % VERSION])
+        self.assertEqual(set(linux[2:]), set(["ro", "root=UUID=%s" % ROOT_UUID, "quiet"]))
+        self.assertEqual(entry[5:], ["initrd16 /initramfs-%s.img" % VERSION, "}"])
+
+    def efi_test(self):
+        """EFI entries should load the video drivers and use linuxefi."""
+
+        # /boot on the root file system
+        bl = self._bootloader(bootloader.EFIGRUB, stage2=self.root,
+                              disks=[Disk("sda", "gpt")])
+        self.root.disk = bl.disks[0]
+
+        config = self._config(bl)
+        self.assertIn("function load_video {\n", config)
+        self.assertIn("    insmod all_video\n", config)
+
+        entry = self._entries(config)[0]
+        self.assertEqual(entry[1:6], ["load_video", "set gfxpayload=keep", "insmod part_gpt",
+                                      "insmod ext2",
+                                      "search --no-floppy --fs-uuid --set=root %s" % ROOT_UUID])
+        self.assertTrue(entry[6].startswith("linuxefi /boot/vmlinuz-%s " % VERSION))
+        self.assertEqual(entry[7], "initrdefi /boot/initramfs-%s.img" % VERSION)
+
+    def mdarray_test(self):
+        """Entries should load the md raid module for /boot on md arrays."""
+
+        disks = [Disk("sda", "gpt"), Disk("sdb", "gpt")]
+        for (metadata, module) in (("1.2", "mdraid1x"), ("0.90", "mdraid09")):
+            md = MDArray(disks, metadata, Format("xfs", BOOT_UUID, "/boot"))
+            bl = self._bootloader(stage2=md, disks=disks)
+            self.assertIsNone(bl._fast_config_problem())
+
+            entry = self._entries(self._config(bl))[0]
+            self.assertEqual(entry[1:5], ["insmod part_gpt", "insmod %s" % module, "insmod xfs",
+                                          "search --no-floppy --fs-uuid --set=root %s" % BOOT_UUID])
+
+    def chain_test(self):
+        """Other operating systems should be found by their file system UUID."""
+
+        other = Disk("sdb")
+        windows = Partition(other, 1, Format("ntfs", "3A5C7E9B5C7E5169"))
+        unformatted = Partition(other, 2, Format())
+
+        bl = self._bootloader(disks=[self.disk, other])
+        bl.add_image(bootloader.BootLoaderImage(device=windows, label="Joe's Windows"))
+        bl.add_image(bootloader.BootLoaderImage(device=unformatted, label="Other"))
+        bl.add_image(bootloader.BootLoaderImage(device=unformatted))
+
+        entries = self._entries(self._config(bl))
+        self.assertEqual(len(entries), 3)
+        self.assertEqual(entries[1], ["menuentry 'Joe'\\''s Windows' --class os {",
+                                      "insmod part_msdos", "insmod chain",
+                                      "search --no-floppy --fs-uuid --set=root 3A5C7E9B5C7E5169",
+                                      "chainloader +1", "}"])
+
+        # no file system to search for
+        self.assertIn("set root='hd1,msdos2'", entries[2])
+
+        # only the disks in the boot order
+        bl.disk_order = ["sda"]
+        self.assertEqual(len(self._entries(self._config(bl))), 1)
+
+    def title_test(self):
+        """Quotes in the titles should be escaped."""
+
+        bootloader.productName = "Joe's Linux"
+        entry = self._entries(self._config(self._bootloader()))[0]
+        self.assertTrue(entry[0].startswith("menuentry 'Joe'\\''s Linux Linux, with Linux %s' "
+                                            % VERSION))
+
+        self.assertEqual(bootloader.grub_quote("a'b''"), "'a'\\''b'\\'''\\'''")
+
+    def password_test(self):
+        """The password should restrict everything but booting the entries."""
+
+        bl = self._bootloader()
+        bl.encrypted_password = "grub.pbkdf2.sha512.10000.ABCD"
+
+        config = self._config(bl)
+        self.assertIn("set superusers=\"root\"\nexport superusers\n"
+                      "password_pbkdf2 root grub.pbkdf2.sha512.10000.ABCD\n", config)
+        self.assertTrue(self._entries(config)[0][0].endswith(" --unrestricted {"))
+
+    def fast_config_problem_test(self):
+        """grub2-mkconfig should be used for unsupported configurations."""
+
+        bl = self._bootloader(stage2=Partition(self.disk, 1, Format("btrfs", BOOT_UUID, "/boot")))
+        self.assertIsNotNone(bl._fast_config_problem())
+
+        bl = self._bootloader(stage2=Partition(self.disk, 1, Format("ext4", None, "/boot")))
+        self.assertIsNotNone(bl._fast_config_problem())
+
+        bl = self._bootloader()
+        bl.add_image(bootloader.TbootLinuxBootLoaderImage(device=self.root, version=VERSION))
+        self.assertIsNotNone(bl._fast_config_problem())
+
+        bl = self._bootloader()
+        bl.clear_images()
+        self.assertIsNotNone(bl._fast_config_problem())
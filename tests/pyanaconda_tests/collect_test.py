@@ -0,0 +1,129 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda.ui import common
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+SPOKES = {"first": "class FirstSpoke(object):\n    category = 'cat1'\n",
+          "second": "class SecondSpoke(object):\n    category = 'cat2'\n\n"
+                    "class ThirdSpoke(object):\n    category = 'cat1'\n\n"
+                    "class Helper(object):\n    category = None\n"}
+
+class CollectTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        sys.path.insert(0, self.tmpdir)
+
+        self.path = os.path.join(self.tmpdir, "collected_spokes")
+        os.mkdir(self.path)
+        with open(os.path.join(self.path, "__init__.py"), "w") as f:
+            f.write("")
+        for (name, content) in SPOKES.items():
+            with open(os.path.join(self.path, name + ".py"), "w") as f:
+                f.write(content)
+
+        self.mask_paths = [("collected_spokes.%s", self.path)]
+        self.manifest_path = os.path.join(self.tmpdir, "manifest")
+
+        self._orig_cache = common._collect_cache
+        self._orig_manifest = common._collect_manifest
+        common._collect_cache = {}
+        common._collect_manifest = {}
+
+    def tearDown(self):
+        common._collect_cache = self._orig_cache
+        common._collect_manifest = self._orig_manifest
+
+        sys.path.remove(self.tmpdir)
+        for name in list(sys.modules.keys()):
+            if name.startswith("collected_spokes"):
+                del sys.modules[name]
+        shutil.rmtree(self.tmpdir)
+
+    def _index(self):
+        index = common.collect_index(self.mask_paths,
+                                     lambda obj: getattr(obj, "category", None) != None,
+                                     lambda obj: obj.category)
+        return dict((key, sorted(cls.__name__ for cls in classes))
+                    for (key, classes) in index.items())
+
+    def index_test(self):
+        """Classes should be grouped by the key."""
+
+        self.assertEqual(self._index(), {"cat1": ["FirstSpoke", "ThirdSpoke"],
+                                         "cat2": ["SecondSpoke"]})
+
+        classes = common.collect("collected_spokes.%s", self.path,
+                                 lambda obj: obj.__name__.startswith("S"))
+        self.assertEqual([cls.__name__ for cls in classes], ["SecondSpoke"])
+
+        self.assertEqual(common.collect("collected_spokes.%s", "/nonexistent", lambda obj: True), [])
+
+    def cache_test(self):
+        """The directory should be traversed only once until it changes."""
+
+        self._index()
+        orig_scan = common._scan_directory
+        try:
+            common._scan_directory = None
+            self._index()
+        finally:
+            common._scan_directory = orig_scan
+
+        # a new module changes the mtime of the directory
+        os.utime(self.path, (0, 0))
+        with open(os.path.join(self.path, "fourth.py"), "w") as f:
+            f.write("class FourthSpoke(object):\n    category = 'cat2'\n")
+
+        self.assertEqual(self._index()["cat2"], ["FourthSpoke", "SecondSpoke"])
+
+    def manifest_test(self):
+        """Classes should be loaded from a valid manifest."""
+
+        expected = self._index()
+        common.save_collect_manifest(self.manifest_path)
+
+        common._collect_cache = {}
+        common.load_collect_manifest(self.manifest_path)
+        orig_scan = common._scan_directory
+        try:
+            common._scan_directory = None
+            self.assertEqual(self._index(), expected)
+        finally:
+            common._scan_directory = orig_scan
+
+        # the manifest doesn't match a changed directory
+        common._collect_cache = {}
+        os.utime(self.path, (0, 0))
+        os.unlink(os.path.join(self.path, "first.py"))
+        self.assertEqual(self._index(), {"cat1": ["ThirdSpoke"], "cat2": ["SecondSpoke"]})
+
+    def invalid_manifest_test(self):
+        """Invalid manifests should be ignored."""
+
+        with open(self.manifest_path, "w") as f:
+            f.write("garbage")
+        common.load_collect_manifest(self.manifest_path)
+        self.assertEqual(common._collect_manifest, {})
+
+        common.load_collect_manifest(os.path.join(self.tmpdir, "nonexistent"))
+        self.assertEqual(common._collect_manifest, {})
@@ -0,0 +1,86 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda.ui.lib.disks import DiskIndex
+import unittest
+
+class Disk(object):
+    def __init__(self, name, vendor, wwid=None, parents=None):
+        self.name = name
+        self.vendor = vendor
+        self.wwid = wwid
+        self.parents = parents or []
+
+    @property
+    def ancestors(self):
+        ancestors = [self]
+        for parent in self.parents:
+            ancestors.extend(a for a in parent.ancestors if a not in ancestors)
+        return ancestors
+
+class DiskIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.sda = Disk("sda", "ATA")
+        self.sdb = Disk("sdb", "IBM", "3600a0b80")
+        self.sdc = Disk("sdc", "IBM", "3600a0b80")
+        self.mpatha = Disk("mpatha", "IBM", "3600a0b80", [self.sdb, self.sdc])
+        self.disks = [self.mpatha, self.sda, self.sdb, self.sdc]
+
+        self.index = DiskIndex({"vendor": lambda d: d.vendor,
+                                "wwid": lambda d: d.wwid})
+
+    def lookup_test(self):
+        """Disks should be found by their attributes."""
+
+        self.assertTrue(self.index.update(self.disks))
+        self.assertEqual(self.index.names, set(["mpatha", "sda", "sdb", "sdc"]))
+        self.assertEqual(self.index.find("vendor", "IBM"), set(["mpatha", "sdb", "sdc"]))
+        self.assertEqual(self.index.find("vendor", "HP"), set())
+        self.assertEqual(self.index.search("wwid", "0a0b"), set(["mpatha", "sdb", "sdc"]))
+        self.assertEqual(self.index.having("wwid"), set(["mpatha", "sdb", "sdc"]))
+        self.assertEqual(self.index.get("sdb", "vendor"), "IBM")
+        self.assertIsNone(self.index.get("sda", "wwid"))
+
+        # results are copies, changing them doesn't change the index
+        self.index.find("vendor", "IBM").clear()
+        self.assertEqual(len(self.index.find("vendor", "IBM")), 3)
+
+    def ancestors_test(self):
+        """Ancestors of the disks should be precomputed without the disks."""
+
+        self.index.update(self.disks)
+        self.assertEqual(self.index.ancestors["mpatha"], set(["sdb", "sdc"]))
+        self.assertEqual(self.index.ancestors["sda"], set())
+        self.assertEqual(self.index.allAncestors, set(["sdb", "sdc"]))
+
+    def revision_test(self):
+        """The index should only be rebuilt when the disks change."""
+
+        self.assertTrue(self.index.update(self.disks))
+        self.assertFalse(self.index.update(list(self.disks)))
+
+        # a disk replaced by a new object
+        self.sda.vendor = "WDC"
+        self.assertFalse(self.index.update(self.disks))
+        self.assertTrue(self.index.update([self.mpatha, Disk("sda", "WDC"), self.sdb, self.sdc]))
+        self.assertEqual(self.index.find("vendor", "WDC"), set(["sda"]))
+
+        # a disk removed
+        self.assertTrue(self.index.update([self.sda]))
+        self.assertEqual(self.index.names, set(["sda"]))
+        self.assertEqual(self.index.allAncestors, set())
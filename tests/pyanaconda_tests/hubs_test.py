@@ -0,0 +1,231 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda.flags import flags
+from pyanaconda.ui.communication import hubQ
+from pyanaconda.ui.gui import hubs
+import Queue
+import unittest
+
+class Selector(object):
+    def __init__(self):
+        self.status = None
+
+    def set_property(self, name, value):
+        if name == "status":
+            self.status = value
+
+    def set_sensitive(self, sensitive):
+        pass
+
+    def set_tooltip_markup(self, markup):
+        pass
+
+    def set_incomplete(self, incomplete):
+        pass
+
+class Spoke(object):
+    indirect = False
+    sensitive = True
+    mandatory = True
+    completed = True
+    changed = False
+    status = "ok"
+
+    def __init__(self, ready=True):
+        self.ready = ready
+        self.initialized = False
+        self.selector = Selector()
+        self._visitedSinceApplied = False
+
+    def initialize(self):
+        self.initialized = True
+
+class Button(object):
+    def __init__(self):
+        self.clicks = 0
+        self.sensitive = None
+
+    def set_sensitive(self, sensitive):
+        self.sensitive = sensitive
+
+    def emit(self, signal):
+        if signal == "clicked":
+            self.clicks += 1
+
+class TestHub(hubs.Hub):
+    """Hub with the spokes given by name, as if created by _createBox, and
+       without any UI.
+    """
+
+    def __init__(self, spokes):
+        # GUIObject.__init__ would load the UI file
+        self._autoContinue = True
+        self._incompleteSpokes = []
+        self._inSpoke = False
+        self._notReadySpokes = []
+        self._pendingSpokes = []
+        self._spokes = {}
+        self._checker = None
+        self._spokes_watch_id = None
+        self._continueButton = Button()
+
+        for (name, spoke) in sorted(spokes.items()):
+            self._spokes[name] = spoke
+            self._pendingSpokes.append(spoke)
+            self._notReadySpokes.append(spoke)
+
+        hubs.gtk_call_once(self._initializePendingSpoke)
+
+    @property
+    def continueButton(self):
+        return self._continueButton
+
+    def clear_info(self):
+        pass
+
+    def set_warning(self, msg):
+        pass
+
+class DeferredInitializationTests(unittest.TestCase):
+    def setUp(self):
+        self._orig_call_once = hubs.gtk_call_once
+        self._orig_automated = flags.automatedInstall
+        self._idle = []
+        hubs.gtk_call_once = lambda func, *args: self._idle.append((func, args))
+        flags.automatedInstall = True
+        self._clear_queue()
+
+    def tearDown(self):
+        hubs.gtk_call_once = self._orig_call_once
+        flags.automatedInstall = self._orig_automated
+        self._clear_queue()
+
+    def _clear_queue(self):
+        while True:
+            try:
+                hubQ.q.get(False)
+                hubQ.q.task_done()
+            except Queue.Empty:
+                break
+        hubQ.clear_wakeup()
+
+    def _run_one(self, hub):
+        """Run the first idle callback."""
+        (func, args) = self._idle.pop(0)
+        func(*args)
+
+    def _run_idle(self, hub):
+        """Run the main loop until there is nothing to do, processing the
+           hub messages before the idle callbacks the way the queue watch
+           does.
+        """
+        for _i in range(100):
+            if not hubQ.q.empty():
+                hub._update_spokes()
+            elif self._idle:
+                (func, args) = self._idle.pop(0)
+                func(*args)
+            else:
+                return
+        self.fail("the main loop never became idle")
+
+    def auto_continue_test(self):
+        """Continue should be clicked once all spokes are initialized and ready."""
+
+        hub = TestHub({"A": Spoke(), "B": Spoke()})
+        self._run_one(hub)
+        self.assertEqual(hub._pendingSpokes, [hub._spokes["B"]])
+        self.assertFalse(hub.continueButton.sensitive)
+        self.assertEqual(hub.continueButton.clicks, 0)
+
+        self._run_idle(hub)
+        self.assertTrue(all(spoke.initialized for spoke in hub._spokes.values()))
+        self.assertEqual(hub._notReadySpokes, [])
+        self.assertEqual(hub.continueButton.clicks, 1)
+
+    def not_ready_test(self):
+        """Continue should wait for the spokes not ready after initialization."""
+
+        hub = TestHub({"A": Spoke(), "B": Spoke(ready=False)})
+        self._run_idle(hub)
+        self.assertEqual(hub._notReadySpokes, [hub._spokes["B"]])
+        self.assertEqual(hub.continueButton.clicks, 0)
+
+        hub._spokes["B"].ready = True
+        hubQ.send_ready("B", False)
+        self._run_idle(hub)
+        self.assertEqual(hub._notReadySpokes, [])
+        self.assertEqual(hub.continueButton.clicks, 1)
+
+    def dropped_messages_test(self):
+        """Messages for spokes not initialized yet should be dropped."""
+
+        hub = TestHub({"A": Spoke(), "B": Spoke()})
+        hubQ.send_message("B", "status of B")
+        hubQ.send_not_ready("B")
+        hub._update_spokes()
+        self.assertTrue(hubQ.q.empty())
+        self.assertIsNone(hub._spokes["B"].selector.status)
+
+        # the state is read when the spoke is initialized
+        self._run_idle(hub)
+        self.assertEqual(hub._notReadySpokes, [])
+        self.assertEqual(hub.continueButton.clicks, 1)
+
+    def pending_messages_test(self):
+        """Continue should not be clicked while there are messages to process."""
+
+        hub = TestHub({"A": Spoke(), "B": Spoke()})
+        self._run_one(hub)
+
+        # the spoke started some work after its initialization
+        hubQ.send_not_ready("A")
+        self._run_one(hub)
+        self.assertEqual(hub._pendingSpokes, [])
+        self.assertEqual(hub.continueButton.clicks, 0)
+
+        self._run_idle(hub)
+        self.assertEqual(hub._notReadySpokes, [hub._spokes["A"]])
+        self.assertEqual(hub.continueButton.clicks, 0)
+
+        hubQ.send_ready("A", False)
+        self._run_idle(hub)
+        self.assertEqual(hub.continueButton.clicks, 1)
+
+    def silently_not_ready_test(self):
+        """Spokes should be checked again before continue is clicked."""
+
+        spoke = Spoke()
+        hub = TestHub({"A": spoke, "B": Spoke()})
+        self._run_one(hub)
+
+        # not ready without sending a message
+        spoke.ready = False
+        self._run_idle(hub)
+        self.assertEqual(hub._notReadySpokes, [spoke])
+        self.assertEqual(hub.continueButton.clicks, 0)
+
+    def in_spoke_test(self):
+        """Continue should not be clicked when the user is in a spoke."""
+
+        hub = TestHub({"A": Spoke()})
+        hub._inSpoke = True
+        self._run_idle(hub)
+        self.assertFalse(hub._autoContinue)
+        self.assertEqual(hub.continueButton.clicks, 0)
@@ -0,0 +1,406 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda import image
+from pyanaconda import threads
+from pyanaconda.errors import errorHandler, MediaChecksumError
+from pyanaconda.flags import flags
+import hashlib
+import os
+import struct
+import tempfile
+import unittest
+
+SECTOR = 2048
+
+def make_iso(sectors):
+    """Return contents of an ISO9660 image with the given number of sectors
+       and no files.
+    """
+    data = bytearray(os.urandom(sectors * SECTOR))
+    data[16 * SECTOR:18 * SECTOR] = b"\0" * 2 * SECTOR
+
+    pvd = 16 * SECTOR
+    data[pvd:pvd + 6] = b"\x01CD001"
+    data[pvd + 80:pvd + 88] = struct.pack("<I", sectors) + struct.pack(">I", sectors)
+    data[pvd + 128:pvd + 132] = struct.pack("<H", SECTOR) + struct.pack(">H", SECTOR)
+
+    # volume descriptor set terminator
+    data[17 * SECTOR:17 * SECTOR + 6] = b"\xffCD001"
+    return data
+
+def implant_md5(data, fragment_count=4, skip_sectors=15):
+    """Implant checksums to the image the way implantisomd5 does."""
+    total = len(data) - skip_sectors * SECTOR
+    appdata = 16 * SECTOR + 883
+
+    hashed = bytearray(data[:total])
+    hashed[appdata:appdata + 512] = b" " * 512
+
+    md5 = hashlib.md5()
+    fragment_sums = ""
+    fragment_sum_size = 60 // fragment_count
+    previous = 0
+    offset = 0
+    while offset < total:
+        block = hashed[offset:offset + 16 * SECTOR]
+        md5.update(block)
+        current = offset * (fragment_count + 1) // total
+        if current != previous:
+            fragment_sums += md5.copy().hexdigest()[:fragment_sum_size]
+            previous = current
+        offset += len(block)
+
+    values = ("ISO MD5SUM = %s;SKIPSECTORS = %d;RHLISOSTATUS=1;"
+              "FRAGMENT SUMS = %s;FRAGMENT COUNT = %d;"
+              % (md5.hexdigest(), skip_sectors, fragment_sums, fragment_count))
+    data[appdata:appdata + 512] = values.ljust(512)
+
+def both_endian(fmt, value):
+    return struct.pack("<" + fmt, value) + struct.pack(">" + fmt, value)
+
+def dir_record(name, extent, size, is_dir=False, system_use=b""):
+    """Return ISO9660 directory record."""
+    record = bytearray(struct.pack("<BB", 0, 0))
+    record += both_endian("I", extent) + both_endian("I", size)
+    record += b"\0" * 7
+    record += struct.pack("<BBB", 2 if is_dir else 0, 0, 0)
+    record += both_endian("H", 1)
+    record += struct.pack("<B", len(name)) + name
+    if len(name) % 2 == 0:
+        record += b"\0"
+    record += system_use
+    if len(record) % 2:
+        record += b"\0"
+    record[0] = len(record)
+    return record
+
+def rock_ridge_nm(name):
+    """Return Rock Ridge NM entries with the name split in two of them."""
+    half = len(name) // 2
+    return (b"NM" + struct.pack("<BBB", 5 + half, 1, 1) + name[:half] +
+            b"NM" + struct.pack("<BBB", 5 + len(name) - half, 1, 0) + name[half:])
+
+def make_files_iso(files, joliet=False, rock_ridge=False, padding=0):
+    """Return contents of an ISO9660 image with the files in the root
+       directory.
+
+       :param files: dict mapping names to contents, None for directories
+       :param joliet: add Joliet directory tree
+       :param rock_ridge: add Rock Ridge names
+       :param padding: number of additional empty files listed first
+    """
+    root_extent, joliet_extent, data_extent = 20, 24, 28
+
+    names = ["pad%03d" % i for i in range(padding)] + sorted(files.keys())
+    contents = dict((name, b"") for name in names)
+    contents.update(files)
+
+    extents = {}
+    data = bytearray()
+    for name in names:
+        extents[name] = data_extent + len(data) // SECTOR
+        data += (contents[name] or b"").ljust(SECTOR, b"\0")
+
+    def directory(extent, entries):
+        records = [dir_record(b"\0", extent, 4 * SECTOR, True),
+                   dir_record(b"\1", extent, 4 * SECTOR, True)]
+        for (i, name) in enumerate(names):
+            is_dir = contents[name] is None
+            size = SECTOR if is_dir else len(contents[name])
+            records.append(dir_record(entries(i, name, is_dir), extents[name], size,
+                                      is_dir, rock_ridge_nm(name) if rock_ridge else b""))
+
+        # records don't cross sectors
+        result = bytearray()
+        for record in records:
+            if len(result) % SECTOR + len(record) > SECTOR:
+                result += b"\0" * (SECTOR - len(result) % SECTOR)
+            result += record
+        return result
+
+    def iso_name(i, name, is_dir):
+        if joliet or rock_ridge:
+            # mangled names, the others should be used
+            name = "F%d" % i
+        name = name.upper()
+        return name if is_dir else name + ";1"
+
+    def joliet_name(i, name, is_dir):
+        name = name.decode("utf-8").encode("utf-16-be")
+        return name if is_dir else name + ";1".encode("utf-16-be")
+
+    root = directory(root_extent, iso_name)
+    assert len(root) <= 4 * SECTOR
+    root_size = (len(root) + SECTOR - 1) // SECTOR * SECTOR
+
+    image = make_iso(data_extent + len(data) // SECTOR)
+    image[root_extent * SECTOR:joliet_extent * SECTOR] = root.ljust(4 * SECTOR, b"\0")
+    image[data_extent * SECTOR:] = data
+
+    pvd = 16 * SECTOR
+    image[pvd + 156:pvd + 190] = dir_record(b"\0", root_extent, root_size, True)
+
+    if joliet:
+        jroot = directory(joliet_extent, joliet_name)
+        assert len(jroot) <= 4 * SECTOR
+        image[joliet_extent * SECTOR:data_extent * SECTOR] = jroot.ljust(4 * SECTOR, b"\0")
+
+        svd = 17 * SECTOR
+        image[svd:svd + SECTOR] = image[pvd:pvd + SECTOR]
+        image[svd] = 2
+        image[svd + 88:svd + 91] = b"%/E"
+        jroot_size = (len(jroot) + SECTOR - 1) // SECTOR * SECTOR
+        image[svd + 156:svd + 190] = dir_record(b"\0", joliet_extent, jroot_size, True)
+
+        # move the terminator after the supplementary descriptor
+        image[18 * SECTOR:18 * SECTOR + 6] = b"\xffCD001"
+
+    return image
+
+DISCINFO = "1400000000.000000\nTest Linux 21\n%s\nALL\n"
+
+class ProbeIsoImageTests(unittest.TestCase):
+    def setUp(self):
+        image._iso_info_cache.clear()
+        self._files = []
+
+    def tearDown(self):
+        image._iso_info_cache.clear()
+        for path in self._files:
+            os.unlink(path)
+
+    def _write(self, data, dirname=None, name=None):
+        if name:
+            path = os.path.join(dirname, name)
+            with open(path, "wb") as f:
+                f.write(bytes(data))
+        else:
+            fd, path = tempfile.mkstemp(suffix=".iso", dir=dirname)
+            os.write(fd, bytes(data))
+            os.close(fd)
+        self._files.append(path)
+        return path
+
+    def _check(self, data, stamp="1400000000.000000", arch="x86_64", has_repodata=True):
+        info = image.probeIsoImage(self._write(data))
+        self.assertEqual(info, image.IsoImageInfo(stamp, arch, has_repodata))
+
+    def _files_dict(self, arch="x86_64"):
+        return {".discinfo": DISCINFO % arch, "repodata": None, "Packages": None}
+
+    def plain_test(self):
+        """Plain ISO9660 names should be translated."""
+
+        self._check(make_files_iso(self._files_dict()))
+
+    def joliet_test(self):
+        """Joliet names should be preferred."""
+
+        self._check(make_files_iso(self._files_dict(), joliet=True))
+
+    def rock_ridge_test(self):
+        """Rock Ridge names should be preferred."""
+
+        self._check(make_files_iso(self._files_dict(), rock_ridge=True))
+
+    def multi_sector_directory_test(self):
+        """Entries in the next sectors of the directory should be found."""
+
+        data = make_files_iso(self._files_dict(), rock_ridge=True, padding=100)
+        path = self._write(data)
+        with open(path, "rb") as f:
+            (_extent, size, _joliet) = image._iso_root_directory(f)
+        self.assertGreater(size, SECTOR)
+        self._check(data)
+
+        data = make_files_iso(self._files_dict(), joliet=True, padding=100)
+        self._check(data)
+
+    def no_discinfo_test(self):
+        """Missing .discinfo and repodata should be reported."""
+
+        self._check(make_files_iso({"repodata": None}), stamp=None, arch=None)
+        self._check(make_files_iso({".discinfo": DISCINFO % "x86_64"}, rock_ridge=True),
+                    has_repodata=False)
+
+    def not_iso_test(self):
+        """Files which are not ISO9660 images should be skipped."""
+
+        self.assertIsNone(image.probeIsoImage(self._write(b"\0" * 64 * SECTOR)))
+        self.assertIsNone(image.probeIsoImage(self._write(b"")))
+        self.assertIsNone(image.probeIsoImage("/nonexistent/image.iso"))
+
+    def cache_test(self):
+        """Results should be reused until the image changes."""
+
+        path = self._write(make_files_iso({"repodata": None}))
+        info = image.probeIsoImage(path)
+        self.assertIs(image.probeIsoImage(path), info)
+
+        with open(path, "wb") as f:
+            f.write(bytes(make_files_iso(self._files_dict(), padding=10)))
+        self.assertEqual(image.probeIsoImage(path),
+                         image.IsoImageInfo("1400000000.000000", "x86_64", True))
+
+    def find_first_test(self):
+        """The first image with matching architecture and repodata should be found."""
+
+        orig_thread_mgr = threads.threadMgr
+        threads.threadMgr = threads.ThreadManager()
+        dirname = tempfile.mkdtemp()
+        try:
+            self._write(b"not an image", dirname, "a.iso")
+            self._write(make_files_iso(self._files_dict("wrong")), dirname, "b.iso")
+            self._write(make_files_iso({".discinfo": DISCINFO % image._arch}), dirname, "c.iso")
+            self._write(make_files_iso(self._files_dict(image._arch)), dirname, "d.iso")
+
+            self.assertEqual(image.findFirstIsoImage(dirname), "d.iso")
+            self.assertIsNone(image.findFirstIsoImage(os.path.join(dirname, "c.iso")))
+            threads.threadMgr.wait_all()
+        finally:
+            threads.threadMgr = orig_thread_mgr
+            for path in self._files[:]:
+                os.unlink(path)
+                self._files.remove(path)
+            os.rmdir(dirname)
+
+class MediaChecksumTests(unittest.TestCase):
+    def setUp(self):
+        self._orig_block_size = image.MEDIA_CHECK_BLOCK_SIZE
+        # read the small images in several blocks
+        image.MEDIA_CHECK_BLOCK_SIZE = 16 * SECTOR
+        self._files = []
+
+    def tearDown(self):
+        image.MEDIA_CHECK_BLOCK_SIZE = self._orig_block_size
+        for path in self._files:
+            os.unlink(path)
+
+    def _write(self, data):
+        fd, path = tempfile.mkstemp(suffix=".iso")
+        os.write(fd, bytes(data))
+        os.close(fd)
+        self._files.append(path)
+        return path
+
+    def _image(self, corrupt_sector=None):
+        data = make_iso(256)
+        implant_md5(data)
+        if corrupt_sector is not None:
+            data[corrupt_sector * SECTOR] ^= 0xff
+        return self._write(data)
+
+    def pass_test(self):
+        """Media matching the implanted checksums should pass."""
+
+        self.assertTrue(image.verifyMediaChecksum(self._image(), report_progress=False))
+
+    def corrupt_test(self):
+        """Corrupted media should fail."""
+
+        # in the first fragment
+        path = self._image(corrupt_sector=40)
+        self.assertFalse(image.verifyMediaChecksum(path, report_progress=False))
+
+        # after the last fragment, only the whole image checksum is wrong
+        path = self._image(corrupt_sector=235)
+        self.assertFalse(image.verifyMediaChecksum(path, report_progress=False))
+
+        # the skipped sectors are not checked
+        path = self._image(corrupt_sector=250)
+        self.assertTrue(image.verifyMediaChecksum(path, report_progress=False))
+
+    def early_abort_test(self):
+        """The check should stop at the first fragment not matching its sum."""
+
+        hashed = [0]
+        orig_md5 = hashlib.md5
+        class CountingMD5(object):
+            def __init__(self):
+                self._md5 = orig_md5()
+
+            def update(self, data):
+                hashed[0] += len(data)
+                self._md5.update(data)
+
+            def hexdigest(self):
+                return self._md5.hexdigest()
+
+        path = self._image(corrupt_sector=40)
+        image.hashlib.md5 = CountingMD5
+        try:
+            self.assertFalse(image.verifyMediaChecksum(path, report_progress=False))
+        finally:
+            image.hashlib.md5 = orig_md5
+
+        # the first fragment ends in the fifth block of the 241 hashed sectors
+        self.assertEqual(hashed[0], 5 * 16 * SECTOR)
+
+    def progress_test(self):
+        """The progress and the speed of the check should be reported."""
+
+        from pyanaconda.progress import progressQ
+
+        orig_interval = image.MEDIA_CHECK_REPORT_INTERVAL
+        image.MEDIA_CHECK_REPORT_INTERVAL = 0
+        try:
+            self.assertTrue(image.verifyMediaChecksum(self._image()))
+        finally:
+            image.MEDIA_CHECK_REPORT_INTERVAL = orig_interval
+
+        (code, args) = progressQ.q.get_nowait()
+        self.assertEqual(code, progressQ.PROGRESS_CODE_MESSAGE)
+        self.assertIn("MB/s", args[0])
+
+    def fragment_checks_test(self):
+        """The fragment sums should be checked where implantisomd5 computes them."""
+
+        size = 241 * SECTOR
+        checks = image._isomd5_fragment_checks(size, 4)
+        self.assertEqual([fragment for (_offset, fragment) in checks], [1, 2, 3, 4])
+        self.assertTrue(all(offset % (16 * SECTOR) == 0 for (offset, _fragment) in checks))
+
+    def no_checksum_test(self):
+        """Media without implanted checksums or not ISO9660 can't be checked."""
+
+        self.assertIsNone(image.verifyMediaChecksum(self._write(make_iso(64)),
+                                                    report_progress=False))
+        self.assertIsNone(image.verifyMediaChecksum(self._write(b"\0" * 64 * SECTOR),
+                                                    report_progress=False))
+
+    def check_image_test(self):
+        """The image should only be checked if requested."""
+
+        class UI(object):
+            def showYesNoQuestion(self, message):
+                return False
+
+        path = self._image(corrupt_sector=40)
+        orig_ui = errorHandler.ui
+        errorHandler.ui = UI()
+        try:
+            # not requested
+            image.checkImage(path)
+
+            flags.cmdline["isocheck"] = None
+            self.assertRaises(MediaChecksumError, image.checkImage, path)
+            image.checkImage(self._image())
+        finally:
+            flags.cmdline.pop("isocheck", None)
+            errorHandler.ui = orig_ui
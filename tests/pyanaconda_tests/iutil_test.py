@@ -21,7 +21,6 @@
 
 from pyanaconda import iutil
 import unittest
-import types
 import os
 import shutil
 from test_constants import ANACONDA_TEST_DIR
@@ -90,6 +89,39 @@ class RunProgramTests(unittest.TestCase):
         # check no output is returned
         self.assertEqual(len(iutil.execWithCapture('true', [])), 0)
 
+    def exec_in_parallel_test(self):
+        """Test execInParallel."""
+
+        commands = [("echo", ["foo"]), ("false", []), ("asdasdadasd", []),
+                    ("echo", ["bar"])]
+
+        for max_running in (None, 1, 2):
+            results = iutil.execInParallel(commands, max_running=max_running)
+
+            # results are in the order of the commands
+            self.assertEqual(results[0], (0, "foo\n"))
+            self.assertNotEqual(results[1][0], 0)
+            self.assertEqual(results[3], (0, "bar\n"))
+
+            # command that cannot be run has no return code
+            self.assertIsNone(results[2][0])
+
+        self.assertEqual(iutil.execInParallel([]), [])
+
+    def run_program_output_test(self):
+        """Test output handling of _run_program."""
+
+        # missing newline at the end of output is added
+        self.assertEqual(iutil._run_program(["echo", "-n", "foo"]), (0, "foo\n"))
+
+        # binary output is returned as is
+        self.assertEqual(iutil._run_program(["echo", "-n", "foo"], binary_output=True),
+                         (0, "foo"))
+
+        # output is not collected if not requested
+        self.assertEqual(iutil._run_program(["echo", "foo"], capture_output=False),
+                         (0, None))
+
     def exec_readlines_test(self):
         """Test execReadlines."""
 
@@ -99,12 +131,39 @@ class RunProgramTests(unittest.TestCase):
         # test some lines are returned
         self.assertGreater(len(list(iutil.execReadlines("ls", ["--help"]))), 0)
 
-        # check that it always returns a generator for both
+        # check that it always returns a line reader for both
         # if there is some output and if there isn't any
         self.assertIsInstance(iutil.execReadlines("ls", ["--help"]),
-                              types.GeneratorType)
+                              iutil.ExecLineReader)
         self.assertIsInstance(iutil.execReadlines("true", []),
-                              types.GeneratorType)
+                              iutil.ExecLineReader)
+
+        # lines are stripped, the last one may be missing the newline
+        self.assertEqual(list(iutil.execReadlines("printf", ["  one\ntwo  \n\nthree"])),
+                         ["one", "two", "", "three"])
+
+        # binary output is returned as it is
+        self.assertEqual(list(iutil.execReadlines("printf", ["  one\ntwo"], binary_output=True)),
+                         ["  one\n", "two"])
+
+        # stderr is merged with stdout unless it should be separated
+        argv = ["-c", "echo out; echo err >&2"]
+        self.assertEqual(sorted(iutil.execReadlines("sh", argv)), ["err", "out"])
+        self.assertEqual(list(iutil.execReadlines("sh", argv, separate_stderr=True)), ["out"])
+
+        # the return code is available once all the lines are read
+        reader = iutil.execReadlines("sh", ["-c", "echo foo; exit 3"])
+        self.assertIsNone(reader.returncode)
+        self.assertEqual(list(reader), ["foo"])
+        self.assertEqual(reader.returncode, 3)
+
+        reader = iutil.execReadlines("true", [])
+        self.assertEqual(list(reader), [])
+        self.assertEqual(reader.returncode, 0)
+
+        # error should raise OSError
+        with self.assertRaises(OSError):
+            iutil.execReadlines("asdasdadasd", [])
 
     def get_dir_size_test(self):
         """Test the getDirSize."""
@@ -19,6 +19,9 @@
 #
 
 from pyanaconda import keyboard
+import os
+import shutil
+import tempfile
 import unittest
 
 class ParsingAndJoiningTests(unittest.TestCase):
@@ -66,3 +69,62 @@ class ParsingAndJoiningTests(unittest.TestCase):
         self.assertEqual(keyboard.normalize_layout_variant("cz(qwerty)"), "cz (qwerty)")
         self.assertEqual(keyboard.normalize_layout_variant("cz ( qwerty )"), "cz (qwerty)")
         self.assertEqual(keyboard.normalize_layout_variant("cz "), "cz")
+
+class RegistryCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.mkdtemp()
+        self._cache_path = os.path.join(self._tmp_dir, "cache", "xkl-registry")
+        self._layouts = {"cz (qwerty)": keyboard.LayoutInfo("Czech", "Czech (qwerty)"),
+                         "us": keyboard.LayoutInfo("English", "English (US)")}
+        self._switch_opts = {"grp:alt_shift_toggle": "Alt+Shift"}
+
+    def tearDown(self):
+        shutil.rmtree(self._tmp_dir)
+
+    def cache_roundtrip_test(self):
+        """Cached layouts and switching options should be loaded back."""
+
+        signature = [("evdev.xml", 42, 1234)]
+        keyboard._save_registry_cache(signature, self._layouts, self._switch_opts,
+                                      cache_path=self._cache_path)
+
+        layouts, switch_opts = keyboard._load_registry_cache(signature,
+                                                             cache_path=self._cache_path)
+        self.assertEqual(layouts, self._layouts)
+        self.assertIsInstance(layouts["us"], keyboard.LayoutInfo)
+        self.assertEqual(switch_opts, self._switch_opts)
+
+    def invalid_cache_test(self):
+        """Missing, stale and broken caches should be ignored."""
+
+        signature = [("evdev.xml", 42, 1234)]
+        self.assertIsNone(keyboard._load_registry_cache(signature,
+                                                        cache_path=self._cache_path))
+
+        keyboard._save_registry_cache(signature, self._layouts, self._switch_opts,
+                                      cache_path=self._cache_path)
+        self.assertIsNone(keyboard._load_registry_cache([("evdev.xml", 43, 1234)],
+                                                        cache_path=self._cache_path))
+        self.assertIsNone(keyboard._load_registry_cache(None,
+                                                        cache_path=self._cache_path))
+
+        with open(self._cache_path, "w") as f:
+            f.write("garbage")
+        self.assertIsNone(keyboard._load_registry_cache(signature,
+                                                        cache_path=self._cache_path))
+
+    def signature_test(self):
+        """Signature of the registry files should change with them."""
+
+        rules_dir = os.path.join(self._tmp_dir, "rules")
+        self.assertIsNone(keyboard._xkb_config_signature(rules_dir))
+
+        os.mkdir(rules_dir)
+        with open(os.path.join(rules_dir, "evdev.xml"), "w") as f:
+            f.write("<xkbConfigRegistry/>")
+        signature = keyboard._xkb_config_signature(rules_dir)
+        self.assertEqual(len(signature), 1)
+
+        with open(os.path.join(rules_dir, "evdev.xml"), "a") as f:
+            f.write("\n")
+        self.assertNotEqual(keyboard._xkb_config_signature(rules_dir), signature)
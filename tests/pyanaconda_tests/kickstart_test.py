@@ -0,0 +1,184 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda import kickstart
+from pyanaconda import threads
+from pykickstart.errors import KickstartError
+from pykickstart.version import makeVersion
+import threading
+import unittest
+
+SCRIPTS = """
+%pre --group=network
+echo 1
+%end
+
+%pre --group network --erroronfail
+echo 2
+%end
+
+%pre
+echo 3
+%end
+
+%post --nochroot --group copy
+echo 4
+%end
+"""
+
+class ScriptGroupSectionTests(unittest.TestCase):
+    def _parse(self, ks):
+        # only the script sections are needed, not the anaconda commands
+        handler = makeVersion()
+        parser = kickstart.AnacondaKSParser(handler)
+        parser.readKickstartFromString(ks)
+        return handler.scripts
+
+    def header_test(self):
+        """The group should be read from the script headers."""
+
+        scripts = self._parse(SCRIPTS)
+        self.assertEqual([script.group for script in scripts], ["network", "network", None, "copy"])
+
+        # the other options are left to pykickstart
+        self.assertTrue(scripts[1].errorOnFail)
+        self.assertFalse(scripts[3].inChroot)
+
+    def missing_name_test(self):
+        """The group name should be required."""
+
+        self.assertRaises(KickstartError, self._parse, "%pre --group\necho 1\n%end\n")
+        self.assertRaises(KickstartError, self._parse, "%pre --group --erroronfail\necho 1\n%end\n")
+
+    def write_test(self):
+        """The group should be written to the output kickstart."""
+
+        scripts = self._parse(SCRIPTS)
+        self.assertTrue(str(scripts[0]).startswith("\n%pre --group=network\n"))
+        self.assertTrue(str(scripts[1]).startswith("\n%pre --erroronfail --group=network\n"))
+        self.assertNotIn("--group", str(scripts[2]))
+
+        # and read back
+        written = "".join(str(script) for script in scripts)
+        self.assertEqual([script.group for script in self._parse(written)],
+                         ["network", "network", None, "copy"])
+
+class Script(object):
+    """Script recording what happened to it to a shared log."""
+
+    def __init__(self, name, group, log, barrier=None):
+        self.name = name
+        self.group = group
+        self._log = log
+        self._barrier = barrier
+
+    def run(self, chroot):
+        self._log.append(("run", self.name))
+
+    def execute(self, chroot):
+        self._log.append(("execute", self.name))
+        if self._barrier:
+            # all the scripts of the group have to be running at once
+            (lock, started, count, event) = self._barrier
+            with lock:
+                started.append(self.name)
+                if len(started) == count:
+                    event.set()
+            event.wait(10)
+            if not event.is_set():
+                return (1, "%s timed out" % self.name)
+
+        return (0, self.name)
+
+    def checkResult(self, rc, messages):
+        self._log.append(("check", rc, messages))
+
+class RunScriptsTests(unittest.TestCase):
+    def setUp(self):
+        self._orig_thread_mgr = threads.threadMgr
+        threads.threadMgr = threads.ThreadManager()
+
+    def tearDown(self):
+        threads.threadMgr.wait_all()
+        threads.threadMgr = self._orig_thread_mgr
+
+    def _barrier(self, count):
+        return (threading.Lock(), [], count, threading.Event())
+
+    def order_test(self):
+        """Scripts outside groups should run one by one in order."""
+
+        log = []
+        scripts = [Script(name, group, log) for (name, group) in
+                   (("a", None), ("b", "g"), ("c", None), ("d", "g"))]
+        kickstart.runScripts(scripts, "/")
+
+        # a group of one script is not run in a thread
+        self.assertEqual(log, [("run", "a"), ("run", "b"), ("run", "c"), ("run", "d")])
+
+    def group_test(self):
+        """Scripts of a group should run at once, their results checked in order."""
+
+        log = []
+        first = self._barrier(3)
+        second = self._barrier(2)
+        scripts = [Script("a", None, log),
+                   Script("b", "g", log, first),
+                   Script("c", "g", log, first),
+                   Script("d", "g", log, first),
+                   Script("e", "h", log, second),
+                   Script("f", "h", log, second),
+                   Script("g", None, log)]
+        kickstart.runScripts(scripts, "/")
+
+        self.assertEqual(log[0], ("run", "a"))
+        self.assertEqual(sorted(log[1:4]), [("execute", "b"), ("execute", "c"), ("execute", "d")])
+        self.assertEqual(log[4:7], [("check", 0, "b"), ("check", 0, "c"), ("check", 0, "d")])
+        self.assertEqual(sorted(log[7:9]), [("execute", "e"), ("execute", "f")])
+        self.assertEqual(log[9:], [("check", 0, "e"), ("check", 0, "f"), ("run", "g")])
+
+class StorageTargetsTests(unittest.TestCase):
+    def setUp(self):
+        self._orig_thread_mgr = threads.threadMgr
+        threads.threadMgr = threads.ThreadManager()
+        self._orig_targets = kickstart._storageTargets[:]
+
+    def tearDown(self):
+        threads.threadMgr.wait_all()
+        threads.threadMgr = self._orig_thread_mgr
+        kickstart._storageTargets[:] = self._orig_targets
+
+    def wait_test(self):
+        """Only the startup of the given storage target should be waited for."""
+
+        def fail():
+            raise IOError("no FCoE")
+
+        iscsi = threading.Event()
+        pool = threads.ThreadPool("AnaTestStorageTargets", max_workers=3, fatal=False)
+        kickstart._storageTargets[:] = [("iSCSI", pool.submit(iscsi.wait, 10)),
+                                        ("FCoE", pool.submit(fail)),
+                                        ("zFCP", pool.submit(lambda: None))]
+
+        kickstart.waitForStorageTargets("zFCP")
+        self.assertRaises(IOError, kickstart.waitForStorageTargets, "FCoE")
+        self.assertFalse(kickstart._storageTargets[0][1].done())
+
+        iscsi.set()
+        kickstart.waitForStorageTargets("iSCSI")
+        self.assertRaises(IOError, kickstart.waitForStorageTargets)
@@ -20,9 +20,41 @@
 
 from pyanaconda import localization
 from pyanaconda.iutil import execReadlines
+from nose.plugins.attrib import attr
 import locale as locale_mod
+import langtable
+import os
+import subprocess
+import tempfile
+import time
 import unittest
 
+def _reference_best_locale_match(locale, langcodes):
+    """The original, score-everything implementation of find_best_locale_match"""
+
+    def get_match_score(locale, langcode):
+        locale_parts = localization.parse_langcode(locale)
+        langcode_parts = localization.parse_langcode(langcode)
+        if not locale_parts or not langcode_parts:
+            return 0
+
+        return localization._get_match_score(locale_parts, langcode_parts)
+
+    scores = [(langcode, get_match_score(locale, langcode)) for langcode in langcodes]
+    sorted_langcodes = sorted(scores, key=lambda item_score: item_score[1], reverse=True)
+    if sorted_langcodes and sorted_langcodes[0][1] > 100:
+        return sorted_langcodes[0][0]
+    else:
+        return None
+
+def _all_langcodes():
+    langcodes = set()
+    for language, item in langtable._languages_db.items():
+        langcodes.add(language)
+        langcodes.update(item.locales)
+
+    return sorted(langcodes)
+
 class ParsingTests(unittest.TestCase):
     def invalid_langcodes_test(self):
         """Should return None for invalid langcodes."""
@@ -141,6 +173,77 @@ class LangcodeLocaleMatchingTests(unittest.TestCase):
         # no matches
         self.assertIsNone(localization.find_best_locale_match("pt_BR", ["en_BR", "en"]))
         self.assertIsNone(localization.find_best_locale_match("cs_CZ.UTF-8", ["en", "en.UTF-8"]))
+        self.assertIsNone(localization.find_best_locale_match("cs_CZ", []))
+        self.assertIsNone(localization.find_best_locale_match("*_&!", ["cs", "cs_CZ"]))
+
+        # generators work too
+        self.assertEqual(localization.find_best_locale_match("pt_BR", (l for l in ["pt", "pt_BR"])), "pt_BR")
+
+    def find_best_locale_match_reference_test(self):
+        """Best locale matches should be the same as with scoring all langcodes."""
+
+        langcodes = _all_langcodes()
+        # partial lists with duplicate and equally good items (e.g. rnotes dirs)
+        lists = [langcodes, list(reversed(langcodes)),
+                 [l.split(".")[0] for l in langcodes],
+                 [l for l in langcodes if "_" not in l] + ["en_US", "en_GB", "pt_BR", "sr@latin"]]
+        locales = langcodes + ["sr_RS.UTF-8@latin", "zh_TW.Big5", "en", "xx_YY"]
+
+        for candidates in lists:
+            index = localization.LangcodeIndex(candidates)
+            for locale in locales:
+                expected = _reference_best_locale_match(locale, candidates)
+                self.assertEqual(localization.find_best_locale_match(locale, candidates), expected,
+                                 "%s in %s..." % (locale, candidates[:3]))
+                self.assertEqual(localization.find_best_locale_match(locale, index), expected,
+                                 "%s in index of %s..." % (locale, candidates[:3]))
+
+    def parsing_cache_test(self):
+        """Cached parsing results should not be shared with the callers."""
+
+        parts = localization.parse_langcode("sr_RS.UTF-8@latin")
+        parts["language"] = "en"
+        self.assertEqual(localization.parse_langcode("sr_RS.UTF-8@latin")["language"], "sr")
+
+    @attr("slow")
+    def find_best_locale_match_benchmark_test(self):
+        """Compare speed of the indexed and the original best locale match."""
+
+        langcodes = _all_langcodes()
+
+        start = time.time()
+        for locale in langcodes:
+            _reference_best_locale_match(locale, langcodes)
+        reference_time = time.time() - start
+
+        start = time.time()
+        index = localization.LangcodeIndex(langcodes)
+        for locale in langcodes:
+            localization.find_best_locale_match(locale, index)
+        indexed_time = time.time() - start
+
+        self.assertLess(indexed_time, reference_time)
+
+    def xlated_timezone_test(self):
+        """Translated timezone names should follow $LANG."""
+
+        orig_lang = os.environ.get("LANG")
+        try:
+            os.environ["LANG"] = "cs_CZ.UTF-8"
+            self.assertEqual(localization.get_xlated_timezone("Europe/Prague"),
+                             langtable.timezone_name("Europe/Prague", languageIdQuery="cs",
+                                                     territoryIdQuery="CZ").encode("utf-8"))
+            # the cached value
+            self.assertEqual(localization.get_xlated_timezone("Europe/Prague"),
+                             localization.get_xlated_timezone("Europe/Prague"))
+
+            os.environ["LANG"] = "en_US.UTF-8"
+            self.assertEqual(localization.get_xlated_timezone("Europe/Prague"), "Europe/Prague")
+        finally:
+            if orig_lang is None:
+                del os.environ["LANG"]
+            else:
+                os.environ["LANG"] = orig_lang
 
     def resolve_date_format_test(self):
         """All locales' date formats should be properly resolved."""
@@ -156,3 +259,62 @@ class LangcodeLocaleMatchingTests(unittest.TestCase):
             order = localization.resolve_date_format(1, 2, 3, fail_safe=False)[0]
             for i in (1, 2, 3):
                 self.assertIn(i, order)
+
+class LocalizationDBTests(unittest.TestCase):
+    def setUp(self):
+        fd, self._db_path = tempfile.mkstemp()
+        os.close(fd)
+        script = os.path.join(os.environ.get("top_srcdir", "."), "scripts", "makelangdb")
+        subprocess.check_call(["python", script, self._db_path])
+
+        self._orig_db_path = localization.LOCALIZATION_DB_PATH
+        localization.LOCALIZATION_DB_PATH = self._db_path
+        localization._localization_db = None
+
+    def tearDown(self):
+        localization.LOCALIZATION_DB_PATH = self._orig_db_path
+        localization._localization_db = None
+        os.unlink(self._db_path)
+
+    def db_matches_langtable_test(self):
+        """Results from the localization database should match langtable."""
+
+        self.assertTrue(localization._get_localization_db()["locales"])
+
+        for lang in langtable._languages_db:
+            for locale in [lang] + list(langtable._languages_db[lang].locales):
+                parts = localization.parse_langcode(locale)
+                self.assertIsNotNone(localization._get_locale_entry(parts))
+
+                self.assertEqual(localization.get_english_name(locale),
+                                 localization.upcase_first_letter(
+                                     langtable.language_name(languageId=parts["language"],
+                                                             territoryId=parts["territory"],
+                                                             scriptId=parts["script"],
+                                                             languageIdQuery="en")))
+                self.assertEqual(localization.get_language_locales(locale),
+                                 langtable.list_locales(languageId=parts["language"],
+                                                        territoryId=parts["territory"],
+                                                        scriptId=parts["script"]))
+                self.assertEqual(localization.get_locale_keyboards(locale),
+                                 langtable.list_keyboards(languageId=parts["language"],
+                                                          territoryId=parts["territory"],
+                                                          scriptId=parts["script"]))
+                self.assertEqual(localization.get_locale_timezones(locale),
+                                 langtable.list_timezones(languageId=parts["language"],
+                                                          territoryId=parts["territory"],
+                                                          scriptId=parts["script"]))
+
+        self.assertEqual(localization.get_territory_locales("CZ"),
+                         langtable.list_locales(territoryId="CZ"))
+
+    def missing_db_test(self):
+        """Functions should fall back to langtable without the database."""
+
+        localization.LOCALIZATION_DB_PATH = "/nonexistent/localization.db"
+        localization._localization_db = None
+
+        self.assertEqual(localization.get_language_locales("cs"), ["cs_CZ.UTF-8"])
+        self.assertEqual(localization.get_english_name("cs_CZ.UTF-8"),
+                         langtable.language_name(languageId="cs", territoryId="CZ",
+                                                 languageIdQuery="en"))
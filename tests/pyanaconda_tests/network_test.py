@@ -51,6 +51,26 @@ class NetworkTests(unittest.TestCase):
         for bondopts, dbus_dict in cases:
             self.assertEqual(network.bond_options_ksdata_to_dbus(bondopts), dbus_dict)
 
+    def activation_levels_test(self):
+        # independent devices, dependencies on unknown devices are ignored
+        self.assertEqual(network.activation_levels({"bond0": set(["em1", "em2"]),
+                                                    "bond1": set(["em3", "em4"])}),
+                         [set(["bond0", "bond1"])])
+
+        # bridge over bond, vlan over bridge
+        deps = {"bond0": set(["em1", "em2"]),
+                "br0": set(["bond0"]),
+                "br0.171": set(["br0"]),
+                "em3": set()}
+        self.assertEqual(network.activation_levels(deps),
+                         [set(["bond0", "em3"]), set(["br0"]), set(["br0.171"])])
+
+        # circular dependencies end up in one level
+        self.assertEqual(network.activation_levels({"a": set(["b"]), "b": set(["a"])}),
+                         [set(["a", "b"])])
+
+        self.assertEqual(network.activation_levels({}), [])
+
     def sanityCheckHostname_test(self):
 
         self.assertFalse(network.sanityCheckHostname("")[0])
@@ -0,0 +1,178 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda.queue import QueueFactory
+import select
+import threading
+import unittest
+
+def _readable(fd):
+    return bool(select.select([fd], [], [], 0)[0])
+
+class QueueFactoryTests(unittest.TestCase):
+    def setUp(self):
+        self.queue = QueueFactory("test")
+        self.queue.addMessage("message", 1)
+        self.queue.addMessage("step", 0)
+
+    def messages_test(self):
+        """Sending messages should put them into the queue."""
+
+        self.queue.send_message("hello")
+        self.queue.send_step()
+        self.assertEqual(self.queue.q.get(False), (self.queue.TEST_CODE_MESSAGE, ("hello",)))
+        self.assertEqual(self.queue.q.get(False), (self.queue.TEST_CODE_STEP, ()))
+
+        self.assertRaises(TypeError, self.queue.send_message)
+        self.assertRaises(AttributeError, self.queue.addMessage, "step", 0)
+
+    def wakeup_test(self):
+        """Wakeup descriptor should be readable only with pending messages."""
+
+        fd = self.queue.wakeup_fd
+        self.assertFalse(_readable(fd))
+
+        # many messages, only one wakeup
+        for i in range(100000):
+            self.queue.send_step()
+        self.assertTrue(_readable(fd))
+
+        self.queue.clear_wakeup()
+        self.assertFalse(_readable(fd))
+
+        # clearing without a pending wakeup does nothing
+        self.queue.clear_wakeup()
+        self.assertFalse(_readable(fd))
+
+        self.queue.send_message("hello")
+        self.assertTrue(_readable(fd))
+
+    def early_messages_wakeup_test(self):
+        """Messages sent before watching the queue should wake the watcher up."""
+
+        self.queue.send_step()
+        self.assertTrue(_readable(self.queue.wakeup_fd))
+
+    def threaded_wakeup_test(self):
+        """No messages should be missed by a consumer woken up by the descriptor."""
+
+        count = 1000
+        fd = self.queue.wakeup_fd
+
+        def producer():
+            for i in range(count):
+                self.queue.send_message(i)
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+
+        received = []
+        while len(received) < count:
+            self.assertTrue(select.select([fd], [], [], 10)[0])
+            self.queue.clear_wakeup()
+            while not self.queue.q.empty():
+                received.append(self.queue.q.get(False)[1][0])
+
+        thread.join()
+        self.assertEqual(received, range(count))
+
+class CoalescingTests(unittest.TestCase):
+    def setUp(self):
+        self.queue = QueueFactory("test")
+        self.queue.addMessage("init", 1)
+        self.queue.addMessage("message", 1, coalesce=lambda old, new: new)
+        self.queue.addMessage("count", 1, coalesce=lambda old, new: (old[0] + new[0],))
+
+    def _get_all(self):
+        items = []
+        while not self.queue.q.empty():
+            items.append(self.queue.q.get(False))
+            self.queue.q.task_done()
+
+        return items
+
+    def coalescing_test(self):
+        """Pending messages should be coalesced."""
+
+        for i in range(100):
+            self.queue.send_message(i)
+            self.queue.send_count(1)
+
+        self.assertEqual(self._get_all(), [(self.queue.TEST_CODE_MESSAGE, (99,)),
+                                           (self.queue.TEST_CODE_COUNT, (100,))])
+
+        # all tasks are done
+        self.queue.q.join()
+
+    def barrier_test(self):
+        """Messages should not be coalesced over other messages."""
+
+        self.queue.send_message("a")
+        self.queue.send_message("b")
+        self.queue.send_init(1)
+        self.queue.send_message("c")
+        self.queue.send_count(1)
+        self.queue.send_count(2)
+
+        self.assertEqual(self._get_all(), [(self.queue.TEST_CODE_MESSAGE, ("b",)),
+                                           (self.queue.TEST_CODE_INIT, (1,)),
+                                           (self.queue.TEST_CODE_MESSAGE, ("c",)),
+                                           (self.queue.TEST_CODE_COUNT, (3,))])
+
+    def consumed_messages_test(self):
+        """Messages should not be coalesced with already consumed ones."""
+
+        self.queue.send_message("a")
+        self.assertEqual(self._get_all(), [(self.queue.TEST_CODE_MESSAGE, ("a",))])
+
+        self.queue.send_message("b")
+        self.assertEqual(self._get_all(), [(self.queue.TEST_CODE_MESSAGE, ("b",))])
+
+class ProgressQueueTests(unittest.TestCase):
+    def setUp(self):
+        from pyanaconda.progress import progressQ
+        self.progressQ = progressQ
+
+        # make sure there is nothing left from other tests
+        while not progressQ.q.empty():
+            progressQ.q.get(False)
+            progressQ.q.task_done()
+
+    def step_count_test(self):
+        """Coalesced steps should be counted."""
+
+        from pyanaconda.progress import step_count
+
+        self.progressQ.send_step()
+        code, args = self.progressQ.q.get(False)
+        self.assertEqual(code, self.progressQ.PROGRESS_CODE_STEP)
+        self.assertEqual(step_count(args), 1)
+
+        for i in range(10):
+            self.progressQ.send_step()
+            self.progressQ.send_message("Step %d" % i)
+            self.progressQ.send_items(i + 1, 10, 10)
+
+        items = []
+        while not self.progressQ.q.empty():
+            items.append(self.progressQ.q.get(False))
+
+        self.assertEqual(len(items), 3)
+        self.assertEqual(step_count(items[0][1]), 10)
+        self.assertEqual(items[1], (self.progressQ.PROGRESS_CODE_MESSAGE, ("Step 9",)))
+        self.assertEqual(items[2], (self.progressQ.PROGRESS_CODE_ITEMS, (10, 10, 10)))
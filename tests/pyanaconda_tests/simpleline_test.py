@@ -0,0 +1,180 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda.ui.tui import simpleline as tui
+from nose.plugins.attrib import attr
+from StringIO import StringIO
+import sys
+import time
+import unittest
+
+class WidgetTests(unittest.TestCase):
+    def write_test(self):
+        """Text should be written and wrapped to the buffer."""
+
+        w = tui.Widget()
+        w.write(u"abc\ndef")
+        self.assertEqual(w.get_lines(), [u"abc", u"def"])
+        self.assertEqual(w.width, 3)
+
+        w = tui.Widget()
+        w.write(u"abcdef", width=4)
+        self.assertEqual(w.get_lines(), [u"abcd", u"ef"])
+
+        w = tui.Widget(default=u"12345\n12345")
+        w.write(u"abcdef", row=0, col=1, width=3, block=True)
+        self.assertEqual(w.get_lines(), [u"1abc5", u"1def5"])
+
+    def draw_test(self):
+        """Widgets should be drawn to the given position."""
+
+        inner = tui.Widget(default=u"ab\ncd")
+        w = tui.Widget(default=u"1234\n5678")
+        w.draw(inner, row=1, col=3)
+        self.assertEqual(w.get_lines(), [u"1234", u"567ab", u"   cd"])
+
+    def text_widget_test(self):
+        """TextWidget should wrap its text to the given width."""
+
+        w = tui.TextWidget(u"one two three")
+        w.render(8)
+        self.assertEqual(w.get_lines(), [u"one two ", u"three"])
+
+class TestScreen(tui.UIScreen):
+    title = u"Test"
+
+    def __init__(self, app, lines):
+        tui.UIScreen.__init__(self, app)
+        self.lines = lines
+
+    def refresh(self, args=None):
+        tui.UIScreen.refresh(self, args)
+        self._window.append(tui.ColumnWidget([(20, [tui.TextWidget(l) for l in self.lines])]))
+        return True
+
+class DifferentialTests(unittest.TestCase):
+    def _show(self, app, screen):
+        orig_stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            screen.refresh()
+            app._show_changes(screen)
+            return sys.stdout.getvalue()
+        finally:
+            sys.stdout = orig_stdout
+
+    def changes_test(self):
+        """Only the changed lines of the same screen should be printed."""
+
+        app = tui.App(u"Test", differential=True)
+        screen = TestScreen(app, [u"line %d" % i for i in range(10)])
+
+        output = self._show(app, screen)
+        self.assertIn(app._spacer, output)
+        self.assertIn(u"line 9", output)
+
+        # nothing changed, nothing printed
+        self.assertEqual(self._show(app, screen), u"")
+
+        screen.lines[3] = u"changed line"
+        output = self._show(app, screen)
+        self.assertNotIn(app._spacer, output)
+        self.assertEqual(output.splitlines(), [app._diff_spacer, u"changed line"])
+
+        # too many changes, the whole screen is printed again
+        screen.lines = [u"new %d" % i for i in range(10)]
+        output = self._show(app, screen)
+        self.assertIn(app._spacer, output)
+        self.assertIn(u"Test", output)
+
+        # the screen got shorter or longer, it is printed whole
+        screen.lines = screen.lines[:8]
+        output = self._show(app, screen)
+        self.assertIn(app._spacer, output)
+        self.assertIn(u"new 7", output)
+
+        screen.lines.append(u"new 8")
+        output = self._show(app, screen)
+        self.assertIn(app._spacer, output)
+        self.assertIn(u"new 8", output)
+
+        # other screen is always printed whole
+        other = TestScreen(app, list(screen.lines))
+        output = self._show(app, other)
+        self.assertIn(app._spacer, output)
+        self.assertIn(u"new 0", output)
+
+@attr("slow")
+class RenderBenchmark(unittest.TestCase):
+    """Render widget trees shaped like the storage and source spokes.
+
+       The spokes themselves need storage and payload objects, so their
+       windows are rebuilt here from the same widgets.
+    """
+
+    ROUNDS = 200
+
+    def _storage_window(self, num_disks, selected):
+        window = [u"Installation Destination", u""]
+        window.append(tui.TextWidget(u"Probing storage..."))
+        for i in range(num_disks):
+            window.append(tui.CheckboxWidget(key=str(i + 1),
+                                             title=u"%d) : 10 GiB (sd%s)" % (i + 1, chr(ord("a") + i % 26)),
+                                             text=u"/dev/sd%s" % chr(ord("a") + i % 26),
+                                             completed=(i in selected)))
+        window.append(tui.TextWidget(u"Select a disk to toggle its selection."))
+        return window
+
+    def _source_window(self, num_choices):
+        choices = [tui.TextWidget(u"%d) %s" % (i + 1, u"Network mirror %d" % i))
+                   for i in range(num_choices)]
+        return [u"Installation source", u"", tui.ColumnWidget([(78, choices)], 1)]
+
+    def _benchmark(self, name, windows):
+        app = tui.App(u"Benchmark", differential=True)
+        screen = tui.UIScreen(app)
+
+        orig_stdout = sys.stdout
+        try:
+            sys.stdout = full = StringIO()
+            start = time.time()
+            for window in windows:
+                screen._window = window
+                screen.show_all()
+            full_time = time.time() - start
+
+            sys.stdout = diff = StringIO()
+            start = time.time()
+            for window in windows:
+                screen._window = window
+                app._show_changes(screen)
+            diff_time = time.time() - start
+        finally:
+            sys.stdout = orig_stdout
+
+        print "%s: full %.3f s, %d chars; differential %.3f s, %d chars" % \
+                (name, full_time, len(full.getvalue()), diff_time, len(diff.getvalue()))
+        self.assertLess(len(diff.getvalue()), len(full.getvalue()))
+
+    def storage_test(self):
+        windows = [self._storage_window(8, set([i % 8])) for i in range(self.ROUNDS)]
+        self._benchmark("storage spoke", windows)
+
+    def source_test(self):
+        windows = [self._source_window(20) for _i in range(self.ROUNDS)]
+        self._benchmark("source spoke", windows)
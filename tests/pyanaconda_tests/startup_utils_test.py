@@ -0,0 +1,105 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda import startup_utils
+import __builtin__
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+class ImportProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        sys.path.insert(0, self.tmpdir)
+
+        # a package with a module importing another (slow) module
+        pkg_dir = os.path.join(self.tmpdir, "profiled_pkg")
+        os.mkdir(pkg_dir)
+        with open(os.path.join(pkg_dir, "__init__.py"), "w") as f:
+            f.write("")
+        with open(os.path.join(pkg_dir, "outer.py"), "w") as f:
+            f.write("import inner\n")
+        with open(os.path.join(pkg_dir, "inner.py"), "w") as f:
+            f.write("import time\ntime.sleep(0.1)\n")
+
+        self.profiler = startup_utils.ImportProfiler()
+
+    def tearDown(self):
+        self.profiler.stop()
+        sys.path.remove(self.tmpdir)
+        for name in list(sys.modules.keys()):
+            if name.startswith("profiled_pkg"):
+                del sys.modules[name]
+        shutil.rmtree(self.tmpdir)
+
+    def profile_test(self):
+        """Cumulative and self times of the imported modules should be recorded."""
+
+        orig_import = __builtin__.__import__
+        self.profiler.start()
+        self.assertTrue(self.profiler.running)
+        # pylint: disable=unused-variable
+        import profiled_pkg.outer
+        self.profiler.stop()
+        self.assertIs(__builtin__.__import__, orig_import)
+
+        records = dict((name, (cum, own)) for (name, cum, own) in self.profiler.records)
+
+        # the relative import is recorded with the full name
+        self.assertIn("profiled_pkg.inner", records)
+        self.assertIn("profiled_pkg.outer", records)
+        self.assertGreaterEqual(records["profiled_pkg.inner"][1], 0.1)
+
+        # the time spent in the inner module is not outer's own time
+        self.assertGreaterEqual(records["profiled_pkg.outer"][0], 0.1)
+        self.assertLess(records["profiled_pkg.outer"][1], 0.1)
+
+        # the slowest import is the first one
+        self.assertEqual(self.profiler.records[0][0], "profiled_pkg.outer")
+
+        # already loaded modules are not recorded again
+        self.profiler.start()
+        import profiled_pkg.outer
+        self.profiler.stop()
+        self.assertEqual(len(self.profiler.records), len(records))
+
+    def report_test(self):
+        """The report should contain the milestones and the imports."""
+
+        self.profiler.start()
+        # pylint: disable=unused-variable
+        import profiled_pkg.inner
+        self.profiler.stop()
+        self.profiler.add_milestone("first screen shown", 4.2)
+
+        path = os.path.join(self.tmpdir, "imports.log")
+        self.profiler.write_report(path)
+
+        with open(path) as f:
+            report = f.read()
+
+        self.assertIn("# first screen shown reached 4.200 s after the start", report)
+        self.assertIn("profiled_pkg.inner", report)
+
+    def uptime_test(self):
+        """The process uptime should be a small non-negative number."""
+
+        uptime = startup_utils.get_process_uptime()
+        self.assertGreaterEqual(uptime, 0)
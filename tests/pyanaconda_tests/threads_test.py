@@ -0,0 +1,246 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda import threads
+import sys
+import threading
+import time
+import unittest
+
+class ThreadPoolTests(unittest.TestCase):
+    def setUp(self):
+        self._orig_thread_mgr = threads.threadMgr
+        threads.threadMgr = threads.ThreadManager()
+
+    def tearDown(self):
+        # let the workers exit and remove themselves from the manager
+        for name in threads.threadMgr.names:
+            threads.threadMgr.wait(name)
+
+        threads.threadMgr = self._orig_thread_mgr
+
+    def map_test(self):
+        """Mapping a function should return the results in order."""
+
+        pool = threads.ThreadPool("AnaTestPool", max_workers=3)
+        self.assertEqual(pool.map(lambda x: x * 2, range(20)), [x * 2 for x in range(20)])
+        self.assertEqual(pool.map(lambda x: x, []), [])
+
+    def bounded_test(self):
+        """No more than max_workers tasks should run at once."""
+
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def task():
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        pool = threads.ThreadPool("AnaTestPool", max_workers=2)
+        futures = [pool.submit(task) for _i in range(10)]
+        done, not_done = pool.wait()
+
+        self.assertEqual(len(done), 10)
+        self.assertEqual(not_done, [])
+        self.assertTrue(all(future.done() for future in futures))
+        self.assertLessEqual(max_running[0], 2)
+
+        # idle workers exit
+        threads.threadMgr.wait_all()
+        self.assertEqual(threads.threadMgr.running, 0)
+
+    def timing_test(self):
+        """Tasks should be timed."""
+
+        pool = threads.ThreadPool("AnaTestPool")
+        future = pool.submit(time.sleep, 0.05)
+        self.assertIsNone(future.result())
+        self.assertGreaterEqual(future.duration, 0.04)
+        self.assertLessEqual(future.submitted, future.started)
+
+    def timeout_test(self):
+        """Waiting for tasks should time out."""
+
+        event = threading.Event()
+        pool = threads.ThreadPool("AnaTestPool")
+        future = pool.submit(event.wait)
+
+        done, not_done = pool.wait([future], timeout=0.01)
+        self.assertEqual((done, not_done), ([], [future]))
+        self.assertRaises(threads.TaskTimeoutError, future.result, 0.01)
+
+        event.set()
+        self.assertTrue(future.result(1))
+
+    def error_test(self):
+        """Errors of the tasks should be reported and re-raised."""
+
+        def fail(msg):
+            raise ValueError(msg)
+
+        pool = threads.ThreadPool("AnaTestPool", fatal=False)
+        future = pool.submit(fail, "test error")
+        future.wait()
+
+        # errors of non-fatal pools are not reported to the thread manager
+        self.assertFalse(threads.threadMgr.any_errors)
+        self.assertIsInstance(future.exception(), ValueError)
+        with self.assertRaisesRegexp(ValueError, "test error"):
+            future.result()
+
+        # the result raises the error every time
+        self.assertRaises(ValueError, future.result)
+
+    def map_errors_test(self):
+        """All the errors of the mapped tasks should be handled."""
+
+        def fail(msg):
+            raise ValueError(msg)
+
+        pool = threads.ThreadPool("AnaTestPool", fatal=False)
+        with self.assertRaisesRegexp(ValueError, "first"):
+            pool.map(fail, ["first", "second"])
+
+        # no unhandled errors of the other tasks are left behind
+        threads.threadMgr.wait_all()
+        self.assertFalse(threads.threadMgr.any_errors)
+
+    def fatal_map_errors_test(self):
+        """Errors of fatal pools should be removed from the thread manager by map()."""
+
+        def fail(msg):
+            raise ValueError(msg)
+
+        orig_excepthook = sys.excepthook
+        sys.excepthook = lambda *exc_info: None
+        try:
+            pool = threads.ThreadPool("AnaTestPool")
+            self.assertRaises(ValueError, pool.map, fail, ["first", "second"])
+        finally:
+            sys.excepthook = orig_excepthook
+
+        threads.threadMgr.wait_all()
+        self.assertFalse(threads.threadMgr.any_errors)
+
+    def same_name_test(self):
+        """Pools with the same name should be usable one right after another."""
+
+        # keep the interpreter switching threads, the workers of the first
+        # pool are still exiting when the second one starts its workers
+        stop = threading.Event()
+        def spin():
+            while not stop.is_set():
+                pass
+
+        busy = threading.Thread(target=spin)
+        busy.start()
+        orig_interval = sys.getcheckinterval()
+        sys.setcheckinterval(1)
+        try:
+            for _i in range(200):
+                for _j in range(2):
+                    pool = threads.ThreadPool("AnaTestPool", max_workers=2)
+                    self.assertEqual(pool.map(lambda x: x, range(4)), range(4))
+        finally:
+            sys.setcheckinterval(orig_interval)
+            stop.set()
+            busy.join()
+
+class ThreadActivityTests(unittest.TestCase):
+    def setUp(self):
+        # AnacondaThread objects remove themselves from the global manager
+        self._orig_thread_mgr = threads.threadMgr
+        self.mgr = threads.threadMgr = threads.ThreadManager()
+
+    def tearDown(self):
+        threads.threadMgr = self._orig_thread_mgr
+
+    def _start(self, name, target):
+        self.mgr.add(threads.AnacondaThread(name=name, target=target))
+
+    def activity_test(self):
+        """Starts, ends and waits for threads should be recorded."""
+
+        event = threading.Event()
+        self._start("AnaTestThread", event.wait)
+
+        activity = self.mgr.get_activity()
+        self.assertEqual([a["name"] for a in activity["running"]], ["AnaTestThread"])
+        self.assertEqual(activity["finished"], [])
+
+        threading.Timer(0.1, event.set).start()
+        self.mgr.wait("AnaTestThread")
+
+        activity = self.mgr.get_activity()
+        self.assertEqual(activity["running"], [])
+        self.assertEqual(len(activity["finished"]), 1)
+        finished = activity["finished"][0]
+        self.assertGreaterEqual(finished["finished"], finished["started"])
+
+        self.assertEqual(len(activity["waits"]), 1)
+        wait = activity["waits"][0]
+        self.assertEqual(wait["thread"], "AnaTestThread")
+        self.assertEqual(wait["waiter"], threading.current_thread().name)
+        self.assertGreater(wait["duration"], 0.05)
+
+        # waiting for a thread that doesn't run is not recorded
+        self.mgr.wait("AnaTestThread")
+        self.assertEqual(len(self.mgr.get_activity()["waits"]), 1)
+
+    def sample_test(self):
+        """Stacks of long running threads should be sampled."""
+
+        event = threading.Event()
+        def blocked_function():
+            event.wait()
+
+        self._start("AnaTestThread", blocked_function)
+        try:
+            # too young to be sampled
+            self.mgr.sample_stacks(min_age=60)
+            self.assertEqual(self.mgr.get_activity()["running"][0]["samples"], [])
+
+            time.sleep(0.05)
+            self.mgr.sample_stacks(min_age=0)
+            samples = self.mgr.get_activity()["running"][0]["samples"]
+            self.assertEqual(len(samples), 1)
+            self.assertTrue(any("blocked_function" in frame for frame in samples[0]["stack"]))
+        finally:
+            event.set()
+            self.mgr.wait("AnaTestThread")
+
+    def dump_test(self):
+        """The activity should be written to a JSON file."""
+
+        import json
+        import tempfile
+
+        self._start("AnaTestThread", lambda: None)
+        self.mgr.wait("AnaTestThread")
+
+        with tempfile.NamedTemporaryFile() as f:
+            self.mgr.dump_activity(f.name)
+            activity = json.load(f)
+
+        self.assertEqual(activity["finished"][0]["name"], "AnaTestThread")
+        self.assertEqual(activity["waits"][0]["thread"], "AnaTestThread")
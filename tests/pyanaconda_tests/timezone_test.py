@@ -19,6 +19,9 @@
 #
 
 from pyanaconda import timezone
+from nose.plugins.attrib import attr
+import pytz
+import time
 import unittest
 import mock
 
@@ -38,6 +41,45 @@ class TimezonesListings(unittest.TestCase):
             for zone in zones:
                 self.assertTrue(timezone.is_valid_timezone(region + "/" + zone))
 
+    def region_timezones_test(self):
+        """Check if sorted region timezones match the regions' timezones."""
+
+        for (region, zones) in timezone.get_all_regions_and_timezones().iteritems():
+            self.assertEqual(timezone.get_region_timezones(region), tuple(sorted(zones)))
+
+        self.assertEqual(timezone.get_region_timezones("Nonexistent"), ())
+
+    def valid_timezones_test(self):
+        """Check validity of various timezone specifications."""
+
+        self.assertTrue(timezone.is_valid_timezone("Europe/Prague"))
+        self.assertTrue(timezone.is_valid_timezone("Etc/GMT+1"))
+        self.assertTrue(timezone.is_valid_timezone("UTC"))
+        self.assertFalse(timezone.is_valid_timezone("Europe"))
+        self.assertFalse(timezone.is_valid_timezone("Etc/GMT+0"))
+        self.assertFalse(timezone.is_valid_timezone("Nonexistent/City"))
+
+    @attr("slow")
+    def is_valid_timezone_benchmark_test(self):
+        """Compare speed of the indexed and the original timezone validation."""
+
+        zones = list(pytz.common_timezones) + ["Nonexistent/City"] * 100
+
+        start = time.time()
+        for zone in zones:
+            etc_zones = ["Etc/" + etc_zone for etc_zone in timezone.ETC_ZONES]
+            _valid = zone in pytz.common_timezones + etc_zones
+        original_time = time.time() - start
+
+        start = time.time()
+        for zone in zones:
+            timezone.is_valid_timezone(zone)
+        indexed_time = time.time() - start
+
+        print("is_valid_timezone for %d timezones: original %.3f s, indexed %.3f s"
+              % (len(zones), original_time, indexed_time))
+        self.assertLess(indexed_time, original_time)
+
 class TerritoryTimezones(unittest.TestCase):
     def string_valid_territory_zone_test(self):
         """Check if the returned value is string for a valid territory."""
@@ -0,0 +1,100 @@
+#
+# Copyright (C) 2014  Red Hat, Inc.
+#
+# This copyrighted material is made available to anyone wishing to use,
+# modify, copy, or redistribute it subject to the terms and conditions of
+# the GNU General Public License v.2, or (at your option) any later version.
+# This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY expressed or implied, including the implied warranties of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.  You should have received a copy of the
+# GNU General Public License along with this program; if not, write to the
+# Free Software Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA
+# 02110-1301, USA.  Any Red Hat trademarks that are incorporated in the
+# source code or documentation are not subject to the GNU General Public
+# License and may only be used or replicated with the express permission of
+# Red Hat, Inc.
+#
+
+from pyanaconda import threads
+from pyanaconda import users
+import crypt
+import unittest
+
+class CryptPasswordTests(unittest.TestCase):
+    def setUp(self):
+        self._orig_thread_mgr = threads.threadMgr
+        threads.threadMgr = threads.ThreadManager()
+
+    def tearDown(self):
+        threads.threadMgr.wait_all()
+        threads.threadMgr = self._orig_thread_mgr
+        users._cryptCache.clear()
+
+    def _check(self, cryptpw, password, prefix):
+        self.assertTrue(cryptpw.startswith(prefix))
+        self.assertEqual(crypt.crypt(password, cryptpw), cryptpw)
+
+    def crypt_test(self):
+        """Passwords should be encrypted with the given algorithm."""
+
+        self._check(users.cryptPassword("password"), "password", "$6$")
+        self._check(users.cryptPassword("password", "sha256"), "password", "$5$")
+        self._check(users.cryptPassword("password", "md5"), "password", "$1$")
+
+        # random salts
+        self.assertNotEqual(users.cryptPassword("password"), users.cryptPassword("password"))
+
+    def precrypt_test(self):
+        """Passwords encrypted in advance should be used once."""
+
+        users.precryptPassword("password")
+        users.precryptPassword("password", "sha256")
+        future = users._cryptCache[("password", "sha512")][2]
+        future.wait()
+
+        # the same password is not encrypted twice
+        users.precryptPassword("password", "sha512")
+        self.assertIs(users._cryptCache[("password", "sha512")][2], future)
+
+        cryptpw = users.cryptPassword("password")
+        self.assertEqual(cryptpw, future.result())
+        self._check(cryptpw, "password", "$6$")
+
+        # the next one gets a new salt
+        self.assertNotEqual(users.cryptPassword("password"), cryptpw)
+
+        self._check(users.cryptPassword("password", "sha256"), "password", "$5$")
+        self.assertEqual(users._cryptCache, {})
+
+    def precrypt_key_test(self):
+        """Only the last password precrypted for a key should be kept."""
+
+        users.precryptPassword("first", key="rootpw")
+        users.precryptPassword("second", key="rootpw")
+        users.precryptPassword("other", key="user")
+        self.assertEqual(sorted((key, entry[0]) for (key, entry) in users._cryptCache.items()),
+                         [("rootpw", "second"), ("user", "other")])
+
+        # the same password is not encrypted twice
+        future = users._cryptCache["rootpw"][2]
+        users.precryptPassword("second", key="rootpw")
+        self.assertIs(users._cryptCache["rootpw"][2], future)
+
+        # the first password is encrypted again
+        cryptpw = users.cryptPassword("first")
+        self._check(cryptpw, "first", "$6$")
+        self.assertIn("rootpw", users._cryptCache)
+
+        self.assertEqual(users.cryptPassword("second"), future.result())
+        self.assertEqual(users._cryptCache.keys(), ["user"])
+
+    def forget_test(self):
+        """Passwords that won't be used should be dropped."""
+
+        users.precryptPassword("password", key="rootpw")
+        users.forgetPrecryptedPassword("rootpw")
+        users.forgetPrecryptedPassword("user")
+        self.assertEqual(users._cryptCache, {})
+
+        self._check(users.cryptPassword("password"), "password", "$6$")